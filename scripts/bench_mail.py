@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+邮件发送基准测试（本地 SMTP 替身）
+
+用法：
+- python -m scripts.bench_mail transport                       # 每封新建连接 vs 连接池
+- python -m scripts.bench_mail fanout --orders 200 --staff 5          # 逐员工发送 vs 渠道合并发送
+- python -m scripts.bench_mail send-mail --messages 1000 --rate 200   # 以固定速率调用 send_mail
+- python -m scripts.bench_mail notify --orders 500 --staff 3 --rate 100
+- python -m scripts.bench_mail order-create --orders 1000 --staff 3 --rate 50
+- python -m scripts.bench_mail order-create --transport unpooled --no-digest
+
+说明：
+- 启动进程内的 `scripts.smtp_standin` 服务器，并把邮件配置指向它；
+  `--handshake-delay` 模拟 TCP + TLS 握手与登录开销，`--latency` 模拟每条命令的往返时间；
+- `--rate` 为目标速率（每秒），按计划时间开环发起请求，延迟从计划时间开始计算，
+  排队等待也计入延迟；0 表示尽快发起；
+- `--transport unpooled` 使用"每封邮件新建连接、登录、QUIT"的方式，便于与连接池对比；
+- 各场景输出：每秒完成数、p50/p99 延迟、SMTP 连接数与平均握手耗时、
+  SMTP 事务数（DATA 次数）与收件人数；
+- transport：直接对比逐封连接与 `SMTPConnectionPool`；
+- fanout：新订单通知逐员工各发一封（旧方式）与渠道员工合并为一次 SMTP 事务对比；
+- send-mail / notify：驱动 `send_mail` 与 `send_new_order_notification_email`；
+- order-create：在临时 SQLite 数据库上通过 TestClient 调用 `POST /api/orders/create`，
+  后台运行发件箱派发器；输出下单延迟，以及全部请求完成后发件箱清空所需的时间。
+"""
+
+from __future__ import annotations
+
+import argparse
+import smtplib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.mime.text import MIMEText
+from pathlib import Path
+from statistics import quantiles
+from typing import Callable, Iterator
+
+from scripts.smtp_standin import SMTPStandIn
+from src.server.mail_sender import service as mail_service
+from src.server.mail_sender.config import mail_sender_config
+from src.server.mail_sender.schemas import (
+    MailAddress,
+    MailContent,
+    NewOrderNotificationPayload,
+)
+from src.server.mail_sender.service import MailTransport, SMTPConnectionPool
+
+SENDER = "bench@example.com"
+
+
+class HandshakeTimer:
+    """统计建立连接（含握手与登录）的次数与耗时"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, factory: Callable[[], smtplib.SMTP]) -> Callable[[], smtplib.SMTP]:
+        def connect() -> smtplib.SMTP:
+            start = time.perf_counter()
+            server = factory()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.total_seconds += elapsed
+            return server
+
+        return connect
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_seconds / self.count * 1000 if self.count else 0.0
+
+
+class UnpooledTransport:
+    """每封邮件新建连接、登录、QUIT（连接池之前的发送方式）"""
+
+    def __init__(self, connection_factory: Callable[[], smtplib.SMTP]):
+        self.connection_factory = connection_factory
+
+    def sendmail(
+        self, from_addr: str, to_addrs: list[str], message: str
+    ) -> dict[str, tuple[int, bytes]]:
+        server = self.connection_factory()
+        try:
+            return server.sendmail(from_addr, to_addrs, message)
+        finally:
+            server.quit()
+
+    def close_all(self) -> None:
+        pass
+
+
+def point_mail_config_at(standin: SMTPStandIn) -> None:
+    """把邮件配置指向替身服务器（明文 SMTP）"""
+    host, port = standin.address
+    mail_sender_config.smtp_host = host
+    mail_sender_config.smtp_port = port
+    mail_sender_config.use_ssl = False
+    mail_sender_config.use_tls = False
+    mail_sender_config.timeout = 10
+
+
+def install_transport(kind: str, size: int) -> HandshakeTimer:
+    """替换模块级连接池（send_mail 在调用时读取），返回握手计时器"""
+    timer = HandshakeTimer()
+    pool = SMTPConnectionPool(max_size=size)
+    connect = timer.wrap(pool.connection_factory)
+    if kind == "unpooled":
+        mail_service.smtp_pool = UnpooledTransport(connect)
+    else:
+        pool.connection_factory = connect
+        mail_service.smtp_pool = pool
+    return timer
+
+
+def drive(
+    func: Callable[[int], None], count: int, rate: float, threads: int
+) -> tuple[list[float], float]:
+    """以目标速率调用 func(i)，返回 (每次延迟毫秒, 总耗时秒)"""
+
+    def timed(index: int, scheduled: float | None) -> float:
+        begin = scheduled if scheduled is not None else time.perf_counter()
+        func(index)
+        return (time.perf_counter() - begin) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        futures = []
+        for i in range(count):
+            scheduled = None
+            if rate > 0:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(executor.submit(timed, i, scheduled))
+        latencies = [future.result() for future in futures]
+    return latencies, time.perf_counter() - start
+
+
+def report(
+    label: str,
+    latencies: list[float],
+    elapsed: float,
+    standin: SMTPStandIn,
+    timer: HandshakeTimer,
+) -> None:
+    cuts = quantiles(latencies, n=100)
+    print(
+        f"{label}: {len(latencies) / elapsed:.0f}/s  "
+        f"p50={cuts[49]:.2f} ms  p99={cuts[98]:.2f} ms"
+    )
+    print(
+        f"smtp: connections={standin.stats.connections} "
+        f"handshake={timer.mean_ms:.2f} ms  transactions={standin.stats.messages} "
+        f"recipients={standin.stats.recipients}"
+    )
+
+
+def print_header(args: argparse.Namespace, **extra) -> None:
+    settings = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(
+        f"{settings} rate={args.rate or 'max'} threads={args.threads} "
+        f"transport={args.transport} "
+        f"handshake_delay={args.handshake_delay * 1000:.0f} ms "
+        f"latency={args.latency * 1000:.1f} ms"
+    )
+
+
+def staff_addresses(count: int) -> list[MailAddress]:
+    return [
+        MailAddress(email=f"staff{i}@example.com", name=f"员工{i}")
+        for i in range(count)
+    ]
+
+
+def order_payload(
+    order_id: int, recipients: list[MailAddress]
+) -> NewOrderNotificationPayload:
+    return NewOrderNotificationPayload(
+        recipients=recipients,
+        order_id=order_id,
+        card_name="基准卡",
+        activation_code=f"BENCH{order_id:012d}",
+        created_at=datetime.now(timezone.utc),
+        channel_name="基准渠道",
+    )
+
+
+def build_message(index: int) -> str:
+    message = MIMEText(f"<p>基准测试邮件 {index}</p>", "html", "utf-8")
+    message["From"] = SENDER
+    message["To"] = "staff@example.com"
+    message["Subject"] = f"基准测试 {index}"
+    return message.as_string()
+
+
+def run_transport(args: argparse.Namespace) -> None:
+    with SMTPStandIn(handshake_delay=args.handshake_delay) as standin:
+        host, port = standin.address
+        messages = [build_message(i) for i in range(args.messages)]
+
+        def connect() -> smtplib.SMTP:
+            server = smtplib.SMTP(host, port, timeout=10)
+            server.login(SENDER, "secret")
+            return server
+
+        print(
+            f"messages={args.messages} threads={args.threads} "
+            f"handshake_delay={args.handshake_delay * 1000:.0f} ms"
+        )
+        print(f"{'mode':>9} {'msgs/s':>9} {'connections':>12} {'handshake ms':>13}")
+        for name in ("unpooled", "pooled"):
+            timer = HandshakeTimer()
+            transport: MailTransport
+            if name == "unpooled":
+                transport = UnpooledTransport(timer.wrap(connect))
+            else:
+                transport = SMTPConnectionPool(
+                    timer.wrap(connect), max_size=args.threads
+                )
+
+            def send(message: str) -> None:
+                transport.sendmail(SENDER, ["staff@example.com"], message)
+
+            standin.reset_stats()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as executor:
+                list(executor.map(send, messages))
+            elapsed = time.perf_counter() - start
+            transport.close_all()
+            assert standin.stats.messages == args.messages
+            print(
+                f"{name:>9} {args.messages / elapsed:>9.0f} "
+                f"{standin.stats.connections:>12} {timer.mean_ms:>13.2f}"
+            )
+
+
+def run_fanout(args: argparse.Namespace) -> None:
+    staff = staff_addresses(args.staff)
+
+    def per_staff(order_id: int) -> None:
+        for recipient in staff:
+            result = mail_service.send_new_order_notification_email(
+                order_payload(order_id, [recipient])
+            )
+            assert result.success, result.error
+
+    def batched(order_id: int) -> None:
+        result = mail_service.send_new_order_notification_email(
+            order_payload(order_id, staff)
+        )
+        assert result.success, result.error
+
+    with SMTPStandIn(handshake_delay=args.handshake_delay) as standin:
+        point_mail_config_at(standin)
+        print(
+            f"orders={args.orders} staff={args.staff} threads={args.threads} "
+            f"handshake_delay={args.handshake_delay * 1000:.0f} ms"
+        )
+        print(f"{'mode':>9} {'orders/s':>9} {'transactions':>13} {'recipients':>11}")
+        for name, func in (("per-staff", per_staff), ("batched", batched)):
+            install_transport("pooled", args.threads)
+            standin.reset_stats()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as executor:
+                list(executor.map(func, range(args.orders)))
+            elapsed = time.perf_counter() - start
+            mail_service.smtp_pool.close_all()
+            print(
+                f"{name:>9} {args.orders / elapsed:>9.0f} "
+                f"{standin.stats.messages:>13} {standin.stats.recipients:>11}"
+            )
+
+
+def run_send_mail(args: argparse.Namespace) -> None:
+    mails = [
+        MailContent(
+            subject=f"基准测试 {i}",
+            body=f"基准测试邮件 {i}",
+            recipients=[MailAddress(email="staff@example.com")],
+        )
+        for i in range(args.messages)
+    ]
+
+    def send(index: int) -> None:
+        result = mail_service.send_mail(mails[index])
+        assert result.success, result.error
+
+    with SMTPStandIn(
+        handshake_delay=args.handshake_delay, latency=args.latency
+    ) as standin:
+        point_mail_config_at(standin)
+        timer = install_transport(args.transport, args.threads)
+        latencies, elapsed = drive(send, args.messages, args.rate, args.threads)
+        mail_service.smtp_pool.close_all()
+        print_header(args, messages=args.messages)
+        report("send_mail", latencies, elapsed, standin, timer)
+
+
+def run_notify(args: argparse.Namespace) -> None:
+    staff = staff_addresses(args.staff)
+
+    def notify(index: int) -> None:
+        result = mail_service.send_new_order_notification_email(
+            order_payload(index, staff)
+        )
+        assert result.success, result.error
+
+    with SMTPStandIn(
+        handshake_delay=args.handshake_delay, latency=args.latency
+    ) as standin:
+        point_mail_config_at(standin)
+        timer = install_transport(args.transport, args.threads)
+        latencies, elapsed = drive(notify, args.orders, args.rate, args.threads)
+        mail_service.smtp_pool.close_all()
+        print_header(args, orders=args.orders, staff=args.staff)
+        report("notify", latencies, elapsed, standin, timer)
+
+
+def run_order_create(args: argparse.Namespace) -> None:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import Session, sessionmaker
+
+    from scripts.bench_order_create import seed
+    from src.server.database import Base, configure_sqlite_engine, get_db
+    from src.server.mail_sender import outbox
+    from src.server.mail_sender.models import (
+        NotificationOutbox,
+        NotificationOutboxStatus,
+    )
+    from src.server.main import app
+
+    with (
+        SMTPStandIn(
+            handshake_delay=args.handshake_delay, latency=args.latency
+        ) as standin,
+        tempfile.TemporaryDirectory() as tmp_dir,
+    ):
+        point_mail_config_at(standin)
+        mail_sender_config.digest_enabled = not args.no_digest
+        timer = install_transport(args.transport, mail_sender_config.smtp_pool_size)
+
+        engine = create_engine(
+            f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        configure_sqlite_engine(engine)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        channel_id, codes = seed(session_factory, args.orders, args.staff)
+
+        def override_get_db() -> Iterator[Session]:
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        # 不进入 lifespan，避免初始化项目数据库文件；派发器在此单独启动
+        client = TestClient(app)
+        outbox.start_outbox_dispatcher(session_factory)
+
+        def create(index: int) -> None:
+            resp = client.post(
+                "/api/orders/create",
+                json={"code": codes[index], "channel_id": channel_id},
+            )
+            assert resp.status_code == 201, resp.text
+
+        latencies, elapsed = drive(create, args.orders, args.rate, args.threads)
+
+        # 等待发件箱中可发送的记录清空；处于摘要合并窗口内的记录单独统计
+        drain_start = time.perf_counter()
+        status = NotificationOutbox.status
+        while True:
+            now = datetime.now(timezone.utc)
+            with session_factory() as db:
+                due, held = db.execute(
+                    select(
+                        func.count().filter(
+                            (status == NotificationOutboxStatus.SENDING)
+                            | (
+                                (status == NotificationOutboxStatus.PENDING)
+                                & (NotificationOutbox.next_attempt_at <= now)
+                            )
+                        ),
+                        func.count().filter(
+                            (status == NotificationOutboxStatus.PENDING)
+                            & (NotificationOutbox.next_attempt_at > now)
+                        ),
+                    )
+                ).one()
+            if not due or time.perf_counter() - drain_start > args.drain_timeout:
+                break
+            time.sleep(0.05)
+        drain_seconds = time.perf_counter() - drain_start
+
+        outbox.stop_outbox_dispatcher()
+        mail_service.smtp_pool.close_all()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+        print_header(
+            args,
+            orders=args.orders,
+            staff=args.staff,
+            digest="off" if args.no_digest else "on",
+        )
+        report("order-create", latencies, elapsed, standin, timer)
+        print(
+            f"outbox: drained in {drain_seconds:.2f} s after last request, "
+            f"due={due} held_in_digest_window={held}"
+        )
+
+
+def add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rate", type=float, default=0, help="目标速率（每秒），0 为尽快"
+    )
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--transport", choices=["pooled", "unpooled"], default="pooled")
+    parser.add_argument("--handshake-delay", type=float, default=0.03)
+    parser.add_argument("--latency", type=float, default=0.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="邮件发送基准测试")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    transport = subparsers.add_parser("transport", help="连接池与逐封连接对比")
+    transport.add_argument("--messages", type=int, default=500)
+    transport.add_argument("--threads", type=int, default=4)
+    transport.add_argument("--handshake-delay", type=float, default=0.03)
+    transport.set_defaults(func=run_transport)
+
+    fanout = subparsers.add_parser("fanout", help="新订单通知逐员工与合并发送对比")
+    fanout.add_argument("--orders", type=int, default=200)
+    fanout.add_argument("--staff", type=int, default=5)
+    fanout.add_argument("--threads", type=int, default=4)
+    fanout.add_argument("--handshake-delay", type=float, default=0.03)
+    fanout.set_defaults(func=run_fanout)
+
+    send = subparsers.add_parser("send-mail", help="以固定速率调用 send_mail")
+    send.add_argument("--messages", type=int, default=500)
+    add_load_arguments(send)
+    send.set_defaults(func=run_send_mail)
+
+    notify = subparsers.add_parser("notify", help="以固定速率发送新订单通知")
+    notify.add_argument("--orders", type=int, default=300)
+    notify.add_argument("--staff", type=int, default=3)
+    add_load_arguments(notify)
+    notify.set_defaults(func=run_notify)
+
+    order_create = subparsers.add_parser(
+        "order-create", help="以固定速率下单，后台派发通知"
+    )
+    order_create.add_argument("--orders", type=int, default=500)
+    order_create.add_argument("--staff", type=int, default=3)
+    order_create.add_argument("--no-digest", action="store_true", help="关闭摘要合并")
+    order_create.add_argument("--drain-timeout", type=float, default=30.0)
+    add_load_arguments(order_create)
+    order_create.set_defaults(func=run_order_create)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
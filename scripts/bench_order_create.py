@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下单接口延迟基准测试
+
+用法：
+- python -m scripts.bench_order_create                  # 默认 2000 单
+- python -m scripts.bench_order_create --orders 5000 --staff 3
+- python -m scripts.bench_order_create --direct          # 直接调用服务层，不经过 HTTP
+
+说明：
+- 在临时目录创建 SQLite 文件数据库，写入渠道、充值卡与卡密，
+  通过 TestClient 逐个调用 `POST /api/orders/create`，统计 p50/p99 延迟
+  以及每个请求执行的 SQL 语句数；
+- `--staff` 为渠道创建的员工数；每个订单为每名员工写入一条发件箱记录，
+  邮件由后台派发器发送（基准测试不启动派发器），因此延迟与邮件服务器无关。
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean, quantiles
+from typing import Iterator
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.server.database import Base, get_db
+import src.server.auth.models  # noqa: F401
+import src.server.proxy.models  # noqa: F401
+import src.server.sale.models  # noqa: F401
+import src.server.mail_sender.models  # noqa: F401
+from src.server.activation_code.models import ActivationCode
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.service import verify_activation_code
+
+
+def seed(session_factory: sessionmaker, orders: int, staff: int) -> tuple[int, list]:
+    """写入基准数据，返回 (渠道ID, 卡密列表)"""
+    db = session_factory()
+    channel = Channel(name="基准渠道")
+    db.add(channel)
+    db.flush()
+    card = Card(name="基准卡", description="基准", price=9.9, channel_id=channel.id)
+    db.add(card)
+    for i in range(staff):
+        user = User(
+            username=f"staff{i}",
+            email=f"staff{i}@example.com",
+            role=Role.STAFF,
+            channel_id=channel.id,
+            password_hash="-",
+        )
+        db.add(user)
+    db.commit()
+
+    codes = [f"BENCH{i:012d}" for i in range(orders)]
+    db.execute(
+        insert(ActivationCode),
+        [{"card_id": card.id, "code": code, "status": "available"} for code in codes],
+    )
+    db.commit()
+    channel_id = channel.id
+    db.close()
+    return channel_id, codes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="下单接口延迟基准测试")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--staff", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument(
+        "--direct", action="store_true", help="直接调用服务层，排除 HTTP 与线程池开销"
+    )
+    args = parser.parse_args()
+
+    from src.server.main import app
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(
+            f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        channel_id, codes = seed(session_factory, args.orders + args.warmup, args.staff)
+
+        statements = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(*_):
+            nonlocal statements
+            statements += 1
+
+        def override_get_db() -> Iterator[Session]:
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        # 不进入 lifespan，避免初始化项目数据库文件
+        client = TestClient(app)
+
+        def create(code: str) -> float:
+            start = time.perf_counter()
+            if args.direct:
+                with session_factory() as db:
+                    verify_activation_code(db, code, channel_id)
+            else:
+                resp = client.post(
+                    "/api/orders/create", json={"code": code, "channel_id": channel_id}
+                )
+                assert resp.status_code == 201, resp.text
+            return (time.perf_counter() - start) * 1000
+
+        for code in codes[: args.warmup]:
+            create(code)
+
+        statements = 0
+        timings = [create(code) for code in codes[args.warmup :]]
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    cuts = quantiles(timings, n=100)
+    mode = "service" if args.direct else "route"
+    print(f"orders={len(timings)} staff={args.staff} mode={mode}")
+    print(f"p50={cuts[49]:.2f} ms  p99={cuts[98]:.2f} ms  mean={mean(timings):.2f} ms")
+    print(f"sql statements/request={statements / len(timings):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡密与订单列表序列化基准测试
+
+用法：
+- python -m scripts.bench_serialization                 # 默认 10000 与 100000 行卡密
+- python -m scripts.bench_serialization --rows 50000 --repeat 5
+- python -m scripts.bench_serialization --target orders --rows 100000
+
+对比两条路径（均在内存 SQLite 上，包含查询时间）：
+- codes / orm：joinedload 查询 ORM 对象 -> 按 response_model 校验 -> 标准库 json 编码
+  （与 FastAPI 处理 `response_model=list[ActivationCodeOut]` 的流程一致）
+- orders / orm：joinedload 两级关联（卡密 -> 充值卡）加载处理中订单 -> 逐行构造 `OrderOut`
+  -> orjson 编码（列投影读取模型之前的处理中订单列表路径）
+- fast：列投影查询 -> 直接构造字典 -> orjson 编码（`FastJSONResponse`）
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from statistics import median
+from typing import Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.server.database import Base
+import src.server.auth.models  # noqa: F401
+import src.server.proxy.models  # noqa: F401
+from src.server.activation_code.models import ActivationCode
+from src.server.activation_code.schemas import ActivationCodeOut
+from src.server.activation_code.service import (
+    list_activation_code_rows_by_card,
+    list_activation_codes_by_card,
+)
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.models import Order
+from src.server.order.schemas import OrderStatus
+from src.server.order.service import list_processing_order_rows
+from src.server.order.service.retrieval import _build_order_out
+from src.server.responses import FastJSONResponse
+
+
+def build_session(rows: int, with_orders: bool = False) -> Session:
+    """创建内存数据库并写入指定数量的卡密（以及每个卡密对应的处理中订单）"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    channel = Channel(name="基准渠道")
+    db.add(channel)
+    db.flush()
+    card = Card(name="基准卡", description="基准", price=9.9, channel_id=channel.id)
+    db.add(card)
+    db.commit()
+
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(ActivationCode),
+        [
+            {
+                "card_id": card.id,
+                "code": f"{i:064x}",
+                "status": "available",
+                "created_at": now,
+                "exported": False,
+                "is_sold": False,
+            }
+            for i in range(rows)
+        ],
+    )
+    if with_orders:
+        db.execute(
+            insert(Order),
+            [
+                {
+                    "activation_code": f"{i:064x}",
+                    "status": "processing",
+                    "created_at": now,
+                    "user_id": 0,
+                    "channel_id": channel.id,
+                    "card_name": "基准卡",
+                }
+                for i in range(rows)
+            ],
+        )
+    db.commit()
+    return db
+
+
+def orm_path(db: Session, card_id: int) -> bytes:
+    adapter = TypeAdapter(list[ActivationCodeOut])
+    codes = list_activation_codes_by_card(db, card_id)
+    validated = adapter.validate_python(codes, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(db: Session, card_id: int) -> bytes:
+    return FastJSONResponse(list_activation_code_rows_by_card(db, card_id)).body
+
+
+def orders_orm_path(db: Session, card_id: int) -> bytes:
+    # 列投影之前的读取方式：加载 ORM 对象图后逐个构造 OrderOut
+    orders = (
+        db.query(Order)
+        .options(joinedload(Order.activation_code_obj).joinedload(ActivationCode.card))
+        .filter(Order.status == OrderStatus.PROCESSING)
+        .order_by(Order.created_at.asc())
+        .all()
+    )
+    return FastJSONResponse([_build_order_out(order) for order in orders]).body
+
+
+def orders_fast_path(db: Session, card_id: int) -> bytes:
+    return FastJSONResponse(list_processing_order_rows(db)).body
+
+
+PATHS = {
+    "codes": (("orm", orm_path), ("fast", fast_path)),
+    "orders": (("orm", orders_orm_path), ("fast", orders_fast_path)),
+}
+
+
+def measure(func: Callable[[], bytes], repeat: int) -> tuple[float, int]:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func())
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="卡密与订单列表序列化基准测试")
+    parser.add_argument("--target", choices=sorted(PATHS), default="codes")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'path':>5} {'median ms':>10} {'bytes':>12}")
+    for rows in args.rows:
+        db = build_session(rows, with_orders=args.target == "orders")
+        card_id = db.query(Card.id).scalar()
+        results = {}
+        for name, func in PATHS[args.target]:
+            # 每轮前清空会话标识映射，避免 ORM 路径复用已加载对象
+            def run(func=func) -> bytes:
+                db.expunge_all()
+                return func(db, card_id)
+
+            results[name] = measure(run, args.repeat)
+            print(
+                f"{rows:>8} {name:>5} {results[name][0]:>10.1f} {results[name][1]:>12}"
+            )
+        print(f"{'':>8} speedup x{results['orm'][0] / results['fast'][0]:.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
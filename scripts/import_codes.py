@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+从供应商文件批量导入卡密的 CLI
+
+用法：
+- python -m scripts.import_codes codes.csv --card-id 1
+- python -m scripts.import_codes codes.ndjson --card-id 1 --proxy-user-id 3
+- python -m scripts.import_codes codes.txt --card-id 1 --format csv --batch-size 5000
+
+说明：
+- 文件逐行流式读取，内存中只保留当前批次，可处理数百万行的文件；
+- CSV 第一行若包含 `code` 列名则按该列读取，否则读取第一列；
+- NDJSON 每行为 {"code": "..."} 或 JSON 字符串。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from fastapi import HTTPException
+from loguru import logger
+
+from src.server.database import SessionLocal
+from src.server.activation_code.importer import (
+    DEFAULT_BATCH_SIZE,
+    detect_import_format,
+    import_activation_codes,
+)
+from src.server.activation_code.schemas import ActivationCodeImportFormat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="流式导入外部卡密")
+    parser.add_argument("path", type=Path, help="CSV 或 NDJSON 文件路径")
+    parser.add_argument("--card-id", type=int, required=True, help="充值卡ID")
+    parser.add_argument("--proxy-user-id", type=int, default=None, help="代理商ID")
+    parser.add_argument(
+        "--format",
+        choices=[fmt.value for fmt in ActivationCodeImportFormat],
+        default=None,
+        help="文件格式，缺省时根据文件后缀推断",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="每个事务写入的行数",
+    )
+    args = parser.parse_args()
+
+    fmt = (
+        ActivationCodeImportFormat(args.format)
+        if args.format
+        else detect_import_format(filename=args.path.name)
+    )
+
+    db = SessionLocal()
+    try:
+        with args.path.open("r", encoding="utf-8-sig", newline="") as f:
+            result = import_activation_codes(
+                db,
+                f,
+                card_id=args.card_id,
+                proxy_user_id=args.proxy_user_id,
+                fmt=fmt,
+                batch_size=args.batch_size,
+            )
+    except HTTPException as e:
+        logger.error("导入失败：{}", e.detail)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    logger.info(
+        "导入完成：读取 {} 行，写入 {}，文件内重复 {}，已存在 {}，不合法 {}，共 {} 批",
+        result.total_lines,
+        result.imported,
+        result.duplicates_in_file,
+        result.existing_in_db,
+        result.invalid,
+        result.batches,
+    )
+    for sample in result.invalid_samples:
+        logger.warning(sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重建代理商销售额日汇总表（proxy_revenue_daily）的 CLI
+
+用法：
+- python -m scripts.rebuild_proxy_revenue             # 从卡密表全量重建
+- python -m scripts.rebuild_proxy_revenue --if-empty  # 仅在汇总表为空时回填
+
+说明：
+- 汇总表平时由触发器维护，本脚本用于升级后的回填或数据修复；
+- 运行前会补建缺失的表与触发器，重建在一个事务内完成。
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from loguru import logger
+
+from src.server.database import SessionLocal, ensure_database_schema
+from src.server.proxy.dao import ProxyRevenueDAO
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="重建代理商销售额日汇总表")
+    parser.add_argument(
+        "--if-empty",
+        action="store_true",
+        help="仅在汇总表为空时回填",
+    )
+    args = parser.parse_args()
+
+    ensure_database_schema()
+
+    db = SessionLocal()
+    try:
+        dao = ProxyRevenueDAO(db)
+        if args.if_empty:
+            if dao.backfill_daily_if_empty():
+                logger.info("已回填代理商销售额日统计")
+            else:
+                logger.info("汇总表已有数据或没有已消费的代理商卡密，未回填")
+        else:
+            rows = dao.rebuild_daily()
+            logger.info("重建完成：写入 {} 行", rows)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
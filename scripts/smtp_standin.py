@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 SMTP 替身服务器（基准测试与联调用）
+
+用法：
+- python -m scripts.smtp_standin --port 8025
+- python -m scripts.smtp_standin --port 8025 --handshake-delay 0.05 --latency 0.002
+
+配合应用使用时设置：
+  MAIL_SMTP_HOST=127.0.0.1 MAIL_SMTP_PORT=8025 MAIL_USE_SSL=false
+
+说明：
+- 只实现发送邮件所需的最小命令集（EHLO/HELO、AUTH、MAIL、RCPT、DATA、RSET、NOOP、QUIT），
+  接受任意账号，收到的邮件只计数不保存；
+- `handshake_delay` 在发送欢迎语前等待，模拟 TCP + TLS 握手与登录的往返开销；
+  `latency` 在每条命令前等待，模拟网络往返时间。
+"""
+
+from __future__ import annotations
+
+import argparse
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class StandInStats:
+    connections: int = 0
+    messages: int = 0
+    recipients: int = 0
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        standin: SMTPStandIn = self.server.standin  # type: ignore[attr-defined]
+        standin._record(connections=1)
+        time.sleep(standin.handshake_delay)
+        self._reply("220 standin ESMTP ready")
+
+        in_data = False
+        auth_login_steps = 0
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    standin._record(messages=1)
+                    self._reply("250 OK: queued")
+                continue
+            if auth_login_steps:
+                auth_login_steps -= 1
+                self._reply(
+                    "235 Authentication successful"
+                    if not auth_login_steps
+                    else "334 UGFzc3dvcmQ6"
+                )
+                continue
+
+            time.sleep(standin.latency)
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self._reply("250-standin\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+            elif command == "HELO":
+                self._reply("250 standin")
+            elif command == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    auth_login_steps = 2
+                    self._reply("334 VXNlcm5hbWU6")
+                else:
+                    self._reply("235 Authentication successful")
+            elif command == "MAIL":
+                self._reply("250 OK")
+            elif command == "RCPT":
+                standin._record(recipients=1)
+                self._reply("250 OK")
+            elif command == "DATA":
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _reply(self, text: str) -> None:
+        self.wfile.write(f"{text}\r\n".encode())
+        self.wfile.flush()
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStandIn:
+    """在后台线程运行的 SMTP 替身服务器"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        handshake_delay: float = 0.0,
+        latency: float = 0.0,
+    ):
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.stats = StandInStats()
+        self._stats_lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.standin = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> "SMTPStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="smtp-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats = StandInStats()
+
+    def _record(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def __enter__(self) -> "SMTPStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地 SMTP 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--handshake-delay", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    standin = SMTPStandIn(args.host, args.port, args.handshake_delay, args.latency)
+    host, port = standin.address
+    print(f"SMTP stand-in listening on {host}:{port}（Ctrl+C 退出）")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin._server.server_close()
+        print(
+            f"connections={standin.stats.connections} "
+            f"messages={standin.stats.messages} recipients={standin.stats.recipients}"
+        )
+
+
+if __name__ == "__main__":
+    main()
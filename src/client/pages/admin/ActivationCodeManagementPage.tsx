@@ -175,7 +175,7 @@ export default function ActivationCodeManagementPage() {
   const handleDeleteAll = async (cardId: string) => {
     try {
       await api.delete(`/activation-codes/${cardId}`)
-      message.success('所有卡密删除成功')
+      message.success('卡密删除任务已提交，将在后台分批删除')
       setCodes([])
       setStats({ total: 0, used: 0, unused: 0 })
     } catch (error) {
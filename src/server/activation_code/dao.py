@@ -9,6 +9,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import Row, insert
 from sqlalchemy.orm import Session
 
 from src.server.dao.dao_base import BaseDAO
@@ -16,6 +19,12 @@ from .models import ActivationCode, CardCodeStatus
 from src.server.crypto.service import generate_activation_code
 
 
+# SQLite 默认限制单条语句的绑定参数数量，IN 查询按此大小分块
+EXISTENCE_CHECK_CHUNK_SIZE = 500
+# 分批删除时每个事务删除的最大行数，控制单次持有写锁的时间
+DELETE_BATCH_SIZE = 500
+
+
 class ActivationCodeDAO(BaseDAO):
     def __init__(self, db_session: Session):
         super().__init__(db_session)
@@ -68,6 +77,75 @@ class ActivationCodeDAO(BaseDAO):
             .first()
         )
 
+    def get_order_context(self, code: str) -> Row | None:
+        """一次连接查询获取卡密及其充值卡、渠道信息（下单校验用）
+
+        Returns:
+            Row | None: 列为 id、code、status、card_id、card_name、card_price、
+            channel_id、channel_name；充值卡或渠道缺失时对应列为 None
+        """
+        from src.server.card.models import Card
+        from src.server.channel.models import Channel
+
+        return (
+            self.db_session.query(
+                ActivationCode.id,
+                ActivationCode.code,
+                ActivationCode.status,
+                ActivationCode.card_id,
+                Card.name.label("card_name"),
+                Card.price.label("card_price"),
+                Card.channel_id,
+                Channel.name.label("channel_name"),
+            )
+            .outerjoin(Card, Card.id == ActivationCode.card_id)
+            .outerjoin(Channel, Channel.id == Card.channel_id)
+            .filter(ActivationCode.code == code)
+            .first()
+        )
+
+    def get_existing_codes(self, codes: Iterable[str]) -> set[str]:
+        """分块查询已存在于数据库中的卡密，返回已存在的卡密集合"""
+        pending = list(codes)
+        existing: set[str] = set()
+        for start in range(0, len(pending), EXISTENCE_CHECK_CHUNK_SIZE):
+            chunk = pending[start : start + EXISTENCE_CHECK_CHUNK_SIZE]
+            rows = (
+                self.db_session.query(ActivationCode.code)
+                .filter(ActivationCode.code.in_(chunk))
+                .all()
+            )
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def bulk_insert_codes(
+        self, card_id: int, codes: list[str], proxy_user_id: int | None = None
+    ) -> int:
+        """在一个事务内批量写入外部卡密，返回写入数量
+
+        不构造 ORM 对象，直接使用 executemany 插入，适合大批量导入。
+        """
+        if not codes:
+            return 0
+        now = datetime.now(timezone.utc)
+        self.db_session.execute(
+            insert(ActivationCode),
+            [
+                {
+                    "card_id": card_id,
+                    "code": code,
+                    "is_sold": False,
+                    "status": CardCodeStatus.AVAILABLE,
+                    "created_at": now,
+                    "proxy_user_id": proxy_user_id,
+                    "exported": False,
+                }
+                for code in codes
+            ],
+        )
+        self.db_session.commit()
+        return len(codes)
+
     def get_available_by_card_id(self, card_id: int) -> ActivationCode | None:
         """获取指定充值卡的可用卡密（未使用）"""
         return (
@@ -119,6 +197,43 @@ class ActivationCodeDAO(BaseDAO):
 
         return query.order_by(ActivationCode.created_at.desc()).all()
 
+    def list_rows(
+        self,
+        card_id: int | None = None,
+        proxy_user_id: int | None = None,
+        status: CardCodeStatus | None = None,
+        exported: bool | None = None,
+    ) -> list[Row]:
+        """按条件查询卡密的列元组（附带充值卡名称与价格），按创建时间倒序
+
+        只选取响应需要的列，不构造 ORM 对象，供大列表的快速序列化使用。
+        列顺序见 `serializers.CODE_ROW_COLUMNS`。
+        """
+        from src.server.card.models import Card
+
+        query = self.db_session.query(
+            ActivationCode.id,
+            ActivationCode.card_id,
+            ActivationCode.code,
+            ActivationCode.status,
+            ActivationCode.created_at,
+            ActivationCode.used_at,
+            ActivationCode.exported,
+            Card.name,
+            Card.price,
+        ).join(Card, Card.id == ActivationCode.card_id)
+
+        if card_id is not None:
+            query = query.filter(ActivationCode.card_id == card_id)
+        if proxy_user_id:
+            query = query.filter(ActivationCode.proxy_user_id == proxy_user_id)
+        if status:
+            query = query.filter(ActivationCode.status == status)
+        if exported is not None:
+            query = query.filter(ActivationCode.exported == exported)
+
+        return query.order_by(ActivationCode.created_at.desc()).all()
+
     def count_by_card_id(self, card_id: int, only_unused: bool = True) -> int:
         """统计指定充值卡的卡密数量"""
         query = self.db_session.query(ActivationCode).filter(
@@ -128,15 +243,42 @@ class ActivationCodeDAO(BaseDAO):
             query = query.filter(ActivationCode.status == CardCodeStatus.AVAILABLE)
         return query.count()
 
-    def delete_by_card_id(self, card_id: int) -> int:
-        """删除指定充值卡的所有卡密，返回删除的数量"""
-        deleted_count = (
-            self.db_session.query(ActivationCode)
+    def delete_by_card_id(
+        self, card_id: int, batch_size: int = DELETE_BATCH_SIZE
+    ) -> int:
+        """分批删除指定充值卡的所有卡密，返回删除的数量
+
+        每批在独立事务中提交，避免长时间持有 SQLite 写锁。
+        """
+        deleted_count = 0
+        while True:
+            deleted = self.delete_batch_by_card_id(card_id, batch_size)
+            if deleted == 0:
+                return deleted_count
+            deleted_count += deleted
+
+    def delete_batch_by_card_id(self, card_id: int, batch_size: int) -> int:
+        """按 ID 区间删除指定充值卡的一批卡密并提交，返回本批删除数量"""
+        ids = [
+            row[0]
+            for row in self.db_session.query(ActivationCode.id)
             .filter(ActivationCode.card_id == card_id)
-            .delete()
+            .order_by(ActivationCode.id.asc())
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return 0
+        deleted = (
+            self.db_session.query(ActivationCode)
+            .filter(
+                ActivationCode.card_id == card_id,
+                ActivationCode.id.between(ids[0], ids[-1]),
+            )
+            .delete(synchronize_session=False)
         )
         self.db_session.commit()
-        return deleted_count
+        return deleted
 
     def mark_as_exported(self, code_ids: list[int], user_id: int | None = None) -> int:
         """批量标记卡密为已导出
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+外部卡密流式导入
+
+公开接口：
+- `ActivationCodeImporter`：逐行接收 CSV/NDJSON 内容，按批次校验、去重并写入
+- `detect_import_format(filename, content_type)`：根据文件名或 Content-Type 推断格式
+- `create_importer(db, card_id, proxy_user_id, fmt, batch_size)`：校验后创建导入器
+- `import_activation_codes(db, lines, card_id, proxy_user_id, fmt, batch_size)`
+
+内部方法：
+- `_parse_csv_line`、`_parse_ndjson_line`
+
+说明：
+- 导入器只在内存中保留当前批次，适合处理数百万行的文件；
+- 批次内去重使用集合，跨批次与历史数据的去重依赖分块的数据库存在性检查；
+- 每个批次在独立事务中提交，批次大小即事务大小。
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+from typing import Iterable
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .dao import ActivationCodeDAO
+from .schemas import ActivationCodeImportFormat, ActivationCodeImportResult
+
+# 与下单接口的长度限制保持一致（OrderCreate.code 最长 88）
+CODE_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{3,87}$")
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+MAX_INVALID_SAMPLES = 20
+
+
+def detect_import_format(
+    filename: str | None = None, content_type: str | None = None
+) -> ActivationCodeImportFormat:
+    """根据文件名后缀或 Content-Type 推断导入格式，默认 CSV"""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return ActivationCodeImportFormat.NDJSON
+    if content_type and (
+        "ndjson" in content_type
+        or "jsonl" in content_type
+        or "json-lines" in content_type
+    ):
+        return ActivationCodeImportFormat.NDJSON
+    return ActivationCodeImportFormat.CSV
+
+
+class ActivationCodeImporter:
+    """流式卡密导入器
+
+    使用方式：多次调用 `feed_lines` 推送原始文本行，最后调用 `finish` 提交剩余批次
+    并获取导入结果。
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        card_id: int,
+        proxy_user_id: int | None = None,
+        fmt: ActivationCodeImportFormat = ActivationCodeImportFormat.CSV,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"批次大小必须在 1 到 {MAX_BATCH_SIZE} 之间")
+        self.dao = ActivationCodeDAO(db)
+        self.card_id = card_id
+        self.proxy_user_id = proxy_user_id
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.result = ActivationCodeImportResult(card_id=card_id)
+        self._batch: list[str] = []
+        self._batch_seen: set[str] = set()
+        self._line_no = 0
+        self._csv_code_column: int | None = None
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        """推送若干原始文本行，凑满一批即写入数据库"""
+        for line in lines:
+            self._line_no += 1
+            line = line.strip()
+            if not line:
+                continue
+            if self.fmt == ActivationCodeImportFormat.NDJSON:
+                code = self._parse_ndjson_line(line)
+            else:
+                code = self._parse_csv_line(line)
+                if code is None:  # 表头行
+                    continue
+            self.result.total_lines += 1
+
+            if code is None or not CODE_PATTERN.match(code):
+                self._record_invalid(f"第 {self._line_no} 行：卡密格式不合法")
+                continue
+            if code in self._batch_seen:
+                self.result.duplicates_in_file += 1
+                continue
+
+            self._batch_seen.add(code)
+            self._batch.append(code)
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def finish(self) -> ActivationCodeImportResult:
+        """提交剩余批次并返回导入结果"""
+        self._flush()
+        return self.result
+
+    def _flush(self) -> None:
+        """对当前批次做数据库去重后，在单个事务中写入"""
+        if not self._batch:
+            return
+        batch, self._batch, self._batch_seen = self._batch, [], set()
+
+        for attempt in range(2):
+            existing = self.dao.get_existing_codes(batch)
+            fresh = [code for code in batch if code not in existing]
+            try:
+                imported = self.dao.bulk_insert_codes(
+                    self.card_id, fresh, self.proxy_user_id
+                )
+                break
+            except IntegrityError:
+                # 检查与写入之间被并发写入了相同卡密，回滚后重新检查一次
+                self.dao.db_session.rollback()
+                if attempt == 1:
+                    raise
+
+        self.result.existing_in_db += len(existing)
+        self.result.imported += imported
+        self.result.batches += 1
+        logger.debug(
+            f"卡密导入批次提交：card_id={self.card_id} 写入 {imported}，"
+            f"已存在 {len(existing)}"
+        )
+
+    def _record_invalid(self, reason: str) -> None:
+        self.result.invalid += 1
+        if len(self.result.invalid_samples) < MAX_INVALID_SAMPLES:
+            self.result.invalid_samples.append(reason)
+
+    def _parse_csv_line(self, line: str) -> str | None:
+        """解析一行 CSV，第一行若包含 `code` 列名则视为表头"""
+        cells = next(csv.reader([line]), [])
+        if self._csv_code_column is None:
+            lowered = [cell.strip().lower() for cell in cells]
+            if "code" in lowered:
+                self._csv_code_column = lowered.index("code")
+                return None
+            self._csv_code_column = 0
+        if self._csv_code_column >= len(cells):
+            return ""
+        return cells[self._csv_code_column].strip()
+
+    def _parse_ndjson_line(self, line: str) -> str | None:
+        """解析一行 NDJSON，支持 {"code": "..."} 或直接为字符串"""
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(record, dict):
+            record = record.get("code")
+        return record.strip() if isinstance(record, str) else None
+
+
+def import_activation_codes(
+    db: Session,
+    lines: Iterable[str],
+    card_id: int,
+    proxy_user_id: int | None = None,
+    fmt: ActivationCodeImportFormat = ActivationCodeImportFormat.CSV,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ActivationCodeImportResult:
+    """从任意行迭代器导入卡密（供 CLI 等同步调用方使用）"""
+    importer = create_importer(db, card_id, proxy_user_id, fmt, batch_size)
+    importer.feed_lines(lines)
+    return importer.finish()
+
+
+def create_importer(
+    db: Session,
+    card_id: int,
+    proxy_user_id: int | None = None,
+    fmt: ActivationCodeImportFormat = ActivationCodeImportFormat.CSV,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ActivationCodeImporter:
+    """校验充值卡与代理商绑定后创建导入器"""
+    from src.server.card.models import Card
+    from .service import ensure_proxy_card_link
+
+    if not db.query(Card.id).filter(Card.id == card_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="充值卡不存在"
+        )
+    if proxy_user_id is not None:
+        ensure_proxy_card_link(db, proxy_user_id, card_id)
+
+    try:
+        return ActivationCodeImporter(db, card_id, proxy_user_id, fmt, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+卡密后台任务
+
+公开接口：
+- `submit_code_deletion(card_id)`：登记删除任务（同一充值卡已有进行中的任务时直接返回该任务）
+- `run_code_deletion(job_id, session_factory, batch_size, pause_seconds)`：执行删除任务
+- `get_code_deletion_job(job_id)`：查询任务进度
+
+内部方法：
+- `_update_job`、`_prune_finished_jobs`
+
+说明：
+- 任务状态保存在进程内存中，仅用于进度展示；进程重启后任务记录丢失，
+  但已提交的批次不会回滚，重新提交删除即可继续；
+- 每批删除后短暂让出写锁，使下单等写操作可以穿插执行。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from .dao import DELETE_BATCH_SIZE, ActivationCodeDAO
+from .schemas import CodeDeletionJobOut, CodeDeletionJobStatus
+
+# 两批之间让出写锁的时间（秒）
+DELETE_BATCH_PAUSE_SECONDS = 0.05
+# 内存中最多保留的已结束任务数
+MAX_FINISHED_JOBS = 100
+
+_jobs: dict[str, CodeDeletionJobOut] = {}
+_lock = threading.Lock()
+
+
+def submit_code_deletion(card_id: int) -> tuple[CodeDeletionJobOut, bool]:
+    """登记删除任务，返回 (任务, 是否为新建任务)"""
+    with _lock:
+        for job in _jobs.values():
+            if job.card_id == card_id and job.status in (
+                CodeDeletionJobStatus.PENDING,
+                CodeDeletionJobStatus.RUNNING,
+            ):
+                return job.model_copy(), False
+
+        job = CodeDeletionJobOut(
+            job_id=uuid.uuid4().hex,
+            card_id=card_id,
+            created_at=datetime.now(timezone.utc),
+        )
+        _jobs[job.job_id] = job
+        _prune_finished_jobs()
+        return job.model_copy(), True
+
+
+def get_code_deletion_job(job_id: str) -> CodeDeletionJobOut | None:
+    """查询任务进度（返回快照）"""
+    with _lock:
+        job = _jobs.get(job_id)
+        return job.model_copy() if job else None
+
+
+def run_code_deletion(
+    job_id: str,
+    session_factory: Callable[[], Session],
+    batch_size: int = DELETE_BATCH_SIZE,
+    pause_seconds: float = DELETE_BATCH_PAUSE_SECONDS,
+) -> None:
+    """分批执行删除任务，使用独立会话，每批之间让出写锁"""
+    job = get_code_deletion_job(job_id)
+    if job is None:
+        return
+
+    db = session_factory()
+    try:
+        dao = ActivationCodeDAO(db)
+        total = dao.count_by_card_id(job.card_id, only_unused=False)
+        _update_job(job_id, status=CodeDeletionJobStatus.RUNNING, total=total)
+
+        deleted_count = 0
+        while True:
+            deleted = dao.delete_batch_by_card_id(job.card_id, batch_size)
+            if deleted == 0:
+                break
+            deleted_count += deleted
+            _update_job(job_id, deleted=deleted_count)
+            time.sleep(pause_seconds)
+
+        _update_job(
+            job_id,
+            status=CodeDeletionJobStatus.COMPLETED,
+            finished_at=datetime.now(timezone.utc),
+        )
+        logger.info(f"卡密删除任务完成：card_id={job.card_id} 共删除 {deleted_count}")
+    except Exception as e:  # noqa: BLE001
+        db.rollback()
+        logger.error(f"卡密删除任务失败：card_id={job.card_id} {e}")
+        _update_job(
+            job_id,
+            status=CodeDeletionJobStatus.FAILED,
+            error=str(e),
+            finished_at=datetime.now(timezone.utc),
+        )
+    finally:
+        db.close()
+
+
+def _update_job(job_id: str, **fields) -> None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            _jobs[job_id] = job.model_copy(update=fields)
+
+
+def _prune_finished_jobs() -> None:
+    """清理过多的已结束任务，调用方需持有锁"""
+    finished = [
+        job
+        for job in _jobs.values()
+        if job.status in (CodeDeletionJobStatus.COMPLETED, CodeDeletionJobStatus.FAILED)
+    ]
+    finished.sort(key=lambda job: job.created_at)
+    for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        _jobs.pop(job.job_id, None)
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from enum import Enum
-from sqlalchemy import Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Integer, String, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.server.database import Base
@@ -25,6 +25,12 @@ class CardCodeStatus(str, Enum):
 
 class ActivationCode(Base):
     __tablename__ = "activation_codes"
+    __table_args__ = (
+        # 代理商销售额：按代理商与消费时间查询区间边缘不足一天的部分
+        Index("ix_activation_codes_proxy_user_id_used_at", "proxy_user_id", "used_at"),
+        # 订单按卡密ID关联：已删除卡密的ID不再分配给新卡密
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     card_id: Mapped[int] = mapped_column(
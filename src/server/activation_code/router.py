@@ -4,9 +4,11 @@
 
 公开接口：
 - POST /api/activation-codes/generate
+- POST /api/activation-codes/import
 - GET /api/activation-codes/{card_id}
 - GET /api/activation-codes/{card_id}/count
 - DELETE /api/activation-codes/{card_id}
+- GET /api/activation-codes/jobs/{job_id}
 - POST /api/activation-codes/consuming
 - POST /api/activation-codes/consumed
 - GET /api/activation-codes/check
@@ -16,8 +18,18 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status, Query
-from sqlalchemy.orm import Session
+import codecs
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    status,
+    Query,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.server.database import get_db
 from src.server.utils import get_current_admin, get_current_user
@@ -29,10 +41,18 @@ from .schemas import (
     ActivationCodeCheckResult,
     AvailableActivationCodesResponse,
     ActivationCodeExport,
+    ActivationCodeImportFormat,
+    ActivationCodeImportResult,
+    CodeDeletionJobOut,
+    NormalizedActivationCodesResponse,
 )
 from src.server.activation_code.models import CardCodeStatus
-from . import service
+from . import jobs, service
+from .importer import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, create_importer
+from .importer import detect_import_format
 from src.server.dao.dao_base import run_in_thread
+from src.server.responses import FastJSONResponse
+from src.server.schemas import ResponseShape
 
 router = APIRouter(prefix="/api/activation-codes", tags=["卡密管理"])
 
@@ -61,9 +81,59 @@ async def generate_activation_codes(
     return await run_in_thread(_generate)
 
 
+@router.post(
+    "/import",
+    response_model=ActivationCodeImportResult,
+    summary="流式导入外部卡密",
+)
+async def import_activation_codes(
+    request: Request,
+    card_id: int = Query(..., gt=0, description="卡密归属的充值卡ID"),
+    proxy_user_id: int | None = Query(None, gt=0, description="代理商用户ID（可选）"),
+    import_format: ActivationCodeImportFormat | None = Query(
+        None, alias="format", description="文件格式，缺省时根据 Content-Type 推断"
+    ),
+    batch_size: int = Query(
+        DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE, description="每个事务写入的行数"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """导入供应商提供的卡密（管理员权限）
+
+    请求体为原始 CSV（可带 `code` 表头）或 NDJSON 文本，服务端边接收边解析，
+    按 batch_size 分批去重并写入，不会把整个文件读入内存。
+    """
+    fmt = import_format or detect_import_format(
+        content_type=request.headers.get("content-type")
+    )
+    importer = await run_in_thread(
+        lambda: create_importer(db, card_id, proxy_user_id, fmt, batch_size)
+    )
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    lines: list[str] = []
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        lines.extend(complete)
+        if len(lines) >= batch_size:
+            batch, lines = lines, []
+            await run_in_thread(lambda: importer.feed_lines(batch))
+    pending += decoder.decode(b"", final=True)
+    lines.append(pending)
+
+    def _finish():
+        importer.feed_lines(lines)
+        return importer.finish()
+
+    return await run_in_thread(_finish)
+
+
 @router.get(
     "/available",
-    response_model=AvailableActivationCodesResponse,
+    response_model=AvailableActivationCodesResponse | NormalizedActivationCodesResponse,
     summary="获取可用卡密列表",
     responses={
         403: {"description": "无权限访问此接口"},
@@ -71,6 +141,9 @@ async def generate_activation_codes(
 )
 async def get_available_activation_codes(
     proxy_user_id: int | None = Query(None, description="代理商ID（管理员专用）"),
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构，normalized 时充值卡信息只出现一次"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -82,13 +155,11 @@ async def get_available_activation_codes(
     """
 
     def _get_available():
-        return service.get_available_activation_codes(
-            db=db, user=current_user, proxy_user_id=proxy_user_id
+        return service.get_available_activation_code_rows(
+            db=db, user=current_user, proxy_user_id=proxy_user_id, shape=shape
         )
 
-    codes, total_count = await run_in_thread(_get_available)
-
-    return {"codes": codes, "total_count": total_count}
+    return FastJSONResponse(await run_in_thread(_get_available))
 
 
 @router.get(
@@ -108,7 +179,7 @@ async def check_code_availability(
 
 @router.get(
     "/{card_id}",
-    response_model=list[ActivationCodeOut],
+    response_model=list[ActivationCodeOut] | NormalizedActivationCodesResponse,
     summary="获取指定充值卡的卡密列表",
 )
 async def list_activation_codes(
@@ -122,6 +193,9 @@ async def list_activation_codes(
     exported: bool | None = Query(
         None, description="导出状态（可选，用于筛选特定导出状态的卡密）"
     ),
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构，normalized 时充值卡信息只出现一次"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin),
 ):
@@ -130,18 +204,20 @@ async def list_activation_codes(
     - proxy_user_id: 代理商ID，可选，用于筛选特定代理商的卡密
     - status: 卡密状态，可选，用于筛选特定状态的卡密
     - exported: 导出状态，可选，用于筛选特定导出状态的卡密
+    - shape: 响应结构，normalized 时返回 cards 映射与引用 card_id 的卡密行
     """
 
     def _list():
-        return service.list_activation_codes_by_card(
+        return service.list_activation_code_rows_by_card(
             db=db,
             card_id=card_id,
             proxy_user_id=proxy_user_id,
             status=status,
             exported=exported,
+            shape=shape,
         )
 
-    return await run_in_thread(_list)
+    return FastJSONResponse(await run_in_thread(_list))
 
 
 @router.get("/{card_id}/count", summary="获取指定充值卡的卡密数量")
@@ -192,19 +268,46 @@ async def set_code_consumed(
     return await run_in_thread(_consume)
 
 
-@router.delete("/{card_id}", summary="删除指定充值卡的所有卡密")
+@router.delete(
+    "/{card_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="删除指定充值卡的所有卡密",
+)
 async def delete_activation_codes(
     card_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin),
 ):
-    """删除指定充值卡的所有卡密（管理员权限）"""
+    """删除指定充值卡的所有卡密（管理员权限）
+
+    删除在后台按 ID 区间分批执行，接口立即返回任务句柄，
+    可通过 GET /api/activation-codes/jobs/{job_id} 查询进度。
+    """
+    job, created = jobs.submit_code_deletion(card_id)
+    if created:
+        # 后台任务使用独立会话，绑定与当前请求相同的数据库
+        session_factory = sessionmaker(
+            bind=db.get_bind(), autocommit=False, autoflush=False
+        )
+        background_tasks.add_task(jobs.run_code_deletion, job.job_id, session_factory)
+    return {"message": "卡密删除任务已提交", "job": job}
 
-    def _delete():
-        return service.delete_activation_codes_by_card(db, card_id)
 
-    deleted_count = await run_in_thread(_delete)
-    return {"message": f"已删除 {deleted_count} 个卡密"}
+@router.get(
+    "/jobs/{job_id}",
+    response_model=CodeDeletionJobOut,
+    summary="查询卡密删除任务进度",
+)
+async def get_deletion_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin),
+):
+    """查询卡密删除任务进度（管理员权限）"""
+    job = jobs.get_code_deletion_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="任务不存在")
+    return job
 
 
 @router.post(
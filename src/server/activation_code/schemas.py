@@ -4,11 +4,14 @@
 
 公开接口：
 - `ActivationCodeCreate`、`ActivationCodeOut`、`ActivationCodeVerify`、`ActivationCodeCheckResult`
+- `ActivationCodeImportFormat`、`ActivationCodeImportResult`
+- `CodeDeletionJobStatus`、`CodeDeletionJobOut`
+- `ActivationCodeRow`、`NormalizedActivationCodesResponse`
 """
 
 from datetime import datetime
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from enum import Enum
 
 
@@ -47,6 +50,26 @@ class ActivationCodeOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ActivationCodeRow(BaseModel):
+    """规范化响应中的卡密行，通过 card_id 引用顶层 cards 映射"""
+
+    id: int
+    card_id: int
+    code: str
+    status: CardCodeStatus
+    created_at: datetime
+    used_at: Optional[datetime] = None
+    exported: bool
+
+
+class NormalizedActivationCodesResponse(BaseModel):
+    """规范化的卡密列表响应（`?shape=normalized`）"""
+
+    cards: Dict[int, CardSummary] = Field(..., description="按ID索引的充值卡摘要")
+    codes: List[ActivationCodeRow] = Field(..., description="卡密列表")
+    total_count: Optional[int] = Field(default=None, description="总数量")
+
+
 class ActivationCodeVerify(BaseModel):
     code: str = Field(..., min_length=1, max_length=200)
 
@@ -67,3 +90,49 @@ class ActivationCodeExport(BaseModel):
     """批量导出卡密的请求模型"""
 
     code_ids: List[int] = Field(..., min_length=1, description="要导出的卡密ID列表")
+
+
+class ActivationCodeImportFormat(str, Enum):
+    """外部卡密导入文件格式"""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ActivationCodeImportResult(BaseModel):
+    """外部卡密导入结果"""
+
+    card_id: int
+    total_lines: int = Field(default=0, description="读取的非空行数（不含表头）")
+    imported: int = Field(default=0, description="成功写入的卡密数量")
+    duplicates_in_file: int = Field(default=0, description="同一批次内重复的卡密数量")
+    existing_in_db: int = Field(
+        default=0, description="数据库中已存在而被跳过的卡密数量"
+    )
+    invalid: int = Field(default=0, description="格式不合法的行数")
+    batches: int = Field(default=0, description="提交的事务批次数")
+    invalid_samples: List[str] = Field(
+        default_factory=list, description="部分不合法行的说明"
+    )
+
+
+class CodeDeletionJobStatus(str, Enum):
+    """卡密删除任务状态"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CodeDeletionJobOut(BaseModel):
+    """卡密删除任务（后台分批执行）"""
+
+    job_id: str
+    card_id: int
+    status: CodeDeletionJobStatus = CodeDeletionJobStatus.PENDING
+    total: int = Field(default=0, description="任务开始时该充值卡的卡密总数")
+    deleted: int = Field(default=0, description="已删除的卡密数量")
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+卡密列表快速序列化
+
+公开接口：
+- `CODE_ROW_COLUMNS`：`ActivationCodeDAO.list_rows` 返回的列顺序
+- `serialize_code_rows(rows)`：将列元组转换为 `ActivationCodeOut` 结构的字典
+- `serialize_code_rows_normalized(rows)`：转换为 `NormalizedActivationCodesResponse` 结构
+
+内部方法：
+- 无
+
+说明：
+- 数据直接来自数据库列，结构与 `ActivationCodeOut` 一致，跳过 Pydantic 逐行校验；
+- 同一充值卡的摘要字典在所有行之间共享，减少对象构造。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+CODE_ROW_COLUMNS = (
+    "id",
+    "card_id",
+    "code",
+    "status",
+    "created_at",
+    "used_at",
+    "exported",
+    "card_name",
+    "card_price",
+)
+
+
+def serialize_code_rows(rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    """将卡密列元组转换为与 `ActivationCodeOut` 相同结构的字典列表"""
+    cards: dict[int, dict[str, Any]] = {}
+    result = []
+    for (
+        code_id,
+        card_id,
+        code,
+        status,
+        created_at,
+        used_at,
+        exported,
+        card_name,
+        card_price,
+    ) in rows:
+        card = cards.get(card_id)
+        if card is None:
+            card = cards[card_id] = {
+                "id": card_id,
+                "name": card_name,
+                "price": card_price,
+            }
+        result.append(
+            {
+                "id": code_id,
+                "card_id": card_id,
+                "card": card,
+                "code": code,
+                "status": status,
+                "created_at": created_at,
+                "used_at": used_at,
+                "exported": exported,
+            }
+        )
+    return result
+
+
+def serialize_code_rows_normalized(
+    rows: Iterable[Sequence[Any]],
+) -> dict[str, Any]:
+    """将卡密列元组转换为规范化结构：充值卡摘要只出现一次，行内仅保留 card_id"""
+    cards: dict[int, dict[str, Any]] = {}
+    codes = []
+    for (
+        code_id,
+        card_id,
+        code,
+        status,
+        created_at,
+        used_at,
+        exported,
+        card_name,
+        card_price,
+    ) in rows:
+        if card_id not in cards:
+            cards[card_id] = {"id": card_id, "name": card_name, "price": card_price}
+        codes.append(
+            {
+                "id": code_id,
+                "card_id": card_id,
+                "code": code,
+                "status": status,
+                "created_at": created_at,
+                "used_at": used_at,
+                "exported": exported,
+            }
+        )
+    return {"cards": cards, "codes": codes}
@@ -4,18 +4,22 @@
 
 公开接口：
 - create_activation_codes(db, card_id, count)
+- ensure_proxy_card_link(db, proxy_user_id, card_id)
 - get_activation_code_by_code(db, code)
 - get_available_activation_code(db, card_id)
 - set_code_consuming(db, code)
 - set_code_consumed(db, code)
 - list_activation_codes_by_card(db, card_id, include_used)
+- list_activation_code_rows_by_card(db, card_id, proxy_user_id, status, exported, shape)
 - count_activation_codes_by_card(db, card_id, only_unused)
 - delete_activation_codes_by_card(db, card_id)
 - is_code_available(db, code) -> ActivationCodeCheckResult
 - is_code_available_for_user(db, code, user)
+- get_available_activation_codes(db, user, proxy_user_id)
+- get_available_activation_code_rows(db, user, proxy_user_id, shape)
 
 内部方法：
-- 无
+- _resolve_available_codes_proxy(user, proxy_user_id)
 
 说明：
 - 服务层承载业务逻辑，路由层只做参数校验与装配。
@@ -28,9 +32,11 @@ from fastapi import HTTPException, status
 from .dao import ActivationCodeDAO
 from .models import ActivationCode, CardCodeStatus
 from .schemas import ActivationCodeCheckResult
+from .serializers import serialize_code_rows, serialize_code_rows_normalized
 from src.server.auth.models import User
 from src.server.auth.schemas import Role
-from src.server.card.models import Card
+from src.server.catalog.service import catalog_cache
+from src.server.schemas import ResponseShape
 
 
 def create_activation_codes(
@@ -39,29 +45,34 @@ def create_activation_codes(
     """批量创建卡密"""
     # 如果指定了代理商ID，则在生成卡密前确保建立代理商与充值卡的绑定（幂等）
     if proxy_user_id is not None:
-        try:
-            # 为避免循环依赖，放在函数内部导入
-            from src.server.proxy.service import link_proxy_to_cards
-
-            # 幂等绑定（若已存在会跳过）
-            link_proxy_to_cards(db, proxy_user_id, [card_id])
-        except ValueError as e:
-            # 业务错误（如用户不是代理商、卡不存在或未激活等），转为 400
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-        except Exception as e:
-            # 其他异常记录日志并返回 500
-            from loguru import logger
-
-            logger.error(f"生成卡密前绑定代理商-卡失败: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="绑定代理商与卡失败",
-            )
+        ensure_proxy_card_link(db, proxy_user_id, card_id)
 
     dao = ActivationCodeDAO(db)
     return dao.create_batch(card_id, count, proxy_user_id)
 
 
+def ensure_proxy_card_link(db: Session, proxy_user_id: int, card_id: int) -> None:
+    """确保代理商与充值卡已绑定（幂等），失败时转换为 HTTP 异常"""
+    try:
+        # 为避免循环依赖，放在函数内部导入
+        from src.server.proxy.service import link_proxy_to_cards
+
+        # 幂等绑定（若已存在会跳过）
+        link_proxy_to_cards(db, proxy_user_id, [card_id])
+    except ValueError as e:
+        # 业务错误（如用户不是代理商、卡不存在或未激活等），转为 400
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        # 其他异常记录日志并返回 500
+        from loguru import logger
+
+        logger.error(f"生成卡密前绑定代理商-卡失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="绑定代理商与卡失败",
+        )
+
+
 def get_activation_code_by_code(db: Session, code: str) -> ActivationCode | None:
     """通过卡密获取记录"""
     dao = ActivationCodeDAO(db)
@@ -159,6 +170,29 @@ def list_activation_codes_by_card(
     return query.order_by(ActivationCode.created_at.desc()).all()
 
 
+def list_activation_code_rows_by_card(
+    db: Session,
+    card_id: int,
+    proxy_user_id: int | None = None,
+    status: CardCodeStatus | None = None,
+    exported: bool | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[dict] | dict:
+    """获取指定充值卡的卡密列表（快速序列化版本）
+
+    与 `list_activation_codes_by_card` 筛选条件相同，但直接由列元组构造
+    `ActivationCodeOut` 结构的字典，不创建 ORM 对象也不做 Pydantic 校验。
+    shape 为 normalized 时返回 `NormalizedActivationCodesResponse` 结构。
+    """
+    dao = ActivationCodeDAO(db)
+    rows = dao.list_rows(
+        card_id=card_id, proxy_user_id=proxy_user_id, status=status, exported=exported
+    )
+    if shape == ResponseShape.NORMALIZED:
+        return serialize_code_rows_normalized(rows)
+    return serialize_code_rows(rows)
+
+
 def count_activation_codes_by_card(
     db: Session, card_id: int, only_unused: bool = True
 ) -> int:
@@ -186,7 +220,7 @@ def is_code_available(db: Session, code: str) -> ActivationCodeCheckResult:
     # 获取卡密对应的商品和渠道ID
     channel_id = None
     if available:
-        card = db.query(Card).filter(Card.id == activation_code.card_id).first()
+        card = catalog_cache.get_card(db, activation_code.card_id)
         if card:
             channel_id = card.channel_id
 
@@ -207,7 +241,7 @@ def is_code_available_for_user(db: Session, code: str, user: User) -> bool:
     # 如果用户是 STAFF，需要检查渠道是否匹配
     if user.role == Role.STAFF:
         # 获取卡密对应的商品
-        card = db.query(Card).filter(Card.id == activation_code.card_id).first()
+        card = catalog_cache.get_card(db, activation_code.card_id)
         if not card:
             # 如果商品不存在，认为卡密不可用
             return False
@@ -234,26 +268,14 @@ def get_available_activation_codes(
     Raises:
         HTTPException: 当用户权限不足时
     """
-    from fastapi import HTTPException, status
-
-    # 检查用户权限
-    if user.role not in [Role.ADMIN, Role.PROXY]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="无权限访问此接口"
-        )
+    target_proxy_id = _resolve_available_codes_proxy(user, proxy_user_id)
 
     # 构建查询
     query = db.query(ActivationCode).filter(
         ActivationCode.status == CardCodeStatus.AVAILABLE
     )
-
-    # 根据用户角色和参数筛选
-    if user.role == Role.ADMIN:
-        if proxy_user_id:
-            query = query.filter(ActivationCode.proxy_user_id == proxy_user_id)
-    else:
-        # 代理商只能查看自己名下的卡密
-        query = query.filter(ActivationCode.proxy_user_id == user.id)
+    if target_proxy_id:
+        query = query.filter(ActivationCode.proxy_user_id == target_proxy_id)
 
     # 获取总数
     total_count = query.count()
@@ -268,6 +290,42 @@ def get_available_activation_codes(
     return codes, total_count
 
 
+def get_available_activation_code_rows(
+    db: Session,
+    user: User,
+    proxy_user_id: int | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> dict:
+    """根据用户角色获取可用卡密列表（快速序列化版本）
+
+    只执行一次列投影查询，总数直接取结果长度。返回完整的响应结构：
+    nested 为 `AvailableActivationCodesResponse`，
+    normalized 为 `NormalizedActivationCodesResponse`。
+    """
+    target_proxy_id = _resolve_available_codes_proxy(user, proxy_user_id)
+
+    dao = ActivationCodeDAO(db)
+    rows = dao.list_rows(proxy_user_id=target_proxy_id, status=CardCodeStatus.AVAILABLE)
+    if shape == ResponseShape.NORMALIZED:
+        content = serialize_code_rows_normalized(rows)
+    else:
+        content = {"codes": serialize_code_rows(rows)}
+    content["total_count"] = len(rows)
+    return content
+
+
+def _resolve_available_codes_proxy(user: User, proxy_user_id: int | None) -> int | None:
+    """校验可用卡密列表的访问权限，返回需要筛选的代理商ID"""
+    if user.role not in [Role.ADMIN, Role.PROXY]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="无权限访问此接口"
+        )
+    # 代理商只能查看自己名下的卡密，管理员可按参数筛选
+    if user.role == Role.ADMIN:
+        return proxy_user_id
+    return user.id
+
+
 def mark_codes_as_exported(db: Session, code_ids: list[int], user: User) -> int:
     """批量标记卡密为已导出
 
@@ -226,3 +226,25 @@ def test_activation_code_dao_delete_by_card_id(
     # 验证其他卡密未受影响
     count = dao.count_by_card_id(card_id_to_keep, only_unused=False)
     assert count == 1
+
+
+def test_activation_code_dao_delete_in_batches(
+    test_db_session: Session, setup_test_data
+):
+    """测试按 ID 区间分批删除，不影响交错插入的其他充值卡卡密"""
+    dao = ActivationCodeDAO(test_db_session)
+    _, cards = setup_test_data
+    card_id_to_delete = cards[6].id
+    card_id_to_keep = cards[7].id
+
+    # 交错创建，使两张卡的卡密 ID 区间互相重叠
+    for _ in range(3):
+        dao.create_batch(card_id_to_delete, 2)
+        dao.create_batch(card_id_to_keep, 1)
+
+    assert dao.delete_batch_by_card_id(card_id_to_delete, batch_size=4) == 4
+    assert dao.count_by_card_id(card_id_to_delete, only_unused=False) == 2
+
+    assert dao.delete_by_card_id(card_id_to_delete, batch_size=1) == 2
+    assert dao.count_by_card_id(card_id_to_delete, only_unused=False) == 0
+    assert dao.count_by_card_id(card_id_to_keep, only_unused=False) == 3
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+外部卡密流式导入测试
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.importer import import_activation_codes
+from src.server.activation_code.models import ActivationCode, CardCodeStatus
+from src.server.activation_code.schemas import ActivationCodeImportFormat
+from src.server.card.models import Card
+
+
+def test_import_csv_dedupes_batch_and_db(test_db_session: Session, test_card: Card):
+    """测试 CSV 导入：表头识别、批次内去重、数据库去重、格式校验"""
+    test_db_session.add(ActivationCode(card_id=test_card.id, code="EXISTING-0001"))
+    test_db_session.commit()
+
+    lines = [
+        "sku,code",
+        "a,IMPORT-0001",
+        "a,IMPORT-0002",
+        "a,IMPORT-0001",  # 同批次重复
+        "a,EXISTING-0001",  # 数据库已存在
+        "a,bad code!",  # 格式不合法
+        "",
+        "a,IMPORT-0003",
+    ]
+    result = import_activation_codes(
+        test_db_session, lines, card_id=test_card.id, batch_size=10
+    )
+
+    assert result.total_lines == 6
+    assert result.imported == 3
+    assert result.duplicates_in_file == 1
+    assert result.existing_in_db == 1
+    assert result.invalid == 1
+    assert result.batches == 1
+
+    imported = (
+        test_db_session.query(ActivationCode)
+        .filter(ActivationCode.code.like("IMPORT-%"))
+        .all()
+    )
+    assert len(imported) == 3
+    assert all(code.status == CardCodeStatus.AVAILABLE for code in imported)
+
+
+def test_import_ndjson_across_batches(test_db_session: Session, test_card: Card):
+    """测试 NDJSON 导入：跨批次的重复由数据库检查去除"""
+    lines = [
+        '{"code": "NDJSON-0001"}',
+        '"NDJSON-0002"',
+        '{"code": "NDJSON-0001"}',  # 上一批次已写入
+        "not json",
+    ]
+    result = import_activation_codes(
+        test_db_session,
+        lines,
+        card_id=test_card.id,
+        fmt=ActivationCodeImportFormat.NDJSON,
+        batch_size=2,
+    )
+
+    assert result.imported == 2
+    assert result.existing_in_db == 1
+    assert result.invalid == 1
+    assert result.batches == 2
+
+
+def test_import_unknown_card(test_db_session: Session):
+    """测试导入到不存在的充值卡"""
+    with pytest.raises(HTTPException) as exc_info:
+        import_activation_codes(test_db_session, ["CODE-0001"], card_id=999999)
+    assert exc_info.value.status_code == 404
+
+
+def test_import_codes_api(
+    test_client, test_db_session: Session, test_admin_token: str, test_card: Card
+):
+    """测试通过 API 流式上传 NDJSON 导入卡密"""
+    body = "\n".join(f'{{"code": "API-IMPORT-{i:04d}"}}' for i in range(25))
+    response = test_client.post(
+        f"/api/activation-codes/import?card_id={test_card.id}&batch_size=10",
+        content=body.encode("utf-8"),
+        headers={
+            "Authorization": f"Bearer {test_admin_token}",
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["imported"] == 25
+    assert result["batches"] == 3
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+卡密后台删除任务测试
+"""
+
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.dao import ActivationCodeDAO
+from src.server.card.models import Card
+
+
+def test_delete_codes_returns_job_handle(
+    test_client, test_db_session: Session, test_admin_token: str, test_card: Card
+):
+    """测试删除接口立即返回任务句柄，任务完成后卡密被清空"""
+    headers = {"Authorization": f"Bearer {test_admin_token}"}
+    dao = ActivationCodeDAO(test_db_session)
+    dao.create_batch(test_card.id, 5)
+
+    response = test_client.delete(
+        f"/api/activation-codes/{test_card.id}", headers=headers
+    )
+    assert response.status_code == 202, response.text
+    job = response.json()["job"]
+    assert job["card_id"] == test_card.id
+
+    # TestClient 在返回响应后同步执行后台任务
+    progress = test_client.get(
+        f"/api/activation-codes/jobs/{job['job_id']}", headers=headers
+    )
+    assert progress.status_code == 200
+    assert progress.json()["status"] == "completed"
+    assert progress.json()["total"] == 5
+    assert progress.json()["deleted"] == 5
+
+    assert dao.count_by_card_id(test_card.id, only_unused=False) == 0
+
+
+def test_get_unknown_job(test_client, test_admin_token: str):
+    """测试查询不存在的任务"""
+    response = test_client.get(
+        "/api/activation-codes/jobs/not-a-job",
+        headers={"Authorization": f"Bearer {test_admin_token}"},
+    )
+    assert response.status_code == 404
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+卡密列表快速序列化测试
+"""
+
+import json
+
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.schemas import ActivationCodeOut
+from src.server.activation_code.service import (
+    create_activation_codes,
+    list_activation_code_rows_by_card,
+    list_activation_codes_by_card,
+    set_code_consuming,
+)
+from src.server.card.models import Card
+from src.server.responses import FastJSONResponse
+
+
+def test_fast_rows_match_pydantic_output(test_db_session: Session, test_card: Card):
+    """测试快速路径与 Pydantic 序列化结果一致"""
+    codes = create_activation_codes(test_db_session, test_card.id, 3)
+    set_code_consuming(test_db_session, codes[0].code)
+
+    expected = [
+        ActivationCodeOut.model_validate(code).model_dump(mode="json")
+        for code in list_activation_codes_by_card(test_db_session, test_card.id)
+    ]
+    rows = list_activation_code_rows_by_card(test_db_session, test_card.id)
+    rendered = json.loads(FastJSONResponse(rows).body)
+
+    assert rendered == expected
+
+
+def test_list_codes_api_uses_fast_path(
+    test_client, test_db_session: Session, test_admin_token: str, test_card: Card
+):
+    """测试卡密列表接口返回结构"""
+    create_activation_codes(test_db_session, test_card.id, 2)
+
+    response = test_client.get(
+        f"/api/activation-codes/{test_card.id}?status=available",
+        headers={"Authorization": f"Bearer {test_admin_token}"},
+    )
+    assert response.status_code == 200
+    codes = response.json()
+    assert len(codes) == 2
+    assert codes[0]["card"] == {
+        "id": test_card.id,
+        "name": test_card.name,
+        "price": test_card.price,
+    }
+    assert codes[0]["status"] == "available"
+
+
+def test_list_codes_api_normalized_shape(
+    test_client, test_db_session: Session, test_admin_token: str, test_card: Card
+):
+    """测试卡密列表 normalized 结构"""
+    create_activation_codes(test_db_session, test_card.id, 3)
+
+    response = test_client.get(
+        f"/api/activation-codes/{test_card.id}?shape=normalized",
+        headers={"Authorization": f"Bearer {test_admin_token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["cards"] == {
+        str(test_card.id): {
+            "id": test_card.id,
+            "name": test_card.name,
+            "price": test_card.price,
+        }
+    }
+    assert len(data["codes"]) == 3
+    assert all(code["card_id"] == test_card.id for code in data["codes"])
+    assert all("card" not in code for code in data["codes"])
@@ -9,13 +9,15 @@
 - get_by_role / count_by_role / get_all / count_all
 
 说明：
-- 提供用户读取/写入的持久化封装，业务逻辑放在 service。
+- 提供用户读取/写入的持久化封装，业务逻辑放在 service；
+- 写入后使目录缓存失效（缓存中保存了各渠道员工的通知邮箱）。
 """
 
 from __future__ import annotations
 
 from sqlalchemy.orm import Session
 
+from src.server.catalog.service import invalidate_catalog
 from src.server.dao.dao_base import BaseDAO
 from .models import User
 from .schemas import Role
@@ -51,6 +53,7 @@ class UserDAO(BaseDAO):
         )
         self.db_session.add(user)
         self.db_session.commit()
+        invalidate_catalog()
         self.db_session.refresh(user)
         return user
 
@@ -58,6 +61,7 @@ class UserDAO(BaseDAO):
         for k, v in fields.items():
             setattr(user, k, v)
         self.db_session.commit()
+        invalidate_catalog()
         self.db_session.refresh(user)
         return user
 
@@ -65,6 +69,7 @@ class UserDAO(BaseDAO):
         """删除用户"""
         self.db_session.delete(user)
         self.db_session.commit()
+        invalidate_catalog()
         return True
 
     def get_staff_by_channel_id(self, channel_id: int) -> list[User]:
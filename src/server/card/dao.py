@@ -8,11 +8,13 @@
 
 from __future__ import annotations
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from src.server.catalog.service import invalidate_catalog
 from src.server.dao.dao_base import BaseDAO
 from .models import Card
-from .schemas import CardCreate, CardUpdate
+from .schemas import CardCreate, CardUpdate, CardStock
 
 
 class CardDAO(BaseDAO):
@@ -35,6 +37,7 @@ class CardDAO(BaseDAO):
         )
         self.db_session.add(card)
         self.db_session.commit()
+        invalidate_catalog()
         self.db_session.refresh(card)
         return card
 
@@ -79,6 +82,7 @@ class CardDAO(BaseDAO):
             setattr(card, field, value)
 
         self.db_session.commit()
+        invalidate_catalog()
         self.db_session.refresh(card)
         return card
 
@@ -86,6 +90,7 @@ class CardDAO(BaseDAO):
         """删除充值卡"""
         self.db_session.delete(card)
         self.db_session.commit()
+        invalidate_catalog()
 
     def get_stock_count_by_id(self, card_id: int) -> int:
         """获取充值卡库存数量 (通过ID)"""
@@ -94,3 +99,44 @@ class CardDAO(BaseDAO):
         return count_activation_codes_by_card(
             self.db_session, card_id, only_unused=True
         )
+
+    def get_stock_summary(
+        self, card_ids: list[int] | None = None, include_inactive: bool = True
+    ) -> list[CardStock]:
+        """一次 GROUP BY 统计多张充值卡各状态的卡密数量
+
+        Args:
+            card_ids: 要统计的充值卡ID列表，None 表示全部充值卡
+            include_inactive: card_ids 为 None 时是否包含未激活的充值卡
+
+        Returns:
+            list[CardStock]: 按充值卡ID降序排列，没有卡密的充值卡计数为 0
+        """
+        from src.server.activation_code.models import ActivationCode, CardCodeStatus
+
+        query = (
+            self.db_session.query(
+                Card.id, ActivationCode.status, func.count(ActivationCode.id)
+            )
+            .outerjoin(ActivationCode, ActivationCode.card_id == Card.id)
+            .group_by(Card.id, ActivationCode.status)
+        )
+        if card_ids is not None:
+            if not card_ids:
+                return []
+            query = query.filter(Card.id.in_(card_ids))
+        elif not include_inactive:
+            query = query.filter(Card.is_active.is_(True))
+
+        stocks: dict[int, CardStock] = {}
+        for card_id, code_status, count in query.all():
+            stock = stocks.setdefault(card_id, CardStock(card_id=card_id))
+            # 外连接时没有卡密的充值卡状态为 NULL，未知状态同样忽略
+            if code_status == CardCodeStatus.AVAILABLE:
+                stock.available = count
+            elif code_status == CardCodeStatus.CONSUMING:
+                stock.consuming = count
+            elif code_status == CardCodeStatus.CONSUMED:
+                stock.consumed = count
+
+        return [stocks[card_id] for card_id in sorted(stocks, reverse=True)]
@@ -5,6 +5,7 @@
 公开接口：
 - POST /api/cards
 - GET /api/cards
+- GET /api/cards/stock
 - GET /api/cards/{card_id}
 - PUT /api/cards/{card_id}
 - DELETE /api/cards/{card_id}
@@ -13,16 +14,17 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from src.server.database import get_db
 from src.server.utils import get_current_admin, get_current_user
 from src.server.auth.models import User
 from src.server.auth.schemas import Role
-from .schemas import CardCreate, CardUpdate, CardOut
+from .schemas import CardCreate, CardUpdate, CardOut, CardStock, CardWithStockOut
 from . import service
 from src.server.dao.dao_base import run_in_thread
+from src.server.etag import etag_matches, not_modified
 
 router = APIRouter(prefix="/api/cards", tags=["充值卡管理"])
 
@@ -46,13 +48,37 @@ async def create_card(
     return await run_in_thread(_create)
 
 
-@router.get("", response_model=list[CardOut], summary="获取充值卡列表")
+@router.get(
+    "",
+    response_model=list[CardWithStockOut],
+    response_model_exclude_none=True,
+    summary="获取充值卡列表",
+)
 async def list_cards(
+    request: Request,
+    response: Response,
     include_inactive: bool = False,
+    with_stock: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """获取充值卡列表"""
+    """获取充值卡列表
+
+    - with_stock: 是否附带各卡的库存统计（管理员权限），一次分组查询完成
+    - 不带库存时支持 If-None-Match 条件请求，未变化时返回 304
+    """
+    if with_stock and current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权限")
+
+    def _etag():
+        return service.get_cards_etag(db, current_user, include_inactive)
+
+    # 库存随卡密变化，不在目录版本中，带库存的请求不做条件判断
+    if not with_stock:
+        etag = await run_in_thread(_etag)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
 
     def _list():
         # 如果是员工，只返回其渠道下的卡片
@@ -64,11 +90,28 @@ async def list_cards(
             return service.list_cards_by_channel(
                 db, current_user.channel_id, include_inactive
             )
-        return service.list_cards(db, include_inactive)
+        cards = service.list_cards(db, include_inactive)
+        if with_stock:
+            return service.attach_stock(db, cards)
+        return cards
 
     return await run_in_thread(_list)
 
 
+@router.get("/stock", response_model=list[CardStock], summary="批量获取充值卡库存")
+async def list_cards_stock(
+    include_inactive: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """一次查询返回所有充值卡的 available/consuming/consumed 数量（管理员权限）"""
+
+    def _list_stock():
+        return service.get_cards_stock(db, include_inactive=include_inactive)
+
+    return await run_in_thread(_list_stock)
+
+
 @router.get("/{card_id}", response_model=CardOut, summary="获取单个充值卡")
 async def get_card(
     card_id: int,
@@ -79,12 +122,10 @@ async def get_card(
 
     def _get():
         # 如果是员工，需要检查卡片是否属于其渠道
-        card = service.get_card(db, card_id)
+        card = service.get_card_out(db, card_id)
         if current_user.role == Role.STAFF:
             # 实现渠道检查逻辑
             if card.channel_id != current_user.channel_id:
-                from fastapi import HTTPException, status
-
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN, detail="无权限访问该充值卡"
                 )
@@ -4,6 +4,7 @@
 
 公开接口：
 - `CardCreate`、`CardUpdate`、`CardOut`
+- `CardStock`、`CardWithStockOut`
 """
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -35,3 +36,18 @@ class CardOut(BaseModel):
     channel_id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CardStock(BaseModel):
+    """充值卡库存统计（按卡密状态分组）"""
+
+    card_id: int
+    available: int = 0
+    consuming: int = 0
+    consumed: int = 0
+
+
+class CardWithStockOut(CardOut):
+    """附带库存统计的充值卡信息，仅在 `with_stock=true` 时填充 `stock`"""
+
+    stock: Optional[CardStock] = None
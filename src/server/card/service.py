@@ -5,26 +5,36 @@
 公开接口：
 - create_card(db, card_in)
 - get_card(db, card_id)
+- get_card_out(db, card_id)
 - get_card_by_name(db, name)
 - list_cards(db, include_inactive)
+- get_cards_etag(db, user, include_inactive)
 - update_card(db, card, card_in)
 - delete_card(db, card)
 - list_cards_by_channel(db, channel_id, include_inactive)
+- get_card_stock(db, card_id)
+- get_cards_stock(db, card_ids, include_inactive)
+- attach_stock(db, cards)
 
 内部方法：
 - 无
 
 说明：
-- 服务层承载业务逻辑，路由层只做参数校验与装配。
+- 服务层承载业务逻辑，路由层只做参数校验与装配；
+- 只读查询（列表、单个充值卡详情）走目录缓存，返回 `CardOut`；
+  需要修改的场景使用 `get_card` 获取 ORM 对象。
 """
 
 from __future__ import annotations
 
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from src.server.auth.models import User
+from src.server.catalog.service import catalog_cache
+from src.server.etag import make_etag
 from .dao import CardDAO
 from .models import Card
-from .schemas import CardCreate, CardUpdate
+from .schemas import CardCreate, CardUpdate, CardOut, CardStock, CardWithStockOut
 
 
 def create_card(db: Session, card_in: CardCreate) -> Card:
@@ -45,6 +55,16 @@ def get_card(db: Session, card_id: int) -> Card:
     return card
 
 
+def get_card_out(db: Session, card_id: int) -> CardOut:
+    """从目录缓存获取充值卡（只读）"""
+    card = catalog_cache.get_card(db, card_id)
+    if not card:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="充值卡不存在"
+        )
+    return card
+
+
 def get_card_by_name(db: Session, name: str) -> Card:
     dao = CardDAO(db)
     card = dao.get_by_name(name)
@@ -55,17 +75,21 @@ def get_card_by_name(db: Session, name: str) -> Card:
     return card
 
 
-def list_cards(db: Session, include_inactive: bool = False) -> list[Card]:
-    dao = CardDAO(db)
-    return dao.list_all(include_inactive)
+def list_cards(db: Session, include_inactive: bool = False) -> list[CardOut]:
+    return catalog_cache.snapshot(db).list_cards(include_inactive)
+
+
+def get_cards_etag(db: Session, user: User, include_inactive: bool = False) -> str:
+    """充值卡列表的 ETag，目录缓存有效时不查询数据库"""
+    digest = catalog_cache.snapshot(db).digest
+    return make_etag("cards", digest, user.role, user.channel_id, include_inactive)
 
 
 def list_cards_by_channel(
     db: Session, channel_id: int, include_inactive: bool = False
-) -> list[Card]:
+) -> list[CardOut]:
     """根据渠道ID获取充值卡列表"""
-    dao = CardDAO(db)
-    return dao.list_by_channel(channel_id, include_inactive)
+    return catalog_cache.snapshot(db).list_cards(include_inactive, channel_id)
 
 
 def update_card(db: Session, card: Card, card_in: CardUpdate) -> Card:
@@ -85,3 +109,26 @@ def get_card_stock(db: Session, card_id: int) -> int:
     """获取充值卡库存数量"""
     dao = CardDAO(db)
     return dao.get_stock_count_by_id(card_id)
+
+
+def get_cards_stock(
+    db: Session, card_ids: list[int] | None = None, include_inactive: bool = True
+) -> list[CardStock]:
+    """批量获取充值卡库存（单次分组查询）"""
+    dao = CardDAO(db)
+    return dao.get_stock_summary(card_ids, include_inactive)
+
+
+def attach_stock(db: Session, cards: list[CardOut]) -> list[CardWithStockOut]:
+    """为充值卡列表附加库存统计，只发起一次分组查询"""
+    stocks = {
+        stock.card_id: stock
+        for stock in get_cards_stock(db, [card.id for card in cards])
+    }
+    return [
+        CardWithStockOut(
+            **card.model_dump(),
+            stock=stocks.get(card.id, CardStock(card_id=card.id)),
+        )
+        for card in cards
+    ]
@@ -197,6 +197,80 @@ def test_get_card_stock(test_client, test_admin_token):
     assert stock_info["stock"] >= 0
 
 
+def test_list_cards_with_stock(test_client, test_admin_token):
+    """测试批量获取充值卡库存"""
+    headers = {"Authorization": f"Bearer {test_admin_token}"}
+
+    resp = test_client.post(
+        "/api/cards",
+        json={
+            "name": "批量库存卡",
+            "description": "用于测试批量库存的卡",
+            "price": 10.0,
+            "is_active": True,
+            "channel_id": 1,
+        },
+        headers=headers,
+    )
+    assert resp.status_code == HTTPStatus.CREATED
+    card_id = resp.json()["id"]
+
+    # 默认列表不附带库存
+    resp2 = test_client.get("/api/cards", headers=headers)
+    assert resp2.status_code == HTTPStatus.OK
+    assert "stock" not in resp2.json()[0]
+
+    resp3 = test_client.get("/api/cards?with_stock=true", headers=headers)
+    assert resp3.status_code == HTTPStatus.OK
+    card = next(c for c in resp3.json() if c["id"] == card_id)
+    assert card["stock"] == {
+        "card_id": card_id,
+        "available": 0,
+        "consuming": 0,
+        "consumed": 0,
+    }
+
+    resp4 = test_client.get("/api/cards/stock", headers=headers)
+    assert resp4.status_code == HTTPStatus.OK
+    stocks = {s["card_id"]: s for s in resp4.json()}
+    assert stocks[card_id]["available"] == 0
+
+
+def test_list_cards_conditional_get(test_client, test_admin_token):
+    """测试充值卡列表 ETag：未变化返回 304，写入后返回新内容"""
+    headers = {"Authorization": f"Bearer {test_admin_token}"}
+    card_data = {
+        "name": "条件请求卡",
+        "description": "描述",
+        "price": 10.0,
+        "is_active": True,
+        "channel_id": 1,
+    }
+    test_client.post("/api/cards", json=card_data, headers=headers)
+
+    resp = test_client.get("/api/cards", headers=headers)
+    assert resp.status_code == HTTPStatus.OK
+    etag = resp.headers["ETag"]
+
+    resp = test_client.get("/api/cards", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert resp.content == b""
+
+    # 不同查询参数的 ETag 不同
+    resp = test_client.get(
+        "/api/cards?include_inactive=true", headers={**headers, "If-None-Match": etag}
+    )
+    assert resp.status_code == HTTPStatus.OK
+
+    test_client.post(
+        "/api/cards", json={**card_data, "name": "条件请求卡2"}, headers=headers
+    )
+    resp = test_client.get("/api/cards", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["ETag"] != etag
+    assert len(resp.json()) == 2
+
+
 def test_unauthorized_access(test_client):
     """测试未授权访问"""
     # 没有 token 的请求
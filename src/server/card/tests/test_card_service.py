@@ -17,6 +17,7 @@ from src.server.card.service import (
     update_card,
     delete_card,
     get_card_stock,
+    get_cards_stock,
 )
 from src.server.channel.models import Channel
 
@@ -252,3 +253,40 @@ def test_get_card_stock(test_db_session: Session):
     # 由于库存计算依赖 activation_code 表，这里先测试基本功能
     stock = get_card_stock(test_db_session, 999999)  # 使用不存在的 card_id
     assert stock == 0
+
+
+def test_get_cards_stock(test_db_session: Session):
+    """测试批量获取充值卡库存（按状态分组）"""
+    from src.server.activation_code.models import ActivationCode, CardCodeStatus
+
+    channel = Channel(name="库存渠道", description="用于测试库存的渠道")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    test_db_session.refresh(channel)
+
+    card1 = Card(name="库存卡1", description="描述", price=10.0, channel_id=channel.id)
+    card2 = Card(name="库存卡2", description="描述", price=20.0, channel_id=channel.id)
+    test_db_session.add_all([card1, card2])
+    test_db_session.commit()
+
+    statuses = [
+        CardCodeStatus.AVAILABLE,
+        CardCodeStatus.AVAILABLE,
+        CardCodeStatus.CONSUMING,
+        CardCodeStatus.CONSUMED,
+    ]
+    for i, code_status in enumerate(statuses):
+        test_db_session.add(
+            ActivationCode(card_id=card1.id, code=f"STOCK-{i}", status=code_status)
+        )
+    test_db_session.commit()
+
+    stocks = {stock.card_id: stock for stock in get_cards_stock(test_db_session)}
+    assert stocks[card1.id].available == 2
+    assert stocks[card1.id].consuming == 1
+    assert stocks[card1.id].consumed == 1
+    assert stocks[card2.id].available == 0
+
+    # 指定 ID 列表时只返回对应的充值卡
+    only_card2 = get_cards_stock(test_db_session, [card2.id])
+    assert [stock.card_id for stock in only_card2] == [card2.id]
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+目录缓存模块（充值卡与渠道）
+"""
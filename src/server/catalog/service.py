@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+充值卡与渠道目录缓存
+
+公开接口：
+- `StaffContact`：渠道员工的通知联系方式
+- `CatalogSnapshot`：某一版本的充值卡/渠道快照（按ID与名称索引，附内容摘要）
+- `CatalogCache`：带版本号的进程内缓存
+- `catalog_cache`：全局缓存实例
+- `invalidate_catalog()`：写入充值卡或渠道后调用，使本进程和其他进程的缓存失效
+
+内部方法：
+- `CatalogCache._reload`、`CatalogCache._reload_after_miss`、`CatalogCache._is_stale`
+
+说明：
+- `cards`、`channels` 两张表很小且极少变化，但下单、查卡密、列表接口每次都会查询，
+  因此整表加载为不可变快照，读取时只比较内存版本与跨进程信号；
+- 快照同时保存各渠道员工的邮箱，供新订单通知使用，避免每次下单查询用户表；
+- 写入路径（`CardDAO`、`ChannelDAO`、`UserDAO`）提交后调用 `invalidate_catalog()`；
+  其他进程通过数据库文件旁的版本文件感知变化；
+- 按ID查询未命中时会重新加载一次，兼容绕过 DAO 直接写入的数据（如测试数据、脚本）；
+  由未命中触发加载的快照对之后的未命中直接返回 None（负缓存），直到缓存失效或
+  收到变更信号，不存在的ID不会让每次请求都整表重新加载；
+- `digest` 为充值卡与渠道内容的摘要（不含员工信息），各进程对相同数据得到相同的值，用作 ETag；
+- 快照中的对象为 `CardOut`/`ChannelOut`，只读使用，需要修改时请通过 DAO 查询 ORM 对象。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import orjson
+from sqlalchemy.orm import Session
+
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.card.models import Card
+from src.server.card.schemas import CardOut
+from src.server.change_signal import ChangeSignal, signal_path
+from src.server.channel.models import Channel
+from src.server.channel.schemas import ChannelOut
+
+CATALOG_SIGNAL_PATH = signal_path("catalog")
+
+
+class StaffContact(NamedTuple):
+    """渠道员工的通知联系方式"""
+
+    email: str
+    name: str | None
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """目录快照，加载后不再修改"""
+
+    version: int
+    digest: str = ""
+    cards: dict[int, CardOut] = field(default_factory=dict)
+    channels: dict[int, ChannelOut] = field(default_factory=dict)
+    card_ids_by_name: dict[str, int] = field(default_factory=dict)
+    channel_ids_by_name: dict[str, int] = field(default_factory=dict)
+    channel_staff: dict[int, tuple[StaffContact, ...]] = field(default_factory=dict)
+    # 由按ID未命中触发加载：之后的未命中不再重新加载
+    loaded_on_miss: bool = False
+
+    def card_channel_id(self, card_id: int) -> int | None:
+        """充值卡所属渠道ID"""
+        card = self.cards.get(card_id)
+        return card.channel_id if card else None
+
+    def card_price(self, card_id: int) -> float | None:
+        """充值卡价格"""
+        card = self.cards.get(card_id)
+        return card.price if card else None
+
+    def staff_contacts(self, channel_id: int) -> tuple[StaffContact, ...]:
+        """渠道下有邮箱的员工"""
+        return self.channel_staff.get(channel_id, ())
+
+    def list_cards(
+        self, include_inactive: bool = False, channel_id: int | None = None
+    ) -> list[CardOut]:
+        """充值卡列表，按ID降序（与 `CardDAO.list_all` 一致）"""
+        return [
+            card
+            for card in self.cards.values()
+            if (include_inactive or card.is_active)
+            and (channel_id is None or card.channel_id == channel_id)
+        ]
+
+    def list_channels(self, skip: int = 0, limit: int = 100) -> list[ChannelOut]:
+        """渠道列表，按ID升序"""
+        return list(self.channels.values())[skip : skip + limit]
+
+
+class CatalogCache:
+    """充值卡与渠道的进程内缓存"""
+
+    def __init__(self, signal: ChangeSignal | None = None):
+        self._signal = signal
+        self._lock = threading.Lock()
+        self._snapshot: CatalogSnapshot | None = None
+        self._signal_token: str | None = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """当前版本号，每次失效或重新加载后递增"""
+        return self._version
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        """获取当前快照，已失效时从数据库重新加载"""
+        snapshot = self._snapshot
+        if snapshot is None or self._is_stale():
+            return self._reload(db)
+        return snapshot
+
+    def get_card(self, db: Session, card_id: int) -> CardOut | None:
+        """按ID获取充值卡"""
+        snapshot = self.snapshot(db)
+        card = snapshot.cards.get(card_id)
+        if card is None:
+            card = self._reload_after_miss(db, snapshot).cards.get(card_id)
+        return card
+
+    def get_card_by_name(self, db: Session, name: str) -> CardOut | None:
+        """按名称获取充值卡"""
+        snapshot = self.snapshot(db)
+        card_id = snapshot.card_ids_by_name.get(name)
+        return snapshot.cards.get(card_id) if card_id is not None else None
+
+    def get_channel(self, db: Session, channel_id: int) -> ChannelOut | None:
+        """按ID获取渠道"""
+        snapshot = self.snapshot(db)
+        channel = snapshot.channels.get(channel_id)
+        if channel is None:
+            channel = self._reload_after_miss(db, snapshot).channels.get(channel_id)
+        return channel
+
+    def invalidate(self, notify: bool = True) -> None:
+        """使缓存失效；notify 为 True 时同时通知其他进程"""
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+        if notify and self._signal is not None:
+            self._signal.bump()
+
+    def _is_stale(self) -> bool:
+        """其他进程是否发出过变更信号"""
+        return self._signal is not None and self._signal.token() != self._signal_token
+
+    def _reload_after_miss(
+        self, db: Session, snapshot: CatalogSnapshot
+    ) -> CatalogSnapshot:
+        """按ID未命中时重新加载一次；快照本身由未命中触发加载时原样返回"""
+        if snapshot.loaded_on_miss:
+            return snapshot
+        return self._reload(db, missed=snapshot)
+
+    def _reload(
+        self, db: Session, missed: CatalogSnapshot | None = None
+    ) -> CatalogSnapshot:
+        with self._lock:
+            current = self._snapshot
+            if missed is not None and current is not None and current is not missed:
+                # 等待锁期间其他线程已重新加载
+                return current
+            # 先读取信号再查询，加载期间发生的变更会在下次读取时触发重新加载
+            token = self._signal.token() if self._signal is not None else None
+            cards = db.query(Card).order_by(Card.id.desc()).all()
+            channels = db.query(Channel).order_by(Channel.id.asc()).all()
+            staff_rows = (
+                db.query(User.channel_id, User.email, User.name)
+                .filter(User.role == Role.STAFF, User.channel_id.is_not(None))
+                .order_by(User.id.asc())
+                .all()
+            )
+            channel_staff: dict[int, list[StaffContact]] = defaultdict(list)
+            for channel_id, email, name in staff_rows:
+                if email:
+                    channel_staff[channel_id].append(StaffContact(email, name))
+
+            card_outs = {card.id: CardOut.model_validate(card) for card in cards}
+            channel_outs = {
+                channel.id: ChannelOut.model_validate(channel) for channel in channels
+            }
+            digest = hashlib.sha1(
+                orjson.dumps(
+                    [
+                        [card.model_dump() for card in card_outs.values()],
+                        [channel.model_dump() for channel in channel_outs.values()],
+                    ]
+                )
+            ).hexdigest()
+
+            self._version += 1
+            snapshot = CatalogSnapshot(
+                version=self._version,
+                digest=digest,
+                cards=card_outs,
+                channels=channel_outs,
+                card_ids_by_name={card.name: card.id for card in cards},
+                channel_ids_by_name={channel.name: channel.id for channel in channels},
+                channel_staff={
+                    channel_id: tuple(contacts)
+                    for channel_id, contacts in channel_staff.items()
+                },
+                loaded_on_miss=missed is not None,
+            )
+            self._snapshot = snapshot
+            self._signal_token = token
+            return snapshot
+
+
+catalog_cache = CatalogCache(ChangeSignal(CATALOG_SIGNAL_PATH))
+
+
+def invalidate_catalog() -> None:
+    """充值卡、渠道或用户写入后调用"""
+    catalog_cache.invalidate()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+目录缓存测试
+"""
+
+from sqlalchemy.orm import Session
+
+from src.server.card.models import Card
+from src.server.card.schemas import CardCreate, CardUpdate
+from src.server.card.service import create_card, list_cards, update_card
+from src.server.catalog.service import CatalogCache
+from src.server.change_signal import ChangeSignal
+from src.server.channel.models import Channel
+
+
+def _seed(db: Session) -> tuple[Channel, Card]:
+    channel = Channel(name="目录渠道")
+    db.add(channel)
+    db.commit()
+    card = Card(name="目录卡", description="描述", price=10.0, channel_id=channel.id)
+    db.add(card)
+    db.commit()
+    return channel, card
+
+
+def test_snapshot_is_reused_until_invalidated(test_db_session: Session):
+    """测试快照在失效前复用，失效后重新加载"""
+    cache = CatalogCache()
+    channel, card = _seed(test_db_session)
+
+    snapshot = cache.snapshot(test_db_session)
+    assert snapshot.card_channel_id(card.id) == channel.id
+    assert snapshot.card_price(card.id) == 10.0
+    cached = cache.get_card_by_name(test_db_session, "目录卡")
+    assert cached is not None and cached.id == card.id
+    assert cache.snapshot(test_db_session) is snapshot
+
+    cache.invalidate()
+    reloaded = cache.snapshot(test_db_session)
+    assert reloaded is not snapshot
+    assert reloaded.version > snapshot.version
+
+
+def test_missing_id_triggers_reload(test_db_session: Session):
+    """测试按ID未命中时重新加载（兼容绕过 DAO 的写入）"""
+    cache = CatalogCache()
+    channel, _ = _seed(test_db_session)
+    cache.snapshot(test_db_session)
+
+    card = Card(name="新卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+
+    cached = cache.get_card(test_db_session, card.id)
+    assert cached is not None and cached.name == "新卡"
+    assert cache.get_card(test_db_session, 99999) is None
+
+
+def test_repeated_misses_do_not_reload(test_db_session: Session):
+    """测试不存在的ID只触发一次重新加载，之后的未命中使用负缓存直到失效"""
+    cache = CatalogCache()
+    channel, _ = _seed(test_db_session)
+    cache.snapshot(test_db_session)
+
+    assert cache.get_card(test_db_session, 99999) is None
+    version = cache.version
+    for missing_id in (99999, 99998):
+        assert cache.get_card(test_db_session, missing_id) is None
+        assert cache.get_channel(test_db_session, missing_id) is None
+    assert cache.version == version
+
+    cache.invalidate()
+    card = Card(name="失效后新卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    cached = cache.get_card(test_db_session, card.id)
+    assert cached is not None and cached.name == "失效后新卡"
+
+
+def test_change_signal_invalidates_other_instances(test_db_session: Session, tmp_path):
+    """测试一个实例发出变更信号后，共享信号文件的其他实例重新加载"""
+    signal_path = tmp_path / "catalog-version"
+    writer = CatalogCache(ChangeSignal(signal_path))
+    reader = CatalogCache(ChangeSignal(signal_path))
+    _seed(test_db_session)
+
+    snapshot = reader.snapshot(test_db_session)
+    assert reader.snapshot(test_db_session) is snapshot
+
+    writer.invalidate()
+    assert reader.snapshot(test_db_session) is not snapshot
+
+
+def test_dao_writes_invalidate_global_cache(test_db_session: Session):
+    """测试通过 DAO 写入充值卡后列表立即可见"""
+    channel, _ = _seed(test_db_session)
+    assert [card.name for card in list_cards(test_db_session)] == ["目录卡"]
+
+    created = create_card(
+        test_db_session,
+        CardCreate(
+            name="第二张卡", description="描述", price=20.0, channel_id=channel.id
+        ),
+    )
+    assert [card.name for card in list_cards(test_db_session)] == ["第二张卡", "目录卡"]
+
+    update_card(test_db_session, created, CardUpdate(is_active=False))
+    assert [card.name for card in list_cards(test_db_session)] == ["目录卡"]
+    assert len(list_cards(test_db_session, include_inactive=True)) == 2
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+跨进程变更信号
+
+公开接口：
+- `ChangeSignal`：基于版本文件的变更信号，`token()` 读取当前版本、`bump()` 发出变更
+- `signal_path(kind)`：某类变更信号的版本文件路径
+
+内部方法：
+- 无
+
+说明：
+- 多个 worker 进程共享同一个数据库文件时，进程内缓存需要感知其他进程的写入；
+- 版本文件默认放在数据库文件旁（`CHANGE_SIGNAL_DIR` 可指定其他目录，
+  共享同一数据库的进程须使用相同目录），`bump()` 通过原子替换写入新的唯一内容（纳秒时间戳与进程号），
+  `token()` 读取这几十个字节即可，不依赖文件系统的时间戳精度；
+- 版本标记在所有进程间一致，可直接作为 ETag 的组成部分；
+- 信号只表示"可能有变化"，读取方据此丢弃缓存后重新查询数据库。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from src.server.config import global_config
+from src.server.database import DATABASE_PATH
+
+
+def signal_path(kind: str) -> Path:
+    """版本文件路径：`<数据库文件名>.<kind>-version`"""
+    directory = global_config.change_signal_dir or DATABASE_PATH.parent
+    return Path(directory) / f"{DATABASE_PATH.name}.{kind}-version"
+
+
+class ChangeSignal:
+    """基于版本文件的跨进程变更信号"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def token(self) -> str | None:
+        """返回当前版本标记，文件不存在时返回 None"""
+        try:
+            return self.path.read_text().strip() or None
+        except OSError:
+            return None
+
+    def bump(self) -> None:
+        """发出变更信号（失败只记录日志，不影响业务写入）"""
+        tmp_path = self.path.with_name(
+            f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}\n"
+            )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入变更信号失败：{self.path} {e}")
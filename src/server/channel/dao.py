@@ -14,6 +14,7 @@ from sqlalchemy.exc import IntegrityError
 
 from .models import Channel
 from .schemas import ChannelCreate, ChannelUpdate
+from src.server.catalog.service import invalidate_catalog
 from src.server.dao.dao_base import BaseDAO
 
 
@@ -44,6 +45,7 @@ class ChannelDAO(BaseDAO):
             db_obj = Channel(name=obj_in.name, description=obj_in.description)
             self.db_session.add(db_obj)
             self.db_session.commit()
+            invalidate_catalog()
             self.db_session.refresh(db_obj)
             return db_obj
         except IntegrityError:
@@ -59,6 +61,7 @@ class ChannelDAO(BaseDAO):
             setattr(db_obj, field, value)
         self.db_session.add(db_obj)
         self.db_session.commit()
+        invalidate_catalog()
         self.db_session.refresh(db_obj)
         return db_obj
 
@@ -71,4 +74,5 @@ class ChannelDAO(BaseDAO):
             )
         self.db_session.delete(obj)
         self.db_session.commit()
+        invalidate_catalog()
         return obj
@@ -8,11 +8,12 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from src.server.database import get_db
+from src.server.etag import etag_matches, not_modified
 from src.server.utils import get_current_admin
 from src.server.auth.models import User
 from . import schemas, service
@@ -50,16 +51,22 @@ def read_channel(
 
 @router.get("/", response_model=List[schemas.ChannelOut], summary="获取渠道列表")
 def read_channels(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin),
 ):
     """
-    获取渠道列表。
+    获取渠道列表，支持 If-None-Match 条件请求（未变化时返回 304）。
 
     **权限要求**: 管理员 (admin)。
     """
+    etag = service.get_channels_etag(db, skip, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return service.get_channels(db, skip, limit)
 
 
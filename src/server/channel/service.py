@@ -7,6 +7,7 @@
 - get_channel(db, channel_id)
 - get_channel_by_name(db, name)
 - get_channels(db, skip, limit)
+- get_channels_etag(db, skip, limit)
 - update_channel(db, channel, channel_in)
 - delete_channel(db, channel_id)
 """
@@ -16,8 +17,10 @@ from __future__ import annotations
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from src.server.catalog.service import catalog_cache
+from src.server.etag import make_etag
 from .dao import ChannelDAO
-from .schemas import ChannelCreate, ChannelUpdate
+from .schemas import ChannelCreate, ChannelOut, ChannelUpdate
 from .models import Channel
 
 
@@ -50,10 +53,15 @@ def get_channel_by_name(db: Session, name: str) -> Channel:
     return channel
 
 
-def get_channels(db: Session, skip: int = 0, limit: int = 100) -> list[Channel]:
-    """获取渠道列表"""
-    dao = ChannelDAO(db)
-    return dao.get_multi(skip, limit)
+def get_channels(db: Session, skip: int = 0, limit: int = 100) -> list[ChannelOut]:
+    """获取渠道列表（目录缓存）"""
+    return catalog_cache.snapshot(db).list_channels(skip, limit)
+
+
+def get_channels_etag(db: Session, skip: int = 0, limit: int = 100) -> str:
+    """渠道列表的 ETag，目录缓存有效时不查询数据库"""
+    digest = catalog_cache.snapshot(db).digest
+    return make_etag("channels", digest, skip, limit)
 
 
 def update_channel(db: Session, channel: Channel, channel_in: ChannelUpdate) -> Channel:
@@ -18,7 +18,7 @@ from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 import json
-from typing import List
+from typing import List, Literal
 from dotenv import load_dotenv
 
 # 先加载 .env 和 .env.{APP_ENV}
@@ -40,6 +40,25 @@ class GlobalConfig(BaseSettings):
         description="相对项目根目录的相对路径",
     )
 
+    change_signal_dir: Path | None = Field(
+        default=None,
+        title="变更信号目录",
+        description="跨进程变更信号（版本文件）所在目录，未设置时与数据库文件相同",
+    )
+
+    database_journal_mode: Literal["delete", "truncate", "persist", "wal"] = Field(
+        default="wal",
+        title="SQLite 日志模式",
+        description="WAL 模式下读写互不阻塞，写事务只与其他写事务竞争",
+    )
+
+    database_busy_timeout_ms: int = Field(
+        default=5000,
+        ge=0,
+        title="SQLite 忙等待时间（毫秒）",
+        description="写锁被占用时等待的最长时间，超时后才报 database is locked",
+    )
+
     app_secret_key: str = Field(
         default="dev_secret_key_for_testing_only",
         title="应用密钥",
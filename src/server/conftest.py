@@ -12,11 +12,14 @@ pytest 公共 fixtures（模板版）
 - `test_db_session`
 - `test_client`
 - `init_test_database`
+- `reset_catalog_cache`（自动启用）
+- `reset_order_claim_queue`（自动启用）
 """
 
 from __future__ import annotations
 
 import os
+import tempfile
 from typing import Iterator
 
 import pytest
@@ -31,6 +34,31 @@ from src.server.auth.schemas import Role
 # 测试环境配置
 os.environ.setdefault("APP_ENV", "test")
 os.environ.setdefault("ALLOWED_ORIGINS", '["http://localhost:3000"]')
+# 测试中按需手动运行派发器，不在应用启动时启动后台线程
+os.environ.setdefault("MAIL_OUTBOX_DISPATCHER_ENABLED", "false")
+os.environ.setdefault("ORDER_SLA_ENABLED", "false")
+# 变更信号的版本文件写入临时目录，不污染工作区的 data/
+os.environ.setdefault("CHANGE_SIGNAL_DIR", tempfile.mkdtemp(prefix="change-signal-"))
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog_cache() -> Iterator[None]:
+    """每个测试使用独立的内存数据库，目录缓存需在测试前后清空。"""
+    from src.server.catalog.service import catalog_cache
+
+    catalog_cache.invalidate(notify=False)
+    yield
+    catalog_cache.invalidate(notify=False)
+
+
+@pytest.fixture(autouse=True)
+def reset_order_claim_queue() -> Iterator[None]:
+    """订单领取队列按渠道缓存订单，每个测试的数据库不同，需在测试前后清空。"""
+    from src.server.order.claims import order_claim_queue
+
+    order_claim_queue.clear()
+    yield
+    order_claim_queue.clear()
 
 
 @pytest.fixture(scope="function")
@@ -52,6 +80,7 @@ def test_db_engine() -> Iterator[Connection]:
     import src.server.order.models  # noqa: F401
     import src.server.proxy.models  # noqa: F401
     import src.server.sale.models  # noqa: F401
+    import src.server.mail_sender.models  # noqa: F401
 
     Base.metadata.create_all(bind=keep_conn)
 
@@ -5,23 +5,29 @@
 公开接口：
 - `Base`：SQLAlchemy 声明基类
 - `engine`：数据库引擎
+- `configure_sqlite_engine(engine)`：为 SQLite 引擎的新连接设置日志模式与忙等待时间
 - `SessionLocal`：会话工厂
 - `get_db()`：FastAPI 依赖获取会话
 - `init_database()`：创建所有表
+- `ensure_database_schema()`：为已存在的数据库补建新增的表、列、索引与触发器
 - `get_database_info()`：返回数据库文件信息
 
 内部方法：
-- 无
+- `_import_models()`
+- `_add_missing_columns(connection)`
 
 说明：
-- 使用 SQLite，路由中通过 `asyncio.to_thread` 调用同步 ORM，避免阻塞事件循环。
+- 使用 SQLite，路由中通过 `asyncio.to_thread` 调用同步 ORM，避免阻塞事件循环；
+- 文件数据库使用 WAL 并设置 `busy_timeout`：请求与后台线程（通知派发器等）
+  的写事务排队等待写锁，读取不被写入阻塞。
 """
 
 from __future__ import annotations
 
 import os
 from typing import Any, Iterator
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from pathlib import Path
 from loguru import logger
@@ -40,6 +46,25 @@ engine = create_engine(
     echo=False,
 )
 
+
+def configure_sqlite_engine(target: Engine) -> None:
+    """为 SQLite 引擎的每个新连接设置日志模式（内存数据库忽略）与忙等待时间。"""
+
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={global_config.database_journal_mode}")
+            cursor.execute(
+                f"PRAGMA busy_timeout={int(global_config.database_busy_timeout_ms)}"
+            )
+        finally:
+            cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    configure_sqlite_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -66,29 +91,18 @@ def init_database() -> None:
             if DATABASE_PATH.exists():
                 DATABASE_PATH.unlink()
                 logger.info("测试环境：已删除数据库文件，确保干净环境")
+            for suffix in ("-wal", "-shm"):
+                DATABASE_PATH.with_name(DATABASE_PATH.name + suffix).unlink(
+                    missing_ok=True
+                )
     except Exception as e:
         logger.warning(f"测试环境数据库清理失败（可忽略）：{e}")
 
-    # 延迟导入模型，避免循环依赖
-    try:
-        from src.server.auth import models as _1  # noqa
-        from src.server.example_module import models as _2  # noqa
-
-        # 不在初始化时导入新模块的模型，避免测试时的表名冲突
-        from src.server.channel import models as _7  # noqa
-        from src.server.card import models as _3  # noqa
-        from src.server.activation_code import models as _4  # noqa
-        from src.server.sale import models as _5  # noqa
-        from src.server.order import models as _6  # noqa
-        from src.server.proxy import models as _8  # noqa
-    except Exception as e:
-        logger.warning(f"导入模型时出现警告：{e}")
+    _import_models()
 
     Base.metadata.create_all(bind=engine)
     logger.info(f"数据库已初始化：{DATABASE_PATH}")
 
-    from sqlalchemy import inspect
-
     inspector = inspect(engine)
     tables = inspector.get_table_names()
     logger.info(f"已创建数据库表: {tables}")
@@ -102,6 +116,100 @@ def init_database() -> None:
         logger.warning(f"引导管理员失败（可忽略开发环境）：{e}")
 
 
+def ensure_database_schema() -> None:
+    """为已存在的数据库补建新增的表、列、索引与触发器（已有数据不受影响）。"""
+    _import_models()
+    Base.metadata.create_all(bind=engine)
+
+    from src.server.order.dao import OrderStatsDAO  # 延迟导入避免循环
+    from src.server.order.models import (
+        install_order_code_link_trigger,
+        install_order_search_index,
+        install_order_stats_triggers,
+    )
+    from src.server.proxy.dao import ProxyRevenueDAO
+    from src.server.proxy.models import install_proxy_revenue_triggers
+
+    # create_all 不会为已存在的表补建列与索引
+    with engine.begin() as connection:
+        added = _add_missing_columns(connection)
+        if "orders.change_seq" in added:
+            # 已有订单按 ID 顺序编号
+            connection.execute(text("UPDATE orders SET change_seq = id"))
+        if "orders.activation_code_id" in added:
+            connection.execute(
+                text(
+                    "UPDATE orders SET activation_code_id = (SELECT id FROM"
+                    " activation_codes WHERE activation_codes.code = orders.activation_code)"
+                )
+            )
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        install_order_stats_triggers(connection)
+        install_order_code_link_trigger(connection)
+        install_proxy_revenue_triggers(connection)
+        if install_order_search_index(connection):
+            logger.info("已建立订单全文索引")
+
+    db = SessionLocal()
+    try:
+        if OrderStatsDAO(db).backfill_daily_if_empty():
+            logger.info("已根据订单表回填订单日统计")
+        if ProxyRevenueDAO(db).backfill_daily_if_empty():
+            logger.info("已根据卡密表回填代理商销售额日统计")
+    finally:
+        db.close()
+
+
+def _add_missing_columns(connection: Connection) -> list[str]:
+    """为已存在的表补建模型中新增的列，返回补建的列（`表名.列名`）。
+
+    新增列须可为空或带有 `server_default`（SQLite 的 ADD COLUMN 限制）。
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"{column.name} {column.type.compile(dialect=connection.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg.text}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                ddl += f" REFERENCES {target.table.name} ({target.name})"
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            added.append(f"{table.name}.{column.name}")
+            logger.info(f"已补建数据库列：{table.name}.{column.name}")
+    return added
+
+
+def _import_models() -> None:
+    """导入所有模型，使其注册到 `Base.metadata`。"""
+    # 延迟导入模型，避免循环依赖
+    try:
+        from src.server.auth import models as _1  # noqa
+        from src.server.example_module import models as _2  # noqa
+
+        # 不在初始化时导入新模块的模型，避免测试时的表名冲突
+        from src.server.channel import models as _7  # noqa
+        from src.server.card import models as _3  # noqa
+        from src.server.activation_code import models as _4  # noqa
+        from src.server.sale import models as _5  # noqa
+        from src.server.order import models as _6  # noqa
+        from src.server.proxy import models as _8  # noqa
+        from src.server.mail_sender import models as _9  # noqa
+    except Exception as e:
+        logger.warning(f"导入模型时出现警告：{e}")
+
+
 def get_database_info() -> DatabaseInfo:
     """获取数据库信息。"""
     return DatabaseInfo(
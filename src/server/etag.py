@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+条件请求（ETag / If-None-Match）工具
+
+公开接口：
+- `make_etag(*parts)`：由版本号、内容摘要、用户范围等组成部分计算弱 ETag
+- `etag_matches(request, etag)`：请求的 If-None-Match 是否与 ETag 匹配
+- `not_modified(etag)`：构造 304 响应
+
+内部方法：
+- 无
+
+说明：
+- ETag 由调用方在查询数据库和序列化之前，根据缓存中的版本标记计算；
+  匹配时直接返回 304，轮询的客户端不再重复下载完整列表；
+- 组成部分必须包含影响响应内容的所有因素（用户角色、渠道、查询参数等），
+  否则不同用户可能拿到彼此的缓存。
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """计算弱 ETag"""
+    raw = "|".join(str(part) for part in parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:24]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in header.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """304 响应，携带当前 ETag"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+通知合并（突发时合并为摘要邮件）
+
+公开接口：
+- NotificationCoalescer
+
+内部方法：
+- _KeyState
+
+说明：
+- 以合并键（通知类型 + 渠道）为单位记录上次发送时间与当前合并窗口；
+  窗口内到达的通知被推迟到窗口结束，届时一起领取、合并成一封摘要邮件；
+- 窗口随负载自适应：低负载时窗口为 0，通知即时发送；本次发送合并了多条通知、
+  或与上次发送间隔小于最小窗口时窗口加倍（不超过上限）；只发送了一条时窗口减半，
+  低于最小窗口或长时间无通知时归零；
+- 状态只保存在当前进程中，多个进程各自运行派发器时合并效果是尽力而为的，不影响送达。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from .config import mail_sender_config
+
+
+@dataclass
+class _KeyState:
+    last_sent_at: float
+    window: float = 0.0
+
+
+class NotificationCoalescer:
+    """按合并键维护自适应合并窗口"""
+
+    def __init__(
+        self,
+        min_window_seconds: float | None = None,
+        max_window_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        config = mail_sender_config
+        self.min_window_seconds = (
+            min_window_seconds
+            if min_window_seconds is not None
+            else config.digest_min_window_seconds
+        )
+        self.max_window_seconds = (
+            max_window_seconds
+            if max_window_seconds is not None
+            else config.digest_max_window_seconds
+        )
+        self.clock = clock
+        self._states: dict[Hashable, _KeyState] = {}
+        self._lock = threading.Lock()
+
+    def window(self, key: Hashable) -> float:
+        """当前合并窗口（秒）"""
+        with self._lock:
+            state = self._states.get(key)
+            return state.window if state else 0.0
+
+    def hold_seconds(self, key: Hashable) -> float:
+        """该键的通知还需推迟的秒数，0 表示可以立即发送"""
+        now = self.clock()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.window <= 0:
+                return 0.0
+            return max(0.0, state.last_sent_at + state.window - now)
+
+    def record_sent(self, key: Hashable, merged: int) -> None:
+        """记录一次发送（merged 为合并的通知条数），并调整窗口"""
+        now = self.clock()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                self._states[key] = _KeyState(last_sent_at=now)
+                if merged > 1:
+                    self._states[key].window = self.min_window_seconds
+                return
+
+            gap = now - state.last_sent_at
+            if merged > 1 or gap < self.min_window_seconds:
+                state.window = min(
+                    self.max_window_seconds,
+                    max(self.min_window_seconds, state.window * 2),
+                )
+            elif gap >= 2 * max(state.window, self.min_window_seconds):
+                state.window = 0.0
+            else:
+                state.window /= 2
+                if state.window < self.min_window_seconds:
+                    state.window = 0.0
+            state.last_sent_at = now
@@ -3,7 +3,7 @@
 邮件发送配置
 
 文件功能：
-- 提供邮件发送所需的环境配置项。
+- 提供邮件发送所需的环境配置项，以及通知发件箱派发器的并发、重试参数。
 
 公开接口：
 - mail_sender_config
@@ -15,6 +15,8 @@
 - MailSenderConfig
 """
 
+from typing import Literal
+
 from pydantic import EmailStr, Field
 from pydantic_settings import BaseSettings
 
@@ -35,6 +37,98 @@ class MailSenderConfig(BaseSettings):
     sender_password: str = Field(default="", alias="SENDER_PASSWORD")
     sender_name: str = Field(default="", alias="SENDER_NAME")
 
+    # SMTP 连接池
+    smtp_pool_size: int = Field(
+        default=4, ge=1, alias="MAIL_SMTP_POOL_SIZE", description="最大连接数"
+    )
+    smtp_pool_max_idle_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        alias="MAIL_SMTP_POOL_MAX_IDLE_SECONDS",
+        description="空闲超过该时间的连接直接关闭重建（多数服务器会断开长时间空闲的连接）",
+    )
+    smtp_pool_noop_after_seconds: float = Field(
+        default=5.0,
+        ge=0,
+        alias="MAIL_SMTP_POOL_NOOP_AFTER_SECONDS",
+        description="空闲超过该时间的连接在复用前先发送 NOOP 检查",
+    )
+
+    # 渠道通知
+    notification_recipient_mode: Literal["envelope", "bcc"] = Field(
+        default="bcc",
+        alias="MAIL_NOTIFICATION_RECIPIENT_MODE",
+        description=(
+            "渠道员工通知的收件人方式：envelope 在邮件头列出全部员工，"
+            "bcc 以密送方式发送、员工之间互不可见；两者都只发送一次"
+        ),
+    )
+
+    # 突发通知合并（摘要邮件）
+    digest_enabled: bool = Field(
+        default=True,
+        alias="MAIL_DIGEST_ENABLED",
+        description="是否把同一渠道短时间内的多条新订单通知合并为摘要邮件",
+    )
+    digest_min_window_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        alias="MAIL_DIGEST_MIN_WINDOW_SECONDS",
+        description="检测到突发时的初始合并窗口（秒），低负载时窗口为 0、通知即时发送",
+    )
+    digest_max_window_seconds: float = Field(
+        default=120.0,
+        gt=0,
+        alias="MAIL_DIGEST_MAX_WINDOW_SECONDS",
+        description="合并窗口上限（秒），持续高负载时窗口逐次加倍直到该值",
+    )
+
+    # 通知发件箱派发器
+    outbox_dispatcher_enabled: bool = Field(
+        default=True,
+        alias="MAIL_OUTBOX_DISPATCHER_ENABLED",
+        description="是否在应用启动时运行发件箱派发器",
+    )
+    outbox_concurrency: int = Field(
+        default=4, ge=1, alias="MAIL_OUTBOX_CONCURRENCY", description="并发发送数"
+    )
+    outbox_batch_size: int = Field(
+        default=50, ge=1, alias="MAIL_OUTBOX_BATCH_SIZE", description="每次领取的记录数"
+    )
+    outbox_poll_interval: float = Field(
+        default=2.0,
+        gt=0,
+        alias="MAIL_OUTBOX_POLL_INTERVAL",
+        description="空闲时轮询间隔（秒），新记录写入后会立即唤醒",
+    )
+    outbox_wake_delay: float = Field(
+        default=0.2,
+        ge=0,
+        alias="MAIL_OUTBOX_WAKE_DELAY",
+        description="被新记录唤醒后等待的时间（秒），期间写入的记录一起领取",
+    )
+    outbox_max_attempts: int = Field(
+        default=5, ge=1, alias="MAIL_OUTBOX_MAX_ATTEMPTS", description="最大尝试次数"
+    )
+    outbox_backoff_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        alias="MAIL_OUTBOX_BACKOFF_SECONDS",
+        description="首次重试等待时间（秒），之后按指数增长",
+    )
+    outbox_max_backoff_seconds: float = Field(
+        default=600.0,
+        gt=0,
+        alias="MAIL_OUTBOX_MAX_BACKOFF_SECONDS",
+        description="重试等待时间上限（秒）",
+    )
+    outbox_lease_seconds: float = Field(
+        default=120.0,
+        gt=0,
+        alias="MAIL_OUTBOX_LEASE_SECONDS",
+        description="派发中记录的租约时长（秒），超时未完成视为派发器已退出",
+    )
+
 
 mail_sender_config = MailSenderConfig()
 
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+通知发件箱（outbox）业务模型
+
+公开接口：
+- `NotificationKind`
+- `NotificationOutboxStatus`
+- `NotificationOutbox`
+
+说明：
+- 业务写入（如创建订单）与发件箱记录在同一事务中提交，邮件由后台派发器异步发送；
+- `payload` 保存对应通知上下文模型的 JSON。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from enum import Enum
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.server.database import Base
+
+
+class NotificationKind(str, Enum):
+    NEW_ORDER = "new_order"
+
+
+class NotificationOutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    # 单收件人通知的收件人；渠道通知按订单写入一条记录，收件人列表在 payload 中
+    recipient_email: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    channel_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(
+        String(20), default=NotificationOutboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    # 派发中的记录在租约到期前不会被其他派发器领取，进程崩溃后可自动恢复
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+通知发件箱与后台派发器
+
+文件功能：
+- 业务事务内写入发件箱记录，后台线程领取记录并发发送，失败按指数退避重试。
+
+公开接口：
+- enqueue_notification(db, kind, payload, recipient_email, channel_id)
+- OutboxDispatcher
+- DEFAULT_HANDLERS / DEFAULT_DIGEST_HANDLERS
+- start_outbox_dispatcher(session_factory)
+- stop_outbox_dispatcher()
+- wake_outbox_dispatcher()
+
+内部方法：
+- _send_new_order / _send_new_order_digest
+- OutboxDispatcher._exchange / _send / _claim / _coalesce / _defer / _deliver / _finish
+- OutboxDispatcher._backoff_seconds
+
+说明：
+- `enqueue_notification` 只把记录加入会话，由调用方随业务数据一起提交，
+  因此订单创建的延迟与邮件服务器无关，且订单提交后通知不会丢失；
+- 领取记录使用一条条件 UPDATE（`RETURNING`）把状态改为 sending 并设置租约，
+  多个进程同时运行派发器时不会重复领取；租约到期仍未完成的记录会被重新领取；
+- 派发器与下单请求共用 SQLite 的写锁：上一批的发送结果、下一批的领取与合并窗口的推迟
+  在同一个写事务中完成；唤醒后等待 `MAIL_OUTBOX_WAKE_DELAY` 秒再领取，
+  连续下单的多次唤醒合并为一次领取；
+- 发送失败时 attempts 加一，按 `backoff * 2^(attempts-1)`（带随机抖动、有上限）
+  计算下次尝试时间，达到最大次数后标记为 failed；
+- 有摘要处理函数的通知按（类型, 渠道）分组：同一批领取到的多条合并为一封摘要邮件，
+  处于合并窗口内的记录推迟到窗口结束（不计入尝试次数），窗口由 `NotificationCoalescer`
+  按负载自适应调整。
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from .coalescing import NotificationCoalescer
+from .config import mail_sender_config
+from .models import NotificationKind, NotificationOutbox, NotificationOutboxStatus
+from .schemas import MailSendResult, NewOrderNotificationPayload
+from .service import send_new_order_digest_email, send_new_order_notification_email
+
+NotificationHandler = Callable[[str], MailSendResult]
+DigestHandler = Callable[[list[str]], MailSendResult]
+# (id, kind, payload, attempts, channel_id)
+ClaimedEntry = tuple[int, str, str, int, int | None]
+
+
+def _send_new_order(payload: str) -> MailSendResult:
+    return send_new_order_notification_email(
+        NewOrderNotificationPayload.model_validate_json(payload)
+    )
+
+
+def _send_new_order_digest(payloads: list[str]) -> MailSendResult:
+    return send_new_order_digest_email(
+        [NewOrderNotificationPayload.model_validate_json(p) for p in payloads]
+    )
+
+
+DEFAULT_HANDLERS: dict[str, NotificationHandler] = {
+    NotificationKind.NEW_ORDER.value: _send_new_order,
+}
+
+DEFAULT_DIGEST_HANDLERS: dict[str, DigestHandler] = {
+    NotificationKind.NEW_ORDER.value: _send_new_order_digest,
+}
+
+
+def enqueue_notification(
+    db: Session,
+    kind: NotificationKind,
+    payload: BaseModel,
+    recipient_email: str | None = None,
+    channel_id: int | None = None,
+) -> NotificationOutbox:
+    """在当前事务中写入发件箱记录（不提交）"""
+    entry = NotificationOutbox(
+        kind=kind.value,
+        payload=payload.model_dump_json(),
+        recipient_email=recipient_email,
+        channel_id=channel_id,
+    )
+    db.add(entry)
+    return entry
+
+
+class OutboxDispatcher:
+    """发件箱后台派发器"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        handlers: dict[str, NotificationHandler] | None = None,
+        digest_handlers: dict[str, DigestHandler] | None = None,
+        coalescer: NotificationCoalescer | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+        max_attempts: int | None = None,
+        backoff_seconds: float | None = None,
+        max_backoff_seconds: float | None = None,
+        lease_seconds: float | None = None,
+        wake_delay: float | None = None,
+    ):
+        config = mail_sender_config
+        self.session_factory = session_factory
+        self.handlers = handlers if handlers is not None else DEFAULT_HANDLERS
+        if digest_handlers is None:
+            digest_handlers = DEFAULT_DIGEST_HANDLERS if config.digest_enabled else {}
+        self.digest_handlers = digest_handlers
+        self.coalescer = coalescer or NotificationCoalescer()
+        self.concurrency = concurrency or config.outbox_concurrency
+        self.batch_size = batch_size or config.outbox_batch_size
+        self.poll_interval = poll_interval or config.outbox_poll_interval
+        self.max_attempts = max_attempts or config.outbox_max_attempts
+        self.backoff_seconds = backoff_seconds or config.outbox_backoff_seconds
+        self.max_backoff_seconds = (
+            max_backoff_seconds or config.outbox_max_backoff_seconds
+        )
+        self.lease_seconds = lease_seconds or config.outbox_lease_seconds
+        self.wake_delay = (
+            wake_delay if wake_delay is not None else config.outbox_wake_delay
+        )
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="outbox-send"
+        )
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """启动后台线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-dispatcher", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"通知派发器已启动：并发 {self.concurrency}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止后台线程，等待正在发送的邮件完成"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def wake(self) -> None:
+        """有新记录写入时唤醒派发器，无需等待下一次轮询"""
+        self._wake.set()
+
+    def run_once(self) -> int:
+        """领取一批记录并发送，返回发送的记录数（不含推迟到合并窗口结束的记录）"""
+        groups, _ = self._exchange([])
+        results = self._send(groups)
+        if results:
+            self._exchange(results, claim=False)
+        return len(results)
+
+    def _run(self) -> None:
+        # 上一批的发送结果与下一批的领取在同一个事务中写入
+        results: list[tuple[int, int, MailSendResult]] = []
+        while not self._stop.is_set():
+            claimed = 0
+            try:
+                groups, claimed = self._exchange(results)
+                results = []
+                results = self._send(groups)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"通知派发失败：{e}")
+                self._stop.wait(self.poll_interval)
+                continue
+            if claimed >= self.batch_size:
+                # 本批领满说明还有积压，立即继续
+                continue
+            if results:
+                # 稍后写回结果，期间写入的新记录在同一个事务中领取
+                self._stop.wait(self.wake_delay)
+                continue
+            # 等待唤醒或轮询超时；唤醒后稍等，连续下单的多次唤醒合并为一次领取
+            if self._wake.wait(self.poll_interval):
+                self._stop.wait(self.wake_delay)
+            self._wake.clear()
+
+    def _exchange(
+        self, results: list[tuple[int, int, MailSendResult]], claim: bool = True
+    ) -> tuple[list[list[ClaimedEntry]], int]:
+        """在一个事务内写回发送结果、领取下一批并推迟合并窗口内的记录
+
+        返回 (待发送的分组, 领取的记录数)。
+        """
+        now = datetime.now(timezone.utc)
+        with self.session_factory() as db:
+            if results:
+                self._finish(db, results, now)
+            entries = self._claim(db, now) if claim else []
+            groups, deferred = self._coalesce(entries)
+            if deferred:
+                self._defer(db, deferred, now)
+            db.commit()
+        return groups, len(entries)
+
+    def _send(
+        self, groups: list[list[ClaimedEntry]]
+    ) -> list[tuple[int, int, MailSendResult]]:
+        """并发发送各分组，返回 (记录ID, 尝试次数, 发送结果)"""
+        return [
+            item
+            for group_results in self._executor.map(self._deliver, groups)
+            for item in group_results
+        ]
+
+    def _claim(self, db: Session, now: datetime) -> list[ClaimedEntry]:
+        """领取到期的待发送记录（以及租约过期的派发中记录）"""
+        claimable = or_(
+            and_(
+                NotificationOutbox.status == NotificationOutboxStatus.PENDING,
+                NotificationOutbox.next_attempt_at <= now,
+            ),
+            and_(
+                NotificationOutbox.status == NotificationOutboxStatus.SENDING,
+                NotificationOutbox.locked_until < now,
+            ),
+        )
+        candidate_ids = (
+            select(NotificationOutbox.id)
+            .where(claimable)
+            .order_by(NotificationOutbox.id)
+            .limit(self.batch_size)
+        )
+        rows = db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(candidate_ids), claimable)
+            .values(
+                status=NotificationOutboxStatus.SENDING,
+                locked_until=now + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.kind,
+                NotificationOutbox.payload,
+                NotificationOutbox.attempts,
+                NotificationOutbox.channel_id,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        return sorted(
+            (entry_id, kind, payload, attempts, channel_id)
+            for entry_id, kind, payload, attempts, channel_id in rows
+        )
+
+    def _coalesce(
+        self, entries: list[ClaimedEntry]
+    ) -> tuple[list[list[ClaimedEntry]], list[tuple[list[int], float]]]:
+        """按合并键分组，返回 (待发送的分组, [(推迟的记录ID, 推迟秒数)])"""
+        groups: list[list[ClaimedEntry]] = []
+        by_key: dict[tuple[str, int], list[ClaimedEntry]] = {}
+        for entry in entries:
+            kind, channel_id = entry[1], entry[4]
+            if kind in self.digest_handlers and channel_id is not None:
+                by_key.setdefault((kind, channel_id), []).append(entry)
+            else:
+                groups.append([entry])
+
+        deferred = []
+        for key, group in by_key.items():
+            hold = self.coalescer.hold_seconds(key)
+            if hold > 0:
+                deferred.append(([entry[0] for entry in group], hold))
+            else:
+                groups.append(group)
+        return groups, deferred
+
+    def _defer(
+        self, db: Session, deferred: list[tuple[list[int], float]], now: datetime
+    ) -> None:
+        """把合并窗口内的记录放回待发送状态，窗口结束时再一起领取"""
+        for entry_ids, hold in deferred:
+            db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(entry_ids))
+                .values(
+                    status=NotificationOutboxStatus.PENDING,
+                    next_attempt_at=now + timedelta(seconds=hold),
+                    locked_until=None,
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    def _deliver(
+        self, group: list[ClaimedEntry]
+    ) -> list[tuple[int, int, MailSendResult]]:
+        """发送一组记录：单条使用普通处理函数，多条合并为一封摘要邮件"""
+        kind = group[0][1]
+        handler = self.handlers.get(kind)
+        if len(group) == 1 and handler is None:
+            # 未知类型无法重试成功，直接用尽尝试次数
+            result = MailSendResult(success=False, error=f"未知通知类型：{kind}")
+            return [(group[0][0], self.max_attempts, result)]
+        try:
+            if handler is not None and len(group) == 1:
+                result = handler(group[0][2])
+            else:
+                result = self.digest_handlers[kind]([entry[2] for entry in group])
+        except Exception as e:  # noqa: BLE001
+            result = MailSendResult(success=False, error=str(e))
+
+        if result.success and group[0][4] is not None and kind in self.digest_handlers:
+            self.coalescer.record_sent((kind, group[0][4]), len(group))
+        return [(entry[0], entry[3] + 1, result) for entry in group]
+
+    def _finish(
+        self,
+        db: Session,
+        results: list[tuple[int, int, MailSendResult]],
+        now: datetime,
+    ) -> None:
+        """写回发送结果（按主键批量更新）"""
+        params = []
+        for entry_id, attempts, result in results:
+            values: dict = {"id": entry_id, "attempts": attempts, "locked_until": None}
+            if result.success:
+                values.update(
+                    status=NotificationOutboxStatus.SENT,
+                    sent_at=now,
+                    last_error=None,
+                )
+            elif attempts >= self.max_attempts:
+                values.update(
+                    status=NotificationOutboxStatus.FAILED, last_error=result.error
+                )
+                logger.error(f"通知发送失败且不再重试：id={entry_id} {result.error}")
+            else:
+                delay = self._backoff_seconds(attempts)
+                values.update(
+                    status=NotificationOutboxStatus.PENDING,
+                    next_attempt_at=now + timedelta(seconds=delay),
+                    last_error=result.error,
+                )
+                logger.warning(
+                    f"通知发送失败，{delay:.0f} 秒后重试：id={entry_id} {result.error}"
+                )
+            params.append(values)
+        db.execute(update(NotificationOutbox), params)
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        """第 attempts 次失败后的等待时间（指数退避，±20% 抖动）"""
+        delay = min(
+            self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempts - 1)
+        )
+        return delay * random.uniform(0.8, 1.2)
+
+
+_dispatcher: OutboxDispatcher | None = None
+
+
+def start_outbox_dispatcher(session_factory: Callable[[], Session]) -> OutboxDispatcher:
+    """启动全局派发器（应用启动时调用）"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = OutboxDispatcher(session_factory)
+        _dispatcher.start()
+    return _dispatcher
+
+
+def stop_outbox_dispatcher() -> None:
+    """停止全局派发器（应用关闭时调用）"""
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
+
+
+def wake_outbox_dispatcher() -> None:
+    """唤醒全局派发器；未启动时记录会在派发器启动后发送"""
+    if _dispatcher is not None:
+        _dispatcher.wake()
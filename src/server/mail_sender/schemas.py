@@ -24,9 +24,9 @@
 """
 
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 class MailAddress(BaseModel):
@@ -45,6 +45,10 @@ class MailContent(BaseModel):
     subtype: Literal["plain", "html"] = Field(
         default="plain", description="邮件正文格式"
     )
+    hide_recipients: bool = Field(
+        default=False,
+        description="是否以密送方式发送：收件人只出现在信封中，邮件头不列出",
+    )
 
 
 class MailSendResult(BaseModel):
@@ -75,15 +79,24 @@ class VerificationCodeMailPayload(BaseModel):
 
 
 class NewOrderNotificationPayload(BaseModel):
-    """新订单通知邮件上下文"""
+    """新订单通知邮件上下文（同一渠道的全部员工共用一封邮件）"""
 
-    recipient: MailAddress = Field(..., description="收件人信息")
+    recipients: list[MailAddress] = Field(..., min_length=1, description="收件人列表")
     order_id: int = Field(..., description="订单ID")
     card_name: str = Field(..., min_length=1, max_length=100, description="商品名称")
     activation_code: str = Field(..., min_length=1, description="卡密")
     created_at: datetime = Field(..., description="订单创建时间")
     channel_name: str = Field(..., min_length=1, max_length=100, description="渠道名称")
 
+    @model_validator(mode="before")
+    @classmethod
+    def _accept_single_recipient(cls, data: Any) -> Any:
+        # 兼容升级前写入发件箱的单收件人记录
+        if isinstance(data, dict) and "recipient" in data and "recipients" not in data:
+            data = dict(data)
+            data["recipients"] = [data.pop("recipient")]
+        return data
+
 
 __all__ = [
     "MailAddress",
@@ -6,14 +6,32 @@
 - 封装 SMTP 邮件发送逻辑，并提供业务侧可直接调用的邮件发送接口。
 
 公开接口：
+- MailTransport
+- SMTPConnectionPool
+- smtp_pool
 - send_mail
+- send_new_order_notification_email
+- send_new_order_digest_email
 - send_purchase_confirmation_email
 - send_verification_code_email
 
 内部方法：
+- _connect_smtp
+- _send_transaction
+- _reset_transaction
 - _build_mime_message
 - _format_recipients
 
+说明：
+- 发送通过 `SMTPConnectionPool` 复用已登录的连接，避免每封邮件都进行 TLS 握手与登录；
+- 连接空闲超过 `smtp_pool_noop_after_seconds` 时先发送 NOOP 检查，失败则重建；
+  空闲超过 `smtp_pool_max_idle_seconds` 的连接直接关闭；
+- 发送过程中服务器断开连接时丢弃该连接；断开发生在 DATA 之前（邮件肯定未被接收）时
+  使用新连接重试一次，DATA 之后断开则不重试，以免重复投递；
+- SMTP 协议级错误（如收件人被拒）不影响连接本身，连接照常归还到池中；
+- 新订单通知每个订单只渲染、发送一次，渠道员工作为同一封邮件的多个信封收件人；
+  突发时派发器把同一渠道的多条通知合并为一封摘要邮件（见 `coalescing.py`）。
+
 文件的公开接口的 Pydantic 模型：
 - MailContent（定义于 `schemas.py`）
 - MailSendResult（定义于 `schemas.py`）
@@ -24,9 +42,12 @@
 from __future__ import annotations
 
 import smtplib
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.utils import formataddr
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Protocol
 
 from loguru import logger
 
@@ -42,6 +63,210 @@ from .schemas import (
 )
 
 
+def _connect_smtp() -> smtplib.SMTP:
+    """按配置建立 SMTP 连接并登录"""
+    smtp_class = smtplib.SMTP_SSL if mail_sender_config.use_ssl else smtplib.SMTP
+    server = smtp_class(
+        mail_sender_config.smtp_host,
+        mail_sender_config.smtp_port,
+        timeout=mail_sender_config.timeout,
+    )
+    try:
+        if not mail_sender_config.use_ssl and mail_sender_config.use_tls:
+            server.starttls()
+        server.login(
+            mail_sender_config.sender_email, mail_sender_config.sender_password
+        )
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+class MailTransport(Protocol):
+    """邮件发送通道：`send_mail` 通过它投递邮件（默认为 `SMTPConnectionPool`）"""
+
+    def sendmail(
+        self, from_addr: str, to_addrs: list[str], message: str
+    ) -> dict[str, tuple[int, bytes]]: ...
+
+    def close_all(self) -> None: ...
+
+
+class _DisconnectedBeforeData(smtplib.SMTPServerDisconnected):
+    """DATA 之前连接已断开：服务器肯定未接收邮件，可以换连接重发"""
+
+
+def _reset_transaction(server: smtplib.SMTP) -> None:
+    """放弃当前事务（同 `smtplib.SMTP._rset`，忽略连接已断开）"""
+    try:
+        server.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+
+def _send_transaction(
+    server: smtplib.SMTP, from_addr: str, to_addrs: list[str], message: str
+) -> dict[str, tuple[int, bytes]]:
+    """
+    分阶段执行一次 SMTP 事务，语义同 `smtplib.SMTP.sendmail`
+
+    MAIL/RCPT 阶段连接被断开时抛出 `_DisconnectedBeforeData`；DATA 阶段断开时服务器
+    可能已经接收邮件，原样抛出 `SMTPServerDisconnected`。
+    """
+    refused: dict[str, tuple[int, bytes]] = {}
+    try:
+        server.ehlo_or_helo_if_needed()
+        code, response = server.mail(from_addr)
+        if code != 250:
+            if code == 421:
+                server.close()
+            else:
+                _reset_transaction(server)
+            raise smtplib.SMTPSenderRefused(code, response, from_addr)
+        for address in to_addrs:
+            code, response = server.rcpt(address)
+            if code not in (250, 251):
+                refused[address] = (code, response)
+            if code == 421:
+                server.close()
+                raise smtplib.SMTPRecipientsRefused(refused)
+        if len(refused) == len(to_addrs):
+            _reset_transaction(server)
+            raise smtplib.SMTPRecipientsRefused(refused)
+    except smtplib.SMTPServerDisconnected as exc:
+        raise _DisconnectedBeforeData(*exc.args) from exc
+
+    code, response = server.data(message)
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            _reset_transaction(server)
+        raise smtplib.SMTPDataError(code, response)
+    return refused
+
+
+class SMTPConnectionPool:
+    """已登录 SMTP 连接的连接池（线程安全）"""
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], smtplib.SMTP] = _connect_smtp,
+        max_size: int | None = None,
+        max_idle_seconds: float | None = None,
+        noop_after_seconds: float | None = None,
+    ):
+        config = mail_sender_config
+        self.connection_factory = connection_factory
+        self.max_size = max_size or config.smtp_pool_size
+        self.max_idle_seconds = (
+            max_idle_seconds
+            if max_idle_seconds is not None
+            else config.smtp_pool_max_idle_seconds
+        )
+        self.noop_after_seconds = (
+            noop_after_seconds
+            if noop_after_seconds is not None
+            else config.smtp_pool_noop_after_seconds
+        )
+        # 空闲连接栈：(连接, 归还时间)，后进先出，优先复用最近用过的连接
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self.connections_opened = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """借出一个可用连接；发生连接级错误时连接被丢弃，否则归还到池中"""
+        with self._slots:
+            server = self._checkout()
+            try:
+                yield server
+            except smtplib.SMTPServerDisconnected:
+                self._discard(server)
+                raise
+            except smtplib.SMTPException:
+                # 协议级错误（如收件人被拒）不影响连接本身；
+                # SMTPException 是 OSError 的子类，须先于 socket 错误判断
+                self._checkin(server)
+                raise
+            except BaseException:
+                # socket 错误、超时或事务被中断：连接状态未知，直接丢弃
+                self._discard(server)
+                raise
+            else:
+                self._checkin(server)
+
+    def sendmail(
+        self, from_addr: str, to_addrs: list[str], message: str
+    ) -> dict[str, tuple[int, bytes]]:
+        """通过池中连接发送，返回被拒绝的收件人；DATA 之前连接被断开时使用新连接重试一次"""
+        try:
+            with self.connection() as server:
+                return _send_transaction(server, from_addr, to_addrs, message)
+        except _DisconnectedBeforeData:
+            logger.info("SMTP 连接已断开，重新连接后重试")
+        with self.connection() as server:
+            return _send_transaction(server, from_addr, to_addrs, message)
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接（应用关闭时调用）"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, returned_at = self._idle.pop()
+            idle_for = time.monotonic() - returned_at
+            if idle_for > self.max_idle_seconds:
+                self._quit(server)
+                continue
+            if idle_for > self.noop_after_seconds and not self._is_alive(server):
+                self._discard(server)
+                continue
+            return server
+
+        server = self.connection_factory()
+        with self._lock:
+            self.connections_opened += 1
+        return server
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            code, _ = server.noop()
+        except (smtplib.SMTPException, OSError):
+            return False
+        return code == 250
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.close()
+        except Exception:  # noqa: BLE001
+            pass
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:  # noqa: BLE001
+            SMTPConnectionPool._discard(server)
+
+
+smtp_pool: MailTransport = SMTPConnectionPool()
+
+
 def _build_mime_message(mail: MailContent) -> MIMEText:
     """构造 MIME 消息对象"""
     if not mail.recipients:
@@ -50,7 +275,11 @@ def _build_mime_message(mail: MailContent) -> MIMEText:
     message = MIMEText(mail.body, mail.subtype, "utf-8")
     sender_name = mail_sender_config.sender_name or mail_sender_config.sender_email
     message["From"] = formataddr((sender_name, mail_sender_config.sender_email))
-    message["To"] = _format_recipients(mail.recipients)
+    if mail.hide_recipients:
+        # 收件人只出现在信封（RCPT TO）中
+        message["To"] = "undisclosed-recipients:;"
+    else:
+        message["To"] = _format_recipients(mail.recipients)
     message["Subject"] = mail.subject
     return message
 
@@ -64,7 +293,7 @@ def _format_recipients(recipients: Iterable[MailAddress]) -> str:
     return ", ".join(formatted)
 
 
-def send_mail(mail: MailContent) -> MailSendResult:
+def send_mail(mail: MailContent, pool: MailTransport | None = None) -> MailSendResult:
     """发送邮件并返回结果"""
     try:
         message = _build_mime_message(mail)
@@ -72,37 +301,20 @@ def send_mail(mail: MailContent) -> MailSendResult:
         logger.error(f"邮件内容构造失败：{exc}")
         return MailSendResult(success=False, error=str(exc))
 
-    smtp_class = smtplib.SMTP_SSL if mail_sender_config.use_ssl else smtplib.SMTP
-
-    mail_sent = False
-
     try:
-        with smtp_class(
-            mail_sender_config.smtp_host,
-            mail_sender_config.smtp_port,
-            timeout=mail_sender_config.timeout,
-        ) as server:
-            if not mail_sender_config.use_ssl and mail_sender_config.use_tls:
-                server.starttls()
-            server.login(
-                mail_sender_config.sender_email, mail_sender_config.sender_password
-            )
-            server.sendmail(
-                mail_sender_config.sender_email,
-                [recipient.email for recipient in mail.recipients],
-                message.as_string(),
-            )
-            mail_sent = True
-    except smtplib.SMTPServerDisconnected as exc:
-        if mail_sent:
-            logger.warning(f"邮件发送成功但服务器提前断开连接：{exc}")
-            return MailSendResult(success=True, error=None)
-        logger.error(f"邮件发送失败：{exc}")
-        return MailSendResult(success=False, error=str(exc))
+        refused = (pool or smtp_pool).sendmail(
+            mail_sender_config.sender_email,
+            [recipient.email for recipient in mail.recipients],
+            message.as_string(),
+        )
     except Exception as exc:  # noqa: BLE001
         logger.error(f"邮件发送失败：{exc}")
         return MailSendResult(success=False, error=str(exc))
 
+    if refused:
+        # 部分收件人被拒绝时其余收件人已投递，整封重试会造成重复，只记录日志
+        logger.warning(f"部分收件人被拒绝：{refused}")
+
     return MailSendResult(success=True, error=None)
 
 
@@ -155,11 +367,19 @@ def send_verification_code_email(
 def send_new_order_notification_email(
     payload: NewOrderNotificationPayload,
 ) -> MailSendResult:
-    """发送新订单通知邮件"""
+    """发送新订单通知邮件
+
+    正文只渲染一次，渠道的全部员工在同一次 SMTP 事务中投递（每人一个 RCPT TO），
+    按 `notification_recipient_mode` 决定邮件头是否列出全部收件人。
+    """
     created_at_display = payload.created_at.isoformat()
+    if len(payload.recipients) == 1:
+        greeting = payload.recipients[0].name or payload.recipients[0].email
+    else:
+        greeting = "各位同事"
     # 构造 HTML 正文
     body_html = f"""
-    <p>您好，{payload.recipient.name or payload.recipient.email}</p>
+    <p>您好，{greeting}</p>
     <p>您负责的渠道「{payload.channel_name}」有新的订单需要处理：</p>
     <ul>
       <li>订单ID：{payload.order_id}</li>
@@ -176,14 +396,60 @@ def send_new_order_notification_email(
     mail = MailContent(
         subject=f"渠道「{payload.channel_name}」新订单通知",
         body=body_html,
-        recipients=[payload.recipient],
+        recipients=payload.recipients,
         subtype="html",  # 👈 这里很重要：告诉发送函数这是 HTML 邮件
+        hide_recipients=mail_sender_config.notification_recipient_mode == "bcc",
+    )
+    return send_mail(mail)
+
+
+def send_new_order_digest_email(
+    payloads: list[NewOrderNotificationPayload],
+) -> MailSendResult:
+    """发送新订单摘要邮件（同一渠道在合并窗口内的多个新订单）
+
+    收件人取各通知收件人的并集，按订单创建时间列出全部订单。
+    """
+    recipients: dict[str, MailAddress] = {}
+    for payload in payloads:
+        for recipient in payload.recipients:
+            recipients.setdefault(recipient.email, recipient)
+    ordered = sorted(payloads, key=lambda p: (p.created_at, p.order_id))
+    channel_name = ordered[-1].channel_name
+    rows = "\n".join(
+        f"""      <tr><td>{p.order_id}</td><td>{p.card_name}</td>"""
+        f"""<td>{p.activation_code}</td><td>{p.created_at.isoformat()}</td></tr>"""
+        for p in ordered
+    )
+    body_html = f"""
+    <p>您好，各位同事</p>
+    <p>您负责的渠道「{channel_name}」有 {len(ordered)} 个新的订单需要处理：</p>
+    <table border="1" cellpadding="4" cellspacing="0">
+      <tr><th>订单ID</th><th>商品名称</th><th>卡密</th><th>创建时间</th></tr>
+{rows}
+    </table>
+    <p>请及时
+       <a href="{global_config.app_url}/staff/order-processing">登录系统</a>
+       处理这些订单。
+    </p>
+    <p>系统自动发送，请勿回复此邮件。</p>
+    """
+    mail = MailContent(
+        subject=f"渠道「{channel_name}」{len(ordered)} 个新订单通知",
+        body=body_html,
+        recipients=list(recipients.values()),
+        subtype="html",
+        hide_recipients=mail_sender_config.notification_recipient_mode == "bcc",
     )
     return send_mail(mail)
 
 
 __all__ = [
+    "MailTransport",
+    "SMTPConnectionPool",
+    "smtp_pool",
     "send_mail",
+    "send_new_order_digest_email",
     "send_new_order_notification_email",
     "send_purchase_confirmation_email",
     "send_verification_code_email",
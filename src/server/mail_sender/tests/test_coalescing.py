@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+通知合并测试
+"""
+
+from src.server.mail_sender.coalescing import NotificationCoalescer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_window_adapts_to_load():
+    """测试窗口在突发时加倍、负载下降后减半直至归零"""
+    clock = FakeClock()
+    coalescer = NotificationCoalescer(5, 40, clock=clock)
+    key = ("new_order", 1)
+
+    # 低负载：即时发送
+    coalescer.record_sent(key, 1)
+    assert coalescer.hold_seconds(key) == 0
+
+    # 紧接着又一条：检测到突发，打开最小窗口
+    clock.now += 1
+    coalescer.record_sent(key, 1)
+    assert coalescer.window(key) == 5
+    clock.now += 2
+    assert coalescer.hold_seconds(key) == 3
+
+    # 每个窗口都合并了多条：加倍直到上限
+    for expected in (10, 20, 40, 40):
+        clock.now += coalescer.window(key)
+        coalescer.record_sent(key, 8)
+        assert coalescer.window(key) == expected
+
+    # 窗口结束时只有一条：减半
+    clock.now += 40
+    coalescer.record_sent(key, 1)
+    assert coalescer.window(key) == 20
+
+    # 长时间无通知：归零
+    clock.now += 300
+    assert coalescer.hold_seconds(key) == 0
+    coalescer.record_sent(key, 1)
+    assert coalescer.window(key) == 0
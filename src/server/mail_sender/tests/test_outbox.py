@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+通知发件箱与派发器测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.server.activation_code.models import ActivationCode
+from src.server.auth.dao import UserDAO
+from src.server.auth.schemas import Role
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.mail_sender.coalescing import NotificationCoalescer
+from src.server.mail_sender.models import (
+    NotificationKind,
+    NotificationOutbox,
+    NotificationOutboxStatus,
+)
+from src.server.mail_sender.outbox import OutboxDispatcher, enqueue_notification
+from src.server.mail_sender.schemas import (
+    MailAddress,
+    MailSendResult,
+    NewOrderNotificationPayload,
+)
+from src.server.order.models import Order
+from src.server.order.service import verify_activation_code
+
+
+@pytest.fixture
+def session_factory(test_db_engine):
+    return sessionmaker(bind=test_db_engine, autocommit=False, autoflush=False)
+
+
+def _make_dispatcher(session_factory, handler, **kwargs) -> OutboxDispatcher:
+    return OutboxDispatcher(
+        session_factory,
+        handlers={NotificationKind.NEW_ORDER.value: handler},
+        concurrency=2,
+        backoff_seconds=30,
+        **kwargs,
+    )
+
+
+def _enqueue(db: Session, email: str = "staff@example.com") -> NotificationOutbox:
+    payload = NewOrderNotificationPayload(
+        recipients=[MailAddress(email=email)],
+        order_id=1,
+        card_name="测试卡",
+        activation_code="CODE",
+        created_at=datetime.now(timezone.utc),
+        channel_name="测试渠道",
+    )
+    entry = enqueue_notification(db, NotificationKind.NEW_ORDER, payload, email, 1)
+    db.commit()
+    return entry
+
+
+def test_order_creation_writes_outbox_in_same_transaction(test_db_session: Session):
+    """测试下单时为渠道员工写入发件箱记录，不直接发送邮件"""
+    channel = Channel(name="通知渠道")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="通知卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    test_db_session.add(ActivationCode(card_id=card.id, code="OUTBOX-CODE-001"))
+    test_db_session.commit()
+    dao = UserDAO(test_db_session)
+    for i in range(2):
+        dao.create(
+            f"staff{i}", f"staff{i}@example.com", "-", Role.STAFF, None, channel.id
+        )
+
+    order = verify_activation_code(test_db_session, "OUTBOX-CODE-001", channel.id)
+
+    # 每个订单只写入一条记录，渠道全部员工在同一封邮件中
+    entries = test_db_session.query(NotificationOutbox).all()
+    assert len(entries) == 1
+    assert entries[0].status == NotificationOutboxStatus.PENDING
+    assert entries[0].channel_id == channel.id
+    payload = NewOrderNotificationPayload.model_validate_json(entries[0].payload)
+    assert sorted(r.email for r in payload.recipients) == [
+        "staff0@example.com",
+        "staff1@example.com",
+    ]
+    assert payload.order_id == order.id
+    assert payload.channel_name == "通知渠道"
+
+
+def test_invalid_notification_payload_does_not_fail_order(test_db_session: Session):
+    """测试通知内容校验失败时订单照常创建，只跳过通知"""
+    channel = Channel(name="渠" * 101)
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="通知卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    test_db_session.add(ActivationCode(card_id=card.id, code="OUTBOX-CODE-002"))
+    test_db_session.commit()
+    UserDAO(test_db_session).create(
+        "staff", "staff@example.com", "-", Role.STAFF, None, channel.id
+    )
+
+    order = verify_activation_code(test_db_session, "OUTBOX-CODE-002", channel.id)
+
+    assert test_db_session.get(Order, order.id) is not None
+    assert test_db_session.query(NotificationOutbox).count() == 0
+
+
+def test_new_order_payload_accepts_single_recipient():
+    """测试升级前写入的单收件人记录仍可解析"""
+    payload = NewOrderNotificationPayload.model_validate_json(
+        '{"recipient": {"email": "old@example.com", "name": null}, "order_id": 1, '
+        '"card_name": "卡", "activation_code": "C", '
+        '"created_at": "2024-01-01T00:00:00Z", "channel_name": "渠道"}'
+    )
+    assert [r.email for r in payload.recipients] == ["old@example.com"]
+
+
+def test_dispatcher_marks_sent(test_db_session: Session, session_factory):
+    """测试派发成功后标记为 sent"""
+    entry = _enqueue(test_db_session)
+    sent = []
+
+    def handler(payload: str) -> MailSendResult:
+        sent.append(NewOrderNotificationPayload.model_validate_json(payload))
+        return MailSendResult(success=True)
+
+    dispatcher = _make_dispatcher(session_factory, handler)
+    try:
+        assert dispatcher.run_once() == 1
+        assert dispatcher.run_once() == 0
+    finally:
+        dispatcher.stop()
+
+    test_db_session.refresh(entry)
+    assert entry.status == NotificationOutboxStatus.SENT
+    assert entry.attempts == 1
+    assert entry.sent_at is not None
+    assert sent[0].recipients[0].email == "staff@example.com"
+
+
+def test_dispatcher_retries_with_backoff_then_fails(
+    test_db_session: Session, session_factory
+):
+    """测试失败后按退避时间重试，达到最大次数后标记为 failed"""
+    entry = _enqueue(test_db_session)
+
+    def handler(payload: str) -> MailSendResult:
+        raise ConnectionError("SMTP 不可达")
+
+    dispatcher = _make_dispatcher(session_factory, handler, max_attempts=2)
+    try:
+        assert dispatcher.run_once() == 1
+        test_db_session.refresh(entry)
+        assert entry.status == NotificationOutboxStatus.PENDING
+        assert entry.attempts == 1
+        assert entry.last_error is not None
+        assert "SMTP 不可达" in entry.last_error
+        # 未到重试时间，不会被领取
+        assert dispatcher.run_once() == 0
+
+        entry.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        test_db_session.commit()
+        assert dispatcher.run_once() == 1
+    finally:
+        dispatcher.stop()
+
+    test_db_session.refresh(entry)
+    assert entry.status == NotificationOutboxStatus.FAILED
+    assert entry.attempts == 2
+
+
+def test_dispatcher_reclaims_expired_lease(test_db_session: Session, session_factory):
+    """测试租约过期的派发中记录会被重新领取"""
+    entry = _enqueue(test_db_session)
+    entry.status = NotificationOutboxStatus.SENDING
+    entry.locked_until = datetime.now(timezone.utc) + timedelta(minutes=1)
+    test_db_session.commit()
+
+    dispatcher = _make_dispatcher(
+        session_factory, lambda payload: MailSendResult(success=True)
+    )
+    try:
+        assert dispatcher.run_once() == 0
+
+        entry.locked_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+        test_db_session.commit()
+        assert dispatcher.run_once() == 1
+    finally:
+        dispatcher.stop()
+
+    test_db_session.refresh(entry)
+    assert entry.status == NotificationOutboxStatus.SENT
+
+
+def test_dispatcher_sends_digest_and_defers_within_window(
+    test_db_session: Session, session_factory
+):
+    """测试同一渠道的多条通知合并为摘要，窗口内的新通知被推迟"""
+    entries = [_enqueue(test_db_session, f"s{i}@example.com") for i in range(3)]
+    singles, digests = [], []
+
+    def handler(payload: str) -> MailSendResult:
+        singles.append(payload)
+        return MailSendResult(success=True)
+
+    def digest_handler(payloads: list[str]) -> MailSendResult:
+        digests.append(
+            [NewOrderNotificationPayload.model_validate_json(p) for p in payloads]
+        )
+        return MailSendResult(success=True)
+
+    dispatcher = OutboxDispatcher(
+        session_factory,
+        handlers={"new_order": handler},
+        digest_handlers={"new_order": digest_handler},
+        coalescer=NotificationCoalescer(30, 120),
+    )
+    try:
+        assert dispatcher.run_once() == 3
+        assert singles == [] and len(digests) == 1
+        assert [p.recipients[0].email for p in digests[0]] == [
+            "s0@example.com",
+            "s1@example.com",
+            "s2@example.com",
+        ]
+
+        # 合并了多条，窗口打开：新记录推迟到窗口结束，不计入尝试次数
+        late = _enqueue(test_db_session)
+        assert dispatcher.run_once() == 0
+    finally:
+        dispatcher.stop()
+
+    for entry in entries:
+        test_db_session.refresh(entry)
+        assert entry.status == NotificationOutboxStatus.SENT
+    test_db_session.refresh(late)
+    assert late.status == NotificationOutboxStatus.PENDING
+    assert late.attempts == 0
+    assert late.locked_until is None
+    assert late.next_attempt_at is not None and entries[0].sent_at is not None
+    assert late.next_attempt_at > entries[0].sent_at
+    assert test_db_session.query(NotificationOutbox).count() == 4
+
+
+def test_dispatcher_finishes_and_claims_in_one_transaction(
+    test_db_session: Session, session_factory
+):
+    """测试上一批的发送结果与下一批的领取在同一个写事务中完成"""
+    first, second = _enqueue(test_db_session), _enqueue(test_db_session)
+    dispatcher = _make_dispatcher(
+        session_factory, lambda payload: MailSendResult(success=True), batch_size=1
+    )
+    commits = []
+
+    def _record(session):
+        commits.append(session)
+
+    event.listen(session_factory, "after_commit", _record)
+    try:
+        groups, claimed = dispatcher._exchange([])
+        assert claimed == 1
+        results = dispatcher._send(groups)
+
+        groups, claimed = dispatcher._exchange(results)
+        assert claimed == 1 and groups[0][0][0] == second.id
+        dispatcher._exchange(dispatcher._send(groups), claim=False)
+    finally:
+        event.remove(session_factory, "after_commit", _record)
+        dispatcher.stop()
+
+    assert len(commits) == 3
+    for entry in (first, second):
+        test_db_session.refresh(entry)
+        assert entry.status == NotificationOutboxStatus.SENT
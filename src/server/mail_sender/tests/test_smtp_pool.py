@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+SMTP 连接池测试
+"""
+
+import smtplib
+
+import pytest
+
+from src.server.mail_sender.schemas import MailAddress, MailContent
+from src.server.mail_sender.service import SMTPConnectionPool, send_mail
+
+
+class FakeSMTP:
+    """记录调用的 SMTP 连接替身"""
+
+    def __init__(
+        self,
+        fail_sends: int = 0,
+        noop_code: int = 250,
+        fail_after_data: bool = False,
+        refuse: tuple[str, ...] = (),
+    ):
+        self.fail_sends = fail_sends
+        self.noop_code = noop_code
+        self.fail_after_data = fail_after_data
+        self.refuse = refuse
+        self.sent: list[list[str]] = []
+        self.messages: list[str] = []
+        self.noops = 0
+        self.resets = 0
+        self.closed = False
+        self._envelope: list[str] = []
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def mail(self, from_addr):
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self._envelope = []
+        return 250, b"OK"
+
+    def rcpt(self, address):
+        if address in self.refuse:
+            return 550, b"No such user"
+        self._envelope.append(address)
+        return 250, b"OK"
+
+    def data(self, message):
+        if self.fail_after_data:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(self._envelope)
+        self.messages.append(message)
+        return 250, b"OK"
+
+    def rset(self):
+        self.resets += 1
+        return 250, b"OK"
+
+    def noop(self):
+        self.noops += 1
+        return self.noop_code, b"OK"
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    def __init__(self, *servers: FakeSMTP):
+        self.pending = list(servers)
+        self.created: list[FakeSMTP] = []
+
+    def __call__(self) -> FakeSMTP:
+        server = self.pending.pop(0) if self.pending else FakeSMTP()
+        self.created.append(server)
+        return server
+
+
+def _pool(factory, **kwargs) -> SMTPConnectionPool:
+    kwargs.setdefault("max_idle_seconds", 60)
+    kwargs.setdefault("noop_after_seconds", 5)
+    return SMTPConnectionPool(factory, max_size=2, **kwargs)
+
+
+def test_pool_reuses_connection():
+    """测试多封邮件复用同一个已登录连接"""
+    factory = FakeFactory()
+    pool = _pool(factory)
+
+    for i in range(3):
+        pool.sendmail("a@example.com", [f"r{i}@example.com"], "msg")
+
+    assert pool.connections_opened == 1
+    assert len(factory.created[0].sent) == 3
+    # 刚归还的连接不做 NOOP 检查
+    assert factory.created[0].noops == 0
+
+
+def test_pool_replaces_connection_failing_noop():
+    """测试空闲连接 NOOP 检查失败时重建连接"""
+    stale = FakeSMTP(noop_code=421)
+    factory = FakeFactory(stale)
+    pool = _pool(factory, noop_after_seconds=0)
+
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+
+    assert stale.noops == 1
+    assert stale.closed
+    assert pool.connections_opened == 2
+    assert factory.created[1].sent == [["r@example.com"]]
+
+
+def test_pool_closes_connection_idle_too_long():
+    """测试空闲超过上限的连接直接关闭，不做 NOOP"""
+    factory = FakeFactory()
+    pool = _pool(factory, max_idle_seconds=0)
+
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+
+    first = factory.created[0]
+    assert first.closed and first.noops == 0
+    assert pool.connections_opened == 2
+
+
+def test_pool_retries_once_after_disconnect():
+    """测试发送时连接被断开，丢弃连接后使用新连接重试一次"""
+    broken = FakeSMTP(fail_sends=1)
+    factory = FakeFactory(broken)
+    pool = _pool(factory)
+
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+
+    assert broken.closed
+    assert factory.created[1].sent == [["r@example.com"]]
+
+    # 连续两次断开则放弃
+    factory.pending = [FakeSMTP(fail_sends=1), FakeSMTP(fail_sends=1)]
+    pool.close_all()
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.sendmail("a@example.com", ["r@example.com"], "msg")
+
+
+def test_pool_does_not_retry_disconnect_after_data():
+    """测试 DATA 阶段断开时服务器可能已接收邮件，丢弃连接但不重发"""
+    broken = FakeSMTP(fail_after_data=True)
+    factory = FakeFactory(broken)
+    pool = _pool(factory)
+
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.sendmail("a@example.com", ["r@example.com"], "msg")
+
+    assert broken.closed
+    assert pool.connections_opened == 1
+
+
+def test_pool_keeps_connection_after_protocol_error():
+    """测试收件人被拒等协议级错误后连接归还到池中继续复用"""
+    factory = FakeFactory(FakeSMTP(refuse=("bad@example.com",)))
+    pool = _pool(factory)
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.sendmail("a@example.com", ["bad@example.com"], "msg")
+    refused = pool.sendmail(
+        "a@example.com", ["bad@example.com", "ok@example.com"], "msg"
+    )
+
+    server = factory.created[0]
+    assert refused == {"bad@example.com": (550, b"No such user")}
+    assert server.resets == 1 and not server.closed
+    assert server.sent == [["ok@example.com"]]
+    assert pool.connections_opened == 1
+
+
+def test_pool_discards_connection_after_socket_error():
+    """测试 socket 错误（如超时）后连接被丢弃"""
+    server = FakeSMTP()
+    factory = FakeFactory(server)
+    pool = _pool(factory)
+
+    with pytest.raises(TimeoutError):
+        with pool.connection():
+            raise TimeoutError("timed out")
+
+    assert server.closed
+    pool.sendmail("a@example.com", ["r@example.com"], "msg")
+    assert pool.connections_opened == 2
+
+
+def test_send_mail_uses_pool_and_close_all():
+    """测试 send_mail 通过连接池发送，close_all 关闭空闲连接"""
+    factory = FakeFactory()
+    pool = _pool(factory)
+    mail = MailContent(
+        subject="主题",
+        body="内容",
+        recipients=[MailAddress(email="user@example.com")],
+    )
+
+    assert send_mail(mail, pool=pool).success
+    assert send_mail(mail, pool=pool).success
+    assert pool.connections_opened == 1
+
+    pool.close_all()
+    assert factory.created[0].closed
+
+
+@pytest.mark.parametrize("hide_recipients", [False, True])
+def test_send_mail_delivers_all_recipients_in_one_transaction(hide_recipients):
+    """测试多个收件人一次发送；密送方式下邮件头不列出收件人"""
+    factory = FakeFactory()
+    pool = _pool(factory)
+    mail = MailContent(
+        subject="主题",
+        body="内容",
+        recipients=[
+            MailAddress(email="a@example.com", name="甲"),
+            MailAddress(email="b@example.com"),
+        ],
+        hide_recipients=hide_recipients,
+    )
+
+    assert send_mail(mail, pool=pool).success
+
+    server = factory.created[0]
+    assert server.sent == [["a@example.com", "b@example.com"]]
+    headers = server.messages[0].split("\n\n", 1)[0]
+    assert ("b@example.com" in headers) is not hide_recipients
@@ -20,9 +20,23 @@ from src.server.auth.router import router as auth_router
 from src.server.card.router import router as card_router
 from src.server.channel.router import router as channel_router
 from src.server.config import global_config
-from src.server.database import get_database_info, init_database
+from src.server.database import (
+    SessionLocal,
+    ensure_database_schema,
+    get_database_info,
+    init_database,
+)
 from src.server.example_module.router import router as example_router
+from src.server.mail_sender.config import mail_sender_config
+from src.server.mail_sender.service import smtp_pool
+from src.server.mail_sender.outbox import (
+    start_outbox_dispatcher,
+    stop_outbox_dispatcher,
+)
+from src.server.order.config import order_config
+from src.server.order.events import order_event_bus
 from src.server.order.router import router as order_router
+from src.server.order.sla import start_order_sla_monitor, stop_order_sla_monitor
 from src.server.proxy.router import router as proxy_router
 from src.server.sale.router import router as sale_router
 
@@ -38,7 +52,10 @@ ASSETS_DIRNAME = "assets"  # Vite 默认的 hash 产物目录
 async def lifespan(_: FastAPI):
     """
     应用生命周期管理：
-    - 启动时检查并按需初始化数据库。
+    - 启动时检查并按需初始化数据库，已存在的数据库补建新增的表；
+    - 启动/停止通知发件箱派发器，关闭时断开 SMTP 连接池中的连接；
+    - 启动/停止处理中订单的超时检查器；
+    - 关闭时结束订单实时推送连接。
     """
     logger.info("应用启动中...")
     db_info = get_database_info()
@@ -48,9 +65,19 @@ async def lifespan(_: FastAPI):
         logger.success("数据库初始化完成。")
     else:
         logger.info(f"数据库已存在，大小: {db_info.database_size} 字节。")
+        ensure_database_schema()
+
+    if mail_sender_config.outbox_dispatcher_enabled:
+        start_outbox_dispatcher(SessionLocal)
+    if order_config.sla_enabled:
+        start_order_sla_monitor(SessionLocal)
 
     logger.success("应用启动完成。")
     yield
+    stop_order_sla_monitor()
+    order_event_bus.close()
+    stop_outbox_dispatcher()
+    smtp_pool.close_all()
     logger.info("应用已关闭。")
 
 
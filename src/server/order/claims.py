@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+处理中订单的领取队列（进程内，按渠道的优先队列）
+
+公开接口：
+- `OrderClaimQueue`：按渠道维护待领取订单的最小堆
+- `order_claim_queue`：应用使用的全局队列
+
+内部方法：
+- `_utcnow()`
+
+说明：
+- 每个渠道两个最小堆：待领取堆按创建时间排列（先到先领），租约堆按租约到期时间排列，
+  租约到期后订单移回待领取堆；
+- 领取时从堆中弹出候选订单，再以条件更新（CAS）写入租约：堆只负责挑选候选，
+  是否领取成功以数据库为准，多个 worker 进程共享数据库时同样不会重复领取；
+- 渠道首次领取时加载一次该渠道的处理中订单，之后只按变更序号（`Order.change_seq`）
+  取得新增与已离开处理中状态的订单，领取时不再扫描订单表；
+- 领取不改变变更序号，其他进程领取的订单在条件更新失败后查询当前状态：
+  仍在租约中的放入租约堆，其余丢弃；
+- 已完成的订单延迟删除：只从成员集合中移除，弹出时跳过。
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from .dao import OrderDAO
+from .schemas import OrderStatus
+
+
+def _utcnow() -> datetime:
+    """当前时间（数据库中使用的无时区 UTC 时间）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class _ChannelQueue:
+    """一个渠道的待领取堆与租约堆"""
+
+    def __init__(self) -> None:
+        self.ready: list[tuple[datetime, int]] = []
+        self.leased: list[tuple[datetime, datetime, int]] = []
+        # 有效的订单：不在集合中的堆条目已失效
+        self.members: set[int] = set()
+        # 已弹出、正在写入租约的订单
+        self.pending: set[int] = set()
+        self.synced_seq: int | None = None
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        self.ready.clear()
+        self.leased.clear()
+        self.members.clear()
+        self.synced_seq = None
+
+    def track(
+        self,
+        order_id: int,
+        created_at: datetime,
+        lease_expires_at: datetime | None,
+        now: datetime,
+    ) -> None:
+        """放入待领取堆，租约未到期时放入租约堆"""
+        self.members.add(order_id)
+        if lease_expires_at is not None and lease_expires_at > now:
+            heapq.heappush(self.leased, (lease_expires_at, created_at, order_id))
+        else:
+            heapq.heappush(self.ready, (created_at, order_id))
+
+    def apply(self, rows: Iterable[Row], now: datetime) -> None:
+        """应用同步数据：(id, status, created_at, claim_expires_at)"""
+        for order_id, status, created_at, lease_expires_at in rows:
+            if status != OrderStatus.PROCESSING:
+                self.members.discard(order_id)
+            elif order_id not in self.members and order_id not in self.pending:
+                self.track(order_id, created_at, lease_expires_at, now)
+
+    def pop(self, count: int, now: datetime) -> list[tuple[datetime, int]]:
+        """弹出最多 count 个候选订单：(created_at, id)，按创建时间排列"""
+        while self.leased and self.leased[0][0] <= now:
+            _, created_at, order_id = heapq.heappop(self.leased)
+            if order_id in self.members:
+                heapq.heappush(self.ready, (created_at, order_id))
+        taken: list[tuple[datetime, int]] = []
+        while self.ready and len(taken) < count:
+            created_at, order_id = heapq.heappop(self.ready)
+            if order_id in self.members:
+                self.members.discard(order_id)
+                self.pending.add(order_id)
+                taken.append((created_at, order_id))
+        return taken
+
+
+class OrderClaimQueue:
+    """处理中订单的领取队列"""
+
+    def __init__(self, clock: Callable[[], datetime] = _utcnow):
+        self.clock = clock
+        self._channels: dict[int, _ChannelQueue] = {}
+        self._lock = threading.Lock()
+
+    def claim(
+        self,
+        db: Session,
+        channel_id: int,
+        user_id: int,
+        count: int,
+        lease_seconds: float,
+    ) -> tuple[list[int], datetime]:
+        """领取渠道内最早的 count 个未被领取的订单
+
+        返回（领取成功的订单ID，租约到期时间）；可领取的订单不足时返回的ID少于 count。
+        """
+        dao = OrderDAO(db)
+        queue = self._channel(channel_id)
+        with queue.lock:
+            self._sync(dao, queue, channel_id)
+
+        now = self.clock()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        claimed: list[int] = []
+        # 每轮失败的候选都会离开待领取堆，堆取空后结束
+        while len(claimed) < count:
+            with queue.lock:
+                taken = queue.pop(count - len(claimed), now)
+            if not taken:
+                break
+            order_ids = [order_id for _, order_id in taken]
+            try:
+                won = set(dao.claim(order_ids, channel_id, user_id, now, expires_at))
+                lost = [order_id for order_id in order_ids if order_id not in won]
+                states = dao.get_claim_states(lost) if lost else []
+            except Exception:
+                with queue.lock:
+                    queue.pending.difference_update(order_ids)
+                    for created_at, order_id in taken:
+                        queue.track(order_id, created_at, None, now)
+                raise
+
+            with queue.lock:
+                queue.pending.difference_update(order_ids)
+                for created_at, order_id in taken:
+                    if order_id in won:
+                        queue.track(order_id, created_at, expires_at, now)
+                        claimed.append(order_id)
+                for order_id, status, created_at, lease_expires_at in states:
+                    # 被其他进程领取：租约到期后再参与领取
+                    if (
+                        status == OrderStatus.PROCESSING
+                        and lease_expires_at is not None
+                        and lease_expires_at > now
+                    ):
+                        queue.track(order_id, created_at, lease_expires_at, now)
+        return claimed, expires_at
+
+    def clear(self) -> None:
+        """清空全部渠道的队列（下次领取时重新加载）"""
+        with self._lock:
+            self._channels.clear()
+
+    def _channel(self, channel_id: int) -> _ChannelQueue:
+        with self._lock:
+            queue = self._channels.get(channel_id)
+            if queue is None:
+                queue = self._channels[channel_id] = _ChannelQueue()
+            return queue
+
+    def _sync(self, dao: OrderDAO, queue: _ChannelQueue, channel_id: int) -> None:
+        """按变更序号同步队列（在渠道锁内调用）
+
+        先读取最大变更序号再查询：查询期间的写入序号更大，下次同步时再次取得。
+        """
+        latest = dao.latest_change_seq()
+        if queue.synced_seq is not None and queue.synced_seq > latest:
+            # 数据库已重置
+            queue.reset()
+        if queue.synced_seq is None:
+            rows = dao.list_claimable(channel_id)
+        elif latest > queue.synced_seq:
+            rows = dao.list_claimable(channel_id, queue.synced_seq)
+        else:
+            return
+        queue.apply(rows, self.clock())
+        queue.synced_seq = latest
+
+
+order_claim_queue = OrderClaimQueue()
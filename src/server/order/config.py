@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+订单配置
+
+文件功能：
+- 提供下单幂等键（Idempotency-Key）的保留时间、内存容量与持久化开关；
+- 提供员工领取订单的默认租约时长；
+- 提供处理中订单的超时时限（SLA）与超时检查器的开关、检查间隔。
+
+公开接口：
+- order_config
+
+内部方法：
+- 无
+
+文件的公开接口的 Pydantic 模型：
+- OrderConfig
+"""
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class OrderConfig(BaseSettings):
+    """订单配置"""
+
+    idempotency_ttl_seconds: float = Field(
+        default=24 * 3600,
+        gt=0,
+        alias="ORDER_IDEMPOTENCY_TTL_SECONDS",
+        description="幂等键的保留时间（秒），期间相同的键重放首次的响应",
+    )
+    idempotency_max_entries: int = Field(
+        default=10000,
+        ge=1,
+        alias="ORDER_IDEMPOTENCY_MAX_ENTRIES",
+        description="内存中保留的幂等键数量上限，超出时淘汰最久未使用的",
+    )
+    idempotency_persist: bool = Field(
+        default=False,
+        alias="ORDER_IDEMPOTENCY_PERSIST",
+        description=(
+            "是否把幂等记录与订单在同一事务中写入数据库；"
+            "多个 worker 进程或需要跨重启重放时开启"
+        ),
+    )
+    claim_lease_seconds: int = Field(
+        default=600,
+        ge=30,
+        le=3600,
+        alias="ORDER_CLAIM_LEASE_SECONDS",
+        description="员工领取订单的默认租约时长（秒），到期未完成的订单可被再次领取",
+    )
+    sla_enabled: bool = Field(
+        default=True,
+        alias="ORDER_SLA_ENABLED",
+        description="是否在应用启动时运行处理中订单的超时检查器",
+    )
+    sla_seconds: float = Field(
+        default=30 * 60,
+        gt=0,
+        alias="ORDER_SLA_SECONDS",
+        description="订单创建后处于处理中超过该时长（秒）视为超时",
+    )
+    sla_tick_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        alias="ORDER_SLA_TICK_SECONDS",
+        description="超时检查器的时间轮刻度（秒），即超时判定的最大延迟",
+    )
+
+
+order_config = OrderConfig()
@@ -4,17 +4,61 @@
 
 公开接口：
 - `OrderDAO`
+- `OrderStatsDAO`：订单统计查询（日汇总表与按小时分组）
+- `OrderIdempotencyDAO`：下单幂等记录
+- `order_change_signal`：订单写入后发出的跨进程变更信号（用于列表 ETag）
 """
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Sequence
 
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    bindparam,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from src.server.change_signal import ChangeSignal, signal_path
 from src.server.dao.dao_base import BaseDAO
-from .models import Order
+from .models import Order, OrderIdempotencyKey, OrderStatsDaily
 from .schemas import OrderStatus
 
+order_change_signal = ChangeSignal(signal_path("orders"))
+
+
+def _next_change_seq():
+    """下一个变更序号（SQL 表达式）
+
+    在 INSERT/UPDATE 语句内求值，写事务串行执行，序号按提交顺序单调递增。
+    """
+    latest = aliased(Order)
+    return (
+        select(func.coalesce(func.max(latest.change_seq), 0) + 1)
+        .correlate(None)
+        .scalar_subquery()
+    )
+
+
+def _lease_allows(user_id: int, now: datetime):
+    """订单未被其他员工领取（SQL 条件）：无租约、租约已到期或由 user_id 持有"""
+    return or_(
+        Order.claimed_by.is_(None),
+        Order.claimed_by == user_id,
+        Order.claim_expires_at.is_(None),
+        Order.claim_expires_at <= now,
+    )
+
 
 class OrderDAO(BaseDAO):
     def __init__(self, db_session: Session):
@@ -38,82 +82,67 @@ class OrderDAO(BaseDAO):
             status=status,
             remarks=remarks,
             card_name=card_name,
+            change_seq=_next_change_seq(),
         )
         self.db_session.add(order)
         self.db_session.commit()
+        order_change_signal.bump()
         self.db_session.refresh(order)
         return order
 
-    def get(self, order_id: int) -> Order | None:
-        """获取订单"""
-        from src.server.activation_code.models import ActivationCode
-
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
-            )
-            .filter(Order.id == order_id)
-            .first()
-        )
-
-    def get_by_activation_code(self, activation_code: str) -> Order | None:
-        """通过卡密获取订单"""
-        from src.server.activation_code.models import ActivationCode
-
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
-            )
-            .filter(Order.activation_code == activation_code)
-            .first()
-        )
-
-    def get_orders_by_user_id(self, user_id: int) -> list[Order]:
-        """获取指定用户的所有订单"""
-        from src.server.activation_code.models import ActivationCode
-
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
-            )
-            .filter(Order.user_id == user_id)
-            .order_by(Order.created_at.desc())
-            .all()
-        )
+    def create_with_code_claim(
+        self,
+        code_id: int,
+        activation_code: str,
+        channel_id: int,
+        remarks: str | None = None,
+        card_name: str | None = None,
+        before_commit: Callable[[Order], None] | None = None,
+    ) -> Order | None:
+        """在同一事务内占用卡密并创建处理中订单
 
-    def list_pending(self) -> list[Order]:
-        """获取所有待处理订单"""
-        from src.server.activation_code.models import ActivationCode
+        卡密通过条件更新从 available 切换为 consuming（CAS），
+        返回 None 表示卡密已被并发请求占用，事务已回滚。
+        before_commit 在订单写入（已分配ID）后、提交前调用，用于写入同一事务内的关联记录。
+        返回的订单已从会话分离，字段在提交前已写入，读取时不会再次查询。
+        """
+        from src.server.activation_code.models import ActivationCode, CardCodeStatus
 
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
+        result = self.db_session.execute(
+            update(ActivationCode)
+            .where(
+                ActivationCode.id == code_id,
+                ActivationCode.status == CardCodeStatus.AVAILABLE,
             )
-            .filter(Order.status == OrderStatus.PENDING)
-            .order_by(Order.created_at.asc())
-            .all()
+            .values(status=CardCodeStatus.CONSUMING)
+            .execution_options(synchronize_session=False)
         )
+        if result.rowcount != 1:
+            self.db_session.rollback()
+            return None
 
-    def list_processing(self) -> list[Order]:
-        """获取所有处理中订单"""
-        from src.server.activation_code.models import ActivationCode
-
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
-            )
-            .filter(Order.status == OrderStatus.PROCESSING)
-            .order_by(Order.created_at.asc())
-            .all()
+        # 对于匿名用户，我们使用一个固定的用户ID，比如0
+        order = Order(
+            activation_code=activation_code,
+            user_id=0,
+            channel_id=channel_id,
+            status=OrderStatus.PROCESSING,
+            remarks=remarks,
+            card_name=card_name,
+            activation_code_id=code_id,
+            change_seq=_next_change_seq(),
         )
+        self.db_session.add(order)
+        self.db_session.flush()
+        if before_commit is not None:
+            before_commit(order)
+        self.db_session.expunge(order)
+        self.db_session.commit()
+        order_change_signal.bump()
+        return order
 
-    def list_processing_by_channel(self, channel_id: int) -> list[Order]:
-        """获取指定渠道的处理中订单"""
+    def get(self, order_id: int) -> Order | None:
+        """获取订单"""
         from src.server.activation_code.models import ActivationCode
 
         return (
@@ -121,30 +150,69 @@ class OrderDAO(BaseDAO):
             .options(
                 joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
             )
-            .filter(
-                Order.status == OrderStatus.PROCESSING, Order.channel_id == channel_id
-            )
-            .order_by(Order.created_at.asc())
-            .all()
+            .filter(Order.id == order_id)
+            .first()
         )
 
-    def list_all(
+    def list_rows(
         self,
         status_filter: OrderStatus | None = None,
-        limit: int = 100,
+        channel_id: int | None = None,
+        user_id: int | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
         offset: int = 0,
-    ) -> list[Order]:
-        """获取所有订单"""
+        changed_since: int | None = None,
+        order_ids: list[int] | None = None,
+    ) -> list[Row]:
+        """按条件查询订单的列元组（附带卡密所属充值卡的ID、名称与价格）
+
+        只选取列表响应需要的列，不构造 ORM 对象，供订单列表的快速序列化使用。
+        列顺序见 `serializers.ORDER_ROW_COLUMNS`。
+        指定 changed_since 时只返回变更序号更大的订单，按变更顺序排列。
+        """
         from src.server.activation_code.models import ActivationCode
+        from src.server.card.models import Card
 
-        query = self.db_session.query(Order).options(
-            joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
+        query = (
+            self.db_session.query(
+                Order.id,
+                Order.activation_code,
+                Order.status,
+                Order.created_at,
+                Order.completed_at,
+                Order.remarks,
+                Order.channel_id,
+                Order.card_name,
+                Card.id,
+                Card.name,
+                Card.price,
+            )
+            .outerjoin(ActivationCode, ActivationCode.id == Order.activation_code_id)
+            .outerjoin(Card, Card.id == ActivationCode.card_id)
         )
 
         if status_filter:
             query = query.filter(Order.status == status_filter)
+        if channel_id is not None:
+            query = query.filter(Order.channel_id == channel_id)
+        if user_id is not None:
+            query = query.filter(Order.user_id == user_id)
+        if order_ids is not None:
+            query = query.filter(Order.id.in_(order_ids))
 
-        return query.order_by(Order.created_at.desc()).limit(limit).offset(offset).all()
+        order_by: ColumnElement[Any]
+        if changed_since is not None:
+            query = query.filter(Order.change_seq > changed_since)
+            order_by = Order.change_seq.asc()
+        elif newest_first:
+            order_by = Order.created_at.desc()
+        else:
+            order_by = Order.created_at.asc()
+        query = query.order_by(order_by)
+        if limit is not None:
+            query = query.limit(limit).offset(offset)
+        return query.all()
 
     def update_status(
         self, order: Order, status: OrderStatus, remarks: str | None = None
@@ -155,28 +223,353 @@ class OrderDAO(BaseDAO):
             order.completed_at = datetime.now(timezone.utc)
         if remarks is not None:
             order.remarks = remarks
+        order.change_seq = _next_change_seq()
 
         self.db_session.commit()
+        order_change_signal.bump()
         self.db_session.refresh(order)
         return order
 
-    def count_by_status(self, status: OrderStatus) -> int:
-        """统计指定状态的订单数量"""
-        return self.db_session.query(Order).filter(Order.status == status).count()
+    def get_completion_candidates(self, order_ids: list[int]) -> Sequence[Row]:
+        """批量完成前的校验数据：
+        (id, channel_id, status, claimed_by, claim_expires_at, code_id, code_status)
 
-    def get_recent_orders(self, days: int = 7) -> list[Order]:
-        """获取最近几天的订单"""
-        from datetime import timedelta
+        卡密不存在时 code_id、code_status 为 None。
+        """
         from src.server.activation_code.models import ActivationCode
 
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        return self.db_session.execute(
+            select(
+                Order.id,
+                Order.channel_id,
+                Order.status,
+                Order.claimed_by,
+                Order.claim_expires_at,
+                ActivationCode.id,
+                ActivationCode.status,
+            )
+            .outerjoin(ActivationCode, ActivationCode.id == Order.activation_code_id)
+            .where(Order.id.in_(order_ids))
+        ).all()
 
-        return (
-            self.db_session.query(Order)
-            .options(
-                joinedload(Order.activation_code_obj).joinedload(ActivationCode.card)
+    def complete_many(
+        self,
+        orders: dict[int, int],
+        remarks: dict[int, str] | None = None,
+        user_id: int | None = None,
+    ) -> tuple[list[int], list[int]]:
+        """在同一事务内批量完成订单，返回 (实际完成的订单ID, 未能完成的订单ID)
+
+        orders 为 订单ID -> 卡密ID。卡密通过条件更新从 consuming 切换为 consumed，
+        订单通过条件更新切换为 completed（已完成的跳过），两条语句均为集合操作；
+        只有卡密切换成功的订单会被完成。remarks 为需要更新备注的订单。
+        指定 user_id 时跳过被其他员工领取且租约未到期的订单（卡密也不切换）。
+        未能完成的订单（校验之后状态发生变化）按 orders 的顺序返回，由调用方重新判定原因。
+        """
+        from src.server.activation_code.models import ActivationCode, CardCodeStatus
+
+        now = datetime.now(timezone.utc)
+        code_conditions = [
+            ActivationCode.id.in_(set(orders.values())),
+            ActivationCode.status == CardCodeStatus.CONSUMING,
+        ]
+        order_conditions = [Order.status != OrderStatus.COMPLETED]
+        if user_id is not None:
+            lease_allows = _lease_allows(user_id, now.replace(tzinfo=None))
+            code_conditions.append(
+                ActivationCode.id.in_(
+                    select(Order.activation_code_id).where(
+                        Order.id.in_(list(orders)), lease_allows
+                    )
+                )
+            )
+            order_conditions.append(lease_allows)
+        claimed = set(
+            self.db_session.scalars(
+                update(ActivationCode)
+                .where(*code_conditions)
+                .values(status=CardCodeStatus.CONSUMED, used_at=now)
+                .returning(ActivationCode.id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+        eligible = [
+            order_id for order_id, code_id in orders.items() if code_id in claimed
+        ]
+        completed: list[int] = []
+        if eligible:
+            completed = list(
+                self.db_session.scalars(
+                    update(Order)
+                    .where(Order.id.in_(eligible), *order_conditions)
+                    .values(
+                        status=OrderStatus.COMPLETED,
+                        completed_at=now,
+                        change_seq=_next_change_seq(),
+                    )
+                    .returning(Order.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+        remark_params = [
+            {"order_id": order_id, "new_remarks": remarks[order_id]}
+            for order_id in completed
+            if remarks and order_id in remarks
+        ]
+        if remark_params:
+            table = Order.__table__
+            self.db_session.execute(
+                update(table)
+                .where(table.c.id == bindparam("order_id"))
+                .values(remarks=bindparam("new_remarks")),
+                remark_params,
+            )
+
+        self.db_session.commit()
+        if completed:
+            order_change_signal.bump()
+        done = set(completed)
+        return completed, [order_id for order_id in orders if order_id not in done]
+
+    def list_claimable(
+        self, channel_id: int, changed_since: int | None = None
+    ) -> Sequence[Row]:
+        """领取队列的同步数据：(id, status, created_at, claim_expires_at)
+
+        未指定 changed_since 时返回渠道内全部处理中订单（队列首次加载），
+        否则返回渠道内变更序号更大的订单（含已离开处理中状态的订单）。
+        """
+        query = select(
+            Order.id, Order.status, Order.created_at, Order.claim_expires_at
+        ).where(Order.channel_id == channel_id)
+        if changed_since is None:
+            query = query.where(Order.status == OrderStatus.PROCESSING)
+        else:
+            query = query.where(Order.change_seq > changed_since)
+        return self.db_session.execute(query).all()
+
+    def claim(
+        self,
+        order_ids: list[int],
+        channel_id: int,
+        user_id: int,
+        now: datetime,
+        expires_at: datetime,
+    ) -> list[int]:
+        """领取订单，返回领取成功的订单ID
+
+        条件更新（CAS）：只有处理中、属于该渠道且未被领取（或租约已到期）的订单会被领取，
+        并发领取同一订单时只有一方成功。领取不改变变更序号。
+        """
+        claimed = list(
+            self.db_session.scalars(
+                update(Order)
+                .where(
+                    Order.id.in_(order_ids),
+                    Order.channel_id == channel_id,
+                    Order.status == OrderStatus.PROCESSING,
+                    or_(
+                        Order.claim_expires_at.is_(None),
+                        Order.claim_expires_at <= now,
+                    ),
+                )
+                .values(claimed_by=user_id, claim_expires_at=expires_at)
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+        self.db_session.commit()
+        return claimed
+
+    def get_claim_states(self, order_ids: list[int]) -> Sequence[Row]:
+        """领取失败的订单的当前状态：(id, status, created_at, claim_expires_at)"""
+        return self.db_session.execute(
+            select(
+                Order.id, Order.status, Order.created_at, Order.claim_expires_at
+            ).where(Order.id.in_(order_ids))
+        ).all()
+
+    def list_sla_rows(self, changed_since: int | None = None) -> Sequence[Row]:
+        """超时检查的数据：(id, status, created_at)
+
+        未指定 changed_since 时返回全部处理中订单（检查器启动时加载），
+        否则返回变更序号更大的订单（含已离开处理中状态的订单）。
+        """
+        query = select(Order.id, Order.status, Order.created_at)
+        if changed_since is None:
+            query = query.where(Order.status == OrderStatus.PROCESSING)
+        else:
+            query = query.where(Order.change_seq > changed_since)
+        return self.db_session.execute(query).all()
+
+    def search_ids(
+        self,
+        match: str,
+        contains: list[str] | None = None,
+        channel_id: int | None = None,
+        limit: int = 50,
+        rank_window: int = 1000,
+    ) -> list[int]:
+        """全文检索订单ID，按相关度排序（卡密命中权重最高，其次充值卡名称、备注）
+
+        match 为 FTS5 查询表达式；contains 为不足 3 个字符、无法走 trigram 索引的词，
+        在索引命中的结果上逐条过滤。
+        """
+        conditions = ["orders_fts MATCH :match"]
+        params: dict = {"match": match, "limit": limit}
+        if channel_id is not None:
+            conditions.append("orders.channel_id = :channel_id")
+            params["channel_id"] = channel_id
+        for i, term in enumerate(contains or []):
+            conditions.append(
+                f"instr(lower(orders.activation_code || ' ' || coalesce(orders.remarks, '')"
+                f" || ' ' || coalesce(orders.card_name, '')), lower(:term{i})) > 0"
+            )
+            params[f"term{i}"] = term
+        # 只对最新的 rank_window 条命中计算相关度：常见词（如充值卡名称）命中大量订单时，
+        # 对全部命中排序的代价与命中数成正比，按 rowid 倒序取窗口可以提前结束
+        params["rank_window"] = max(limit, rank_window)
+        statement = text(
+            "SELECT id FROM ("
+            " SELECT orders.id AS id, bm25(orders_fts, 10.0, 1.0, 2.0) AS score"
+            " FROM orders_fts JOIN orders ON orders.id = orders_fts.rowid"
+            f" WHERE {' AND '.join(conditions)}"
+            " ORDER BY orders_fts.rowid DESC LIMIT :rank_window"
+            ") ORDER BY score, id DESC LIMIT :limit"
+        )
+        return list(self.db_session.scalars(statement, params))
+
+    def latest_change_seq(self) -> int:
+        """当前最大的变更序号（走 change_seq 索引）"""
+        return self.db_session.scalar(select(func.max(Order.change_seq))) or 0
+
+
+class OrderStatsDAO(BaseDAO):
+    """订单统计查询
+
+    按状态与按日的统计读取日汇总表 `order_stats_daily`（由触发器维护），
+    按小时的统计直接对 `orders` 分组，走 (created_at, channel_id, status) 覆盖索引。
+    """
+
+    def status_totals(self, channel_id: int | None = None) -> Sequence[Row]:
+        """各状态的订单总数：(status, count)"""
+        query = select(
+            OrderStatsDaily.status, func.sum(OrderStatsDaily.count)
+        ).group_by(OrderStatsDaily.status)
+        if channel_id is not None:
+            query = query.where(OrderStatsDaily.channel_id == channel_id)
+        return self.db_session.execute(query).all()
+
+    def daily(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        channel_id: int | None = None,
+    ) -> Sequence[Row]:
+        """按日的统计：(day, channel_id, status, count)，日期区间左闭右开"""
+        query = select(
+            OrderStatsDaily.day,
+            OrderStatsDaily.channel_id,
+            OrderStatsDaily.status,
+            OrderStatsDaily.count,
+        ).where(OrderStatsDaily.count > 0)
+        if start is not None:
+            query = query.where(OrderStatsDaily.day >= start)
+        if end is not None:
+            query = query.where(OrderStatsDaily.day < end)
+        if channel_id is not None:
+            query = query.where(OrderStatsDaily.channel_id == channel_id)
+        query = query.order_by(OrderStatsDaily.day, OrderStatsDaily.channel_id)
+        return self.db_session.execute(query).all()
+
+    def hourly(
+        self, start: datetime, end: datetime, channel_id: int | None = None
+    ) -> Sequence[Row]:
+        """按小时的统计：(hour, channel_id, status, count)，时间区间左闭右开"""
+        hour = func.strftime("%Y-%m-%dT%H:00:00", Order.created_at).label("hour")
+        query = (
+            select(hour, Order.channel_id, Order.status, func.count())
+            .where(Order.created_at >= start, Order.created_at < end)
+            .group_by(hour, Order.channel_id, Order.status)
+            .order_by(hour, Order.channel_id)
+        )
+        if channel_id is not None:
+            query = query.where(Order.channel_id == channel_id)
+        return self.db_session.execute(query).all()
+
+    def rebuild_daily(self) -> int:
+        """从订单表重建日汇总表（回填或修复），返回写入的行数"""
+        day = func.date(Order.created_at)
+        self.db_session.execute(delete(OrderStatsDaily))
+        result = self.db_session.execute(
+            insert(OrderStatsDaily).from_select(
+                ["day", "channel_id", "status", "count"],
+                select(day, Order.channel_id, Order.status, func.count()).group_by(
+                    day, Order.channel_id, Order.status
+                ),
             )
-            .filter(Order.created_at >= cutoff_date)
-            .order_by(Order.created_at.desc())
-            .all()
         )
+        self.db_session.commit()
+        return result.rowcount
+
+    def backfill_daily_if_empty(self) -> bool:
+        """日汇总表为空而订单表有数据时重建（升级到带汇总表的版本后首次启动）"""
+        has_rollup = self.db_session.scalar(select(OrderStatsDaily.day).limit(1))
+        has_orders = self.db_session.scalar(select(Order.id).limit(1))
+        if has_rollup is not None or has_orders is None:
+            return False
+        self.rebuild_daily()
+        return True
+
+
+class OrderIdempotencyDAO(BaseDAO):
+    """下单幂等记录"""
+
+    def get(self, key: str, now: datetime) -> OrderIdempotencyKey | None:
+        """获取未过期的幂等记录"""
+        return self.db_session.scalar(
+            select(OrderIdempotencyKey).where(
+                OrderIdempotencyKey.key == key, OrderIdempotencyKey.expires_at > now
+            )
+        )
+
+    def add(
+        self,
+        key: str,
+        fingerprint: str,
+        status_code: int,
+        body: str,
+        expires_at: datetime,
+        now: datetime,
+    ) -> None:
+        """写入幂等记录（不提交，随调用方的事务提交）
+
+        键已存在且未过期时保留原记录，已过期时覆盖。
+        """
+        statement = sqlite_insert(OrderIdempotencyKey).values(
+            key=key,
+            fingerprint=fingerprint,
+            status_code=status_code,
+            body=body,
+            expires_at=expires_at,
+        )
+        self.db_session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "fingerprint": statement.excluded.fingerprint,
+                    "status_code": statement.excluded.status_code,
+                    "body": statement.excluded.body,
+                    "expires_at": statement.excluded.expires_at,
+                },
+                where=OrderIdempotencyKey.expires_at <= now,
+            )
+        )
+
+    def purge_expired(self, now: datetime) -> int:
+        """删除过期的幂等记录"""
+        result = self.db_session.execute(
+            delete(OrderIdempotencyKey).where(OrderIdempotencyKey.expires_at <= now)
+        )
+        self.db_session.commit()
+        return result.rowcount
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+订单事件总线（进程内发布/订阅）
+
+公开接口：
+- `OrderEventKind`：事件类型
+- `OrderEvent`：一次订单事件
+- `OrderEventSubscription`：订阅者的事件队列
+- `OrderEventBus`：发布/订阅总线
+- `order_event_bus`：应用使用的全局总线
+- `publish_order_event(kind, order)`：发布订单事件
+
+内部方法：
+- 无
+
+说明：
+- 订阅在事件循环中创建，发布可以在任意线程中进行（服务层运行在线程池中），
+  通过 `loop.call_soon_threadsafe` 把事件投递到订阅者所在的事件循环；
+- 订阅者处理不过来（队列已满）时不阻塞发布方，丢弃事件并标记 `overflowed`，
+  由订阅方通知客户端重新拉取列表；
+- 只在当前进程内传递，多个 worker 进程时其他进程的写入由订单变更信号补充。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+from loguru import logger
+from pydantic import BaseModel
+
+
+class OrderEventKind(str, Enum):
+    CREATED = "order-created"
+    COMPLETED = "order-completed"
+    OVERDUE = "order-overdue"
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    kind: OrderEventKind
+    channel_id: int
+    order: dict[str, Any]
+
+
+class OrderEventSubscription:
+    """一个订阅者：只接收指定渠道（None 表示全部渠道）的事件"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        channel_id: int | None,
+        max_pending: int,
+    ):
+        self.loop = loop
+        self.channel_id = channel_id
+        self.queue: asyncio.Queue[OrderEvent | None] = asyncio.Queue(max_pending)
+        self.overflowed = False
+        self.closed = False
+
+    def matches(self, event: OrderEvent) -> bool:
+        return self.channel_id is None or self.channel_id == event.channel_id
+
+    def _put(self, event: OrderEvent | None) -> None:
+        """在订阅者的事件循环中执行"""
+        if event is None:
+            self.closed = True
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            if event is None:
+                # 关闭信号必须送达：丢掉一个未读事件腾出位置
+                self.queue.get_nowait()
+                self.queue.put_nowait(None)
+
+    async def get(self, timeout: float | None = None) -> OrderEvent | None:
+        """等待下一个事件；超时抛出 `asyncio.TimeoutError`，总线关闭时返回 None"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class OrderEventBus:
+    """进程内订单事件总线"""
+
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self._subscribers: set[OrderEventSubscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, channel_id: int | None = None) -> OrderEventSubscription:
+        """订阅事件（需在事件循环中调用）"""
+        subscription = OrderEventSubscription(
+            asyncio.get_running_loop(), channel_id, self.max_pending
+        )
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: OrderEventSubscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: OrderEvent) -> int:
+        """发布事件，返回投递到的订阅者数量（可在任意线程调用）"""
+        with self._lock:
+            targets = [s for s in self._subscribers if s.matches(event)]
+        delivered = 0
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+                delivered += 1
+            except RuntimeError:
+                # 订阅者的事件循环已关闭
+                self.unsubscribe(subscription)
+        return delivered
+
+    def close(self) -> None:
+        """通知所有订阅者结束（应用关闭时调用）"""
+        with self._lock:
+            targets = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, None)
+            except RuntimeError:
+                pass
+
+
+order_event_bus = OrderEventBus()
+
+
+def publish_order_event(kind: OrderEventKind, order: BaseModel) -> None:
+    """发布订单事件（订单已提交后调用；失败只记录日志，不影响业务）"""
+    try:
+        payload = order.model_dump(mode="json")
+        order_event_bus.publish(OrderEvent(kind, payload["channel_id"], payload))
+    except Exception as e:
+        logger.warning(f"发布订单事件失败：{kind.value} {e}")
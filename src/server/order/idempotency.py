@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+下单幂等键（Idempotency-Key）存储
+
+公开接口：
+- `IdempotencyKeyReused`：同一个键用于了不同的请求
+- `IdempotencyKeyInFlight`：同一个键的请求正在处理
+- `StoredResponse`：已保存的响应
+- `OrderIdempotencyStore`：幂等键存储（内存 LRU + 可选数据表）
+- `order_idempotency_store`：应用使用的全局存储
+
+内部方法：
+- `_utc(timestamp)`
+
+说明：
+- 只保存成功的响应：失败的下单不改变卡密状态，重试时重新执行即可；
+- 请求指纹（卡密、渠道、备注、名称的摘要）与键一起保存，同一个键用于不同请求时拒绝；
+- 内存中按最久未使用淘汰，超过保留时间的记录视为不存在；
+- 开启持久化时记录与订单在同一事务中写入 `order_idempotency_keys`，
+  下单成功但响应丢失（包括进程随后崩溃）时重试也能重放；过期记录定期清理。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import orjson
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from .config import order_config
+from .dao import OrderIdempotencyDAO
+
+PURGE_INTERVAL_SECONDS = 3600.0
+
+
+class IdempotencyKeyReused(Exception):
+    """同一个幂等键用于了不同的请求"""
+
+
+class IdempotencyKeyInFlight(Exception):
+    """同一个幂等键的请求正在处理"""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: Any
+    expires_at: float
+
+
+def _utc(timestamp: float) -> datetime:
+    """时间戳转换为数据库中使用的无时区 UTC 时间"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class OrderIdempotencyStore:
+    """下单幂等键存储"""
+
+    def __init__(
+        self,
+        ttl_seconds: float | None = None,
+        max_entries: int | None = None,
+        persist: bool | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        config = order_config
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else config.idempotency_ttl_seconds
+        )
+        self.max_entries = (
+            max_entries if max_entries is not None else config.idempotency_max_entries
+        )
+        self.persist = persist if persist is not None else config.idempotency_persist
+        self.clock = clock
+        self._entries: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._in_flight: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def reserve(self, db: Session, key: str, fingerprint: str) -> StoredResponse | None:
+        """查询幂等键
+
+        返回已保存的响应（调用方直接重放）；返回 None 表示首次请求，键已被占用，
+        调用方执行后须调用 `complete` 或 `release`。
+        """
+        now = self.clock()
+        with self._lock:
+            stored = self._lookup(key, now)
+        if stored is None and self.persist:
+            row = OrderIdempotencyDAO(db).get(key, _utc(now))
+            if row is not None:
+                stored = StoredResponse(
+                    row.fingerprint,
+                    row.status_code,
+                    orjson.loads(row.body),
+                    row.expires_at.replace(tzinfo=timezone.utc).timestamp(),
+                )
+                with self._lock:
+                    self._remember(key, stored)
+
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                raise IdempotencyKeyReused(key)
+            return stored
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                if in_flight != fingerprint:
+                    raise IdempotencyKeyReused(key)
+                raise IdempotencyKeyInFlight(key)
+            self._in_flight[key] = fingerprint
+        return None
+
+    def save(
+        self, db: Session, key: str, fingerprint: str, status_code: int, body: Any
+    ) -> None:
+        """开启持久化时写入幂等记录（在下单事务提交前调用，随订单一起提交）"""
+        if not self.persist:
+            return
+        now = self.clock()
+        OrderIdempotencyDAO(db).add(
+            key,
+            fingerprint,
+            status_code,
+            orjson.dumps(body).decode(),
+            _utc(now + self.ttl_seconds),
+            _utc(now),
+        )
+
+    def complete(
+        self,
+        db: Session,
+        key: str,
+        fingerprint: str,
+        status_code: int,
+        body: Any,
+    ) -> None:
+        """请求成功：在内存中保存响应并释放占用"""
+        now = self.clock()
+        stored = StoredResponse(fingerprint, status_code, body, now + self.ttl_seconds)
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._remember(key, stored)
+            purge = self.persist and now - self._last_purge >= PURGE_INTERVAL_SECONDS
+            if purge:
+                self._last_purge = now
+        if purge:
+            try:
+                OrderIdempotencyDAO(db).purge_expired(_utc(now))
+            except Exception as e:
+                logger.warning(f"清理过期幂等记录失败：{e}")
+
+    def release(self, key: str) -> None:
+        """请求失败：释放占用，不保存响应"""
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _lookup(self, key: str, now: float) -> StoredResponse | None:
+        stored = self._entries.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return stored
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+order_idempotency_store = OrderIdempotencyStore()
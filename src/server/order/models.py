@@ -4,12 +4,40 @@
 
 公开接口：
 - `Order`
+- `OrderIdempotencyKey`：下单幂等记录
+- `OrderStatsDaily`：按（日期, 渠道, 状态）汇总的订单数（日汇总表）
+- `install_order_stats_triggers(connection)`：安装维护日汇总表的触发器
+- `install_order_search_index(connection)`：安装订单全文索引（FTS5）及其同步触发器
+- `install_order_code_link_trigger(connection)`：安装删除卡密时解除订单关联的触发器
+
+说明：
+- 日汇总表由 `orders` 表上的触发器在同一事务内增量维护（插入 +1，状态/渠道/创建时间
+  变化时旧桶 -1、新桶 +1，删除 -1），任何写入路径都不会遗漏；
+- 日期按 UTC 的 `date(created_at)` 划分；
+- 新建 `orders` 表时自动安装触发器，已有数据库由 `ensure_database_schema` 安装并回填；
+- 订单通过整数外键 `activation_code_id` 关联卡密，插入时未指定则按卡密字符串补全；
+  删除卡密时由触发器将关联置空（SQLite 未开启外键约束，已有数据库的卡密表
+  也没有 AUTOINCREMENT，被删除卡密的ID可能分配给新卡密）；
+- 全文索引 `orders_fts` 覆盖卡密、备注与充值卡名称，同样由触发器同步；
+- 领取租约（`claimed_by`、`claim_expires_at`）不改变变更序号，不影响列表的增量同步。
 """
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from sqlalchemy import Integer, String, DateTime, Text, ForeignKey
+from datetime import date, datetime, timezone
+from sqlalchemy import (
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.server.database import Base
@@ -24,14 +52,27 @@ if TYPE_CHECKING:
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # 按状态列出订单（处理中/待处理列表）
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # 按时间范围统计：覆盖索引，分组统计不需要回表
+        Index(
+            "ix_orders_created_at_channel_status", "created_at", "channel_id", "status"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    activation_code: Mapped[str] = mapped_column(String(36), nullable=False)
+    # 卡密字符串（与 ActivationCode.code 一致），接口展示与按卡密查询使用
+    activation_code: Mapped[str] = mapped_column(Text, nullable=False)
+    # 卡密ID：关联查询使用整数外键；卡密不存在时为空
+    activation_code_id: Mapped[int | None] = mapped_column(
+        ForeignKey("activation_codes.id"), nullable=True, index=True
+    )
     status: Mapped[str] = mapped_column(
         String(20), default=OrderStatus.PENDING, nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.now(timezone.utc), nullable=False
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     remarks: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -45,11 +86,173 @@ class Order(Base):
     # 充值卡名称
     card_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
+    # 变更序号：每次创建或更新时取全表最大值 + 1，供处理中列表的增量同步
+    change_seq: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0"), index=True
+    )
+
+    # 领取：员工领取处理中订单后在租约到期前独占，到期未完成的订单可被再次领取
+    claimed_by: Mapped[int | None] = mapped_column(
+        ForeignKey("users.id"), nullable=True
+    )
+    claim_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
     # 与 ActivationCode 的关联关系
     activation_code_obj: Mapped["ActivationCode"] = relationship(
         "ActivationCode",
-        primaryjoin="Order.activation_code == ActivationCode.code",
-        foreign_keys=[activation_code],
+        foreign_keys=[activation_code_id],
         uselist=False,
         lazy="select",  # 默认是 select，可以显式指定
     )
+
+
+@event.listens_for(Order, "before_insert")
+def _fill_activation_code_id(mapper, connection: Connection, target: Order) -> None:
+    """未指定卡密ID时按卡密字符串补全（子查询内联在 INSERT 中，不额外查询）"""
+    if target.activation_code_id is None and target.activation_code:
+        from src.server.activation_code.models import ActivationCode
+
+        target.activation_code_id = (
+            select(ActivationCode.id)
+            .where(ActivationCode.code == target.activation_code)
+            .scalar_subquery()
+        )
+
+
+class OrderIdempotencyKey(Base):
+    """下单幂等记录（`ORDER_IDEMPOTENCY_PERSIST` 开启时写入）"""
+
+    __tablename__ = "order_idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class OrderStatsDaily(Base):
+    __tablename__ = "order_stats_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    channel_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+_STATS_INCREMENT = """
+    INSERT INTO order_stats_daily (day, channel_id, status, count)
+    VALUES (date(NEW.created_at), NEW.channel_id, NEW.status, 1)
+    ON CONFLICT (day, channel_id, status) DO UPDATE SET count = count + 1;
+"""
+
+_STATS_DECREMENT = """
+    UPDATE order_stats_daily SET count = count - 1
+    WHERE day = date(OLD.created_at)
+      AND channel_id = OLD.channel_id
+      AND status = OLD.status;
+"""
+
+ORDER_STATS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_stats_insert
+    AFTER INSERT ON orders
+    BEGIN {_STATS_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_stats_update
+    AFTER UPDATE OF status, channel_id, created_at ON orders
+    WHEN OLD.status IS NOT NEW.status
+      OR OLD.channel_id IS NOT NEW.channel_id
+      OR date(OLD.created_at) IS NOT date(NEW.created_at)
+    BEGIN {_STATS_DECREMENT} {_STATS_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_stats_delete
+    AFTER DELETE ON orders
+    BEGIN {_STATS_DECREMENT} END
+    """,
+)
+
+
+def install_order_stats_triggers(connection: Connection) -> None:
+    """安装维护日汇总表的触发器（已存在时跳过）"""
+    for statement in ORDER_STATS_TRIGGERS:
+        connection.execute(text(statement))
+
+
+# 全文检索：外部内容表（不重复存储正文），trigram 分词支持任意子串匹配
+ORDER_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS orders_fts USING fts5(
+        activation_code, remarks, card_name,
+        content='orders', content_rowid='id', tokenize='trigram'
+    )
+"""
+
+_SEARCH_INSERT = """
+    INSERT INTO orders_fts (rowid, activation_code, remarks, card_name)
+    VALUES (NEW.id, NEW.activation_code, NEW.remarks, NEW.card_name);
+"""
+
+_SEARCH_DELETE = """
+    INSERT INTO orders_fts (orders_fts, rowid, activation_code, remarks, card_name)
+    VALUES ('delete', OLD.id, OLD.activation_code, OLD.remarks, OLD.card_name);
+"""
+
+ORDER_SEARCH_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_search_insert
+    AFTER INSERT ON orders
+    BEGIN {_SEARCH_INSERT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_search_update
+    AFTER UPDATE OF activation_code, remarks, card_name ON orders
+    BEGIN {_SEARCH_DELETE} {_SEARCH_INSERT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_orders_search_delete
+    AFTER DELETE ON orders
+    BEGIN {_SEARCH_DELETE} END
+    """,
+)
+
+
+def install_order_search_index(connection: Connection) -> bool:
+    """安装订单全文索引及其同步触发器，返回索引是否为新建
+
+    为已有订单的数据库新建索引时一并从订单表重建索引内容。
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'orders_fts'")
+    ).first()
+    connection.execute(text(ORDER_SEARCH_TABLE))
+    for statement in ORDER_SEARCH_TRIGGERS:
+        connection.execute(text(statement))
+    if exists:
+        return False
+    connection.execute(text("INSERT INTO orders_fts (orders_fts) VALUES ('rebuild')"))
+    return True
+
+
+ORDER_CODE_LINK_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_activation_codes_unlink_orders
+    AFTER DELETE ON activation_codes
+    BEGIN
+        UPDATE orders SET activation_code_id = NULL
+        WHERE activation_code_id = OLD.id;
+    END
+"""
+
+
+def install_order_code_link_trigger(connection: Connection) -> None:
+    """安装删除卡密时解除订单关联的触发器（已存在时跳过）"""
+    connection.execute(text(ORDER_CODE_LINK_TRIGGER))
+
+
+@event.listens_for(Order.__table__, "after_create")
+def _install_triggers_after_create(target, connection: Connection, **kw) -> None:
+    install_order_stats_triggers(connection)
+    install_order_search_index(connection)
+    # 卡密表先于订单表创建（外键依赖）
+    install_order_code_link_trigger(connection)
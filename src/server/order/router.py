@@ -7,14 +7,22 @@
 - GET /api/orders
 - GET /api/orders/{order_id}
 - PUT /api/orders/{order_id}/complete
+- PUT /api/orders/complete
+- POST /api/orders/claim
 - GET /api/orders/stats
+- GET /api/orders/stats/series
+- GET /api/orders/sla
 - GET /api/orders/me
+- GET /api/orders/stream
+- GET /api/orders/search
 """
 
 from __future__ import annotations
-from typing import List
 
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from src.server.database import get_db
@@ -24,13 +32,33 @@ from src.server.utils import (
     get_current_admin,
 )
 from src.server.auth.models import User
-from .schemas import OrderOut, OrderUpdate, OrderCreate
+from .schemas import (
+    NormalizedOrdersResponse,
+    OrderBulkComplete,
+    OrderBulkCompleteResponse,
+    OrderClaimRequest,
+    OrderClaimResponse,
+    OrderCreate,
+    OrderOut,
+    OrderSlaStats,
+    OrderStats,
+    OrderStatsGranularity,
+    OrderStatsSeries,
+    OrderUpdate,
+)
 from . import service
+from .events import order_event_bus
 from src.server.dao.dao_base import run_in_thread
+from src.server.etag import etag_matches, not_modified
+from src.server.responses import FastJSONResponse
 from src.server.order.schemas import OrderStatus
+from src.server.schemas import ResponseShape
 
 router = APIRouter(prefix="/api/orders", tags=["订单管理"])
 
+ORDER_CURSOR_HEADER = "X-Order-Cursor"
+ORDER_SYNC_HEADER = "X-Order-Sync"
+
 
 @router.post(
     "/create",
@@ -40,6 +68,13 @@ router = APIRouter(prefix="/api/orders", tags=["订单管理"])
 )
 async def create_order(
     verify_data: OrderCreate,
+    idempotency_key: str | None = Header(
+        None,
+        alias="Idempotency-Key",
+        min_length=1,
+        max_length=255,
+        description="幂等键：超时重试时携带相同的键，重放首次成功的响应",
+    ),
     db: Session = Depends(get_db),
 ):
     """验证卡密并创建订单（不需要登录）"""
@@ -51,49 +86,176 @@ async def create_order(
             verify_data.channel_id,
             verify_data.remarks,
             verify_data.card_name,
+            idempotency_key,
         )
 
     return await run_in_thread(_verify)
 
 
-@router.get("", response_model=list[OrderOut], summary="获取订单列表")
+@router.get(
+    "", response_model=list[OrderOut] | NormalizedOrdersResponse, summary="获取订单列表"
+)
 async def list_orders(
     status_filter: OrderStatus | None = None,
     limit: int = 100,
     offset: int = 0,
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构：nested（默认）或 normalized"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin),
 ):
     """获取订单列表（管理员权限）"""
 
     def _list():
-        return service.list_orders(db, status_filter, limit, offset)
+        return service.list_order_rows(db, status_filter, limit, offset, shape)
 
-    return await run_in_thread(_list)
+    return FastJSONResponse(await run_in_thread(_list))
 
 
-@router.get("/pending", response_model=list[OrderOut], summary="获取待处理订单列表")
+@router.get(
+    "/pending",
+    response_model=list[OrderOut] | NormalizedOrdersResponse,
+    summary="获取待处理订单列表",
+)
 async def list_pending_orders(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构：nested（默认）或 normalized"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
 ):
     """获取待使用订单列表（管理员权限）"""
 
     def _pending():
-        return service.list_pending_orders(db)
+        return service.list_pending_order_rows(db, shape)
 
-    return await run_in_thread(_pending)
+    return FastJSONResponse(await run_in_thread(_pending))
 
 
-@router.get("/processing", response_model=list[OrderOut], summary="获取处理中订单列表")
+@router.get(
+    "/processing",
+    response_model=list[OrderOut] | NormalizedOrdersResponse,
+    summary="获取处理中订单列表",
+)
 async def list_processing_orders(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_staff)
+    request: Request,
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构：nested（默认）或 normalized"
+    ),
+    since: int | None = Query(
+        None, ge=0, description="增量同步游标（上次响应的 X-Order-Cursor）"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_staff),
 ):
-    """获取处理中订单列表（工作人员权限）"""
+    """获取处理中订单列表（工作人员权限）
+
+    支持 If-None-Match 条件请求，未变化时返回 304。
+    响应头 `X-Order-Cursor` 为当前变更游标；带 `since` 请求时只返回游标之后变更的订单
+    （`X-Order-Sync: delta`，含已离开处理中状态的订单），没有变更时返回 204；
+    游标无效（大于当前游标，如数据库已重置）时返回完整列表（`X-Order-Sync: full`）。
+    """
+
+    def _etag():
+        return service.get_processing_orders_etag(db, current_user, shape)
+
+    def _cursor():
+        return service.get_order_change_cursor(db)
 
     def _processing():
-        return service.list_processing_orders(db, current_user)
+        return service.list_processing_order_rows(db, current_user, shape)
+
+    def _changes():
+        return service.list_processing_order_changes(db, since, current_user, shape)
+
+    if since is None:
+        etag = await run_in_thread(_etag)
+        if etag and etag_matches(request, etag):
+            return not_modified(etag)
+    else:
+        etag = None
+
+    cursor = await run_in_thread(_cursor)
+    headers = {ORDER_CURSOR_HEADER: str(cursor)}
+    if since is not None and since <= cursor:
+        changes = await run_in_thread(_changes) if since < cursor else []
+        orders = changes["orders"] if isinstance(changes, dict) else changes
+        if not orders:
+            return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+        response = FastJSONResponse(changes, headers=headers)
+        response.headers[ORDER_SYNC_HEADER] = "delta"
+        return response
+
+    response = FastJSONResponse(await run_in_thread(_processing), headers=headers)
+    response.headers[ORDER_SYNC_HEADER] = "full"
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+@router.get("/stream", summary="订阅订单实时推送（SSE）")
+async def stream_orders(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_staff),
+):
+    """订阅新订单与订单完成事件（工作人员权限）
+
+    响应为 `text/event-stream`，员工只接收所属渠道的事件；收到 `resync` 事件时
+    重新拉取 `/api/orders/processing`。
+    """
+    channel_id = service.get_order_stream_channel(current_user)
+    # 推送连接长期保持，不占用数据库连接
+    db.close()
+    subscription = order_event_bus.subscribe(channel_id)
+    return StreamingResponse(
+        service.stream_order_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.put(
+    "/complete", response_model=OrderBulkCompleteResponse, summary="批量完成订单"
+)
+async def complete_orders(
+    payload: OrderBulkComplete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_staff),
+):
+    """批量完成订单（工作人员权限，员工只能完成所属渠道的订单）
+
+    单个订单失败不影响其他订单，逐单结果见 `results`。
+    """
+
+    def _complete():
+        return service.complete_orders(db, payload.orders, current_user)
+
+    return FastJSONResponse(await run_in_thread(_complete))
+
+
+@router.post("/claim", response_model=OrderClaimResponse, summary="领取处理中订单")
+async def claim_orders(
+    payload: OrderClaimRequest | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_staff),
+):
+    """领取渠道内最早的未被领取的处理中订单（工作人员权限）
 
-    return await run_in_thread(_processing)
+    租约期内订单不会再分配给其他员工；租约到期仍未完成的订单可被再次领取。
+    """
+    payload = payload or OrderClaimRequest()
+
+    def _claim():
+        return service.claim_orders(
+            db,
+            current_user,
+            payload.count,
+            payload.lease_seconds,
+            payload.channel_id,
+        )
+
+    return FastJSONResponse(await run_in_thread(_claim))
 
 
 @router.put("/{order_id}/complete", response_model=OrderOut, summary="完成订单")
@@ -103,41 +265,109 @@ async def complete_order(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_staff),
 ):
-    """完成订单（工作人员权限）"""
+    """完成订单（工作人员权限）
+
+    订单被其他员工领取且租约未到期时返回 409。
+    """
 
     def _complete():
         remarks = order_data.remarks if order_data else None
-        return service.complete_order(db, order_id, remarks)
+        return service.complete_order(db, order_id, remarks, current_user)
 
     return await run_in_thread(_complete)
 
 
-@router.get("/me", response_model=List[OrderOut], summary="获取我的订单列表")
+@router.get(
+    "/me",
+    response_model=list[OrderOut] | NormalizedOrdersResponse,
+    summary="获取我的订单列表",
+)
 async def get_my_orders(
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构：nested（默认）或 normalized"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """获取当前登录用户的订单列表"""
 
     def _get_orders():
-        return service.get_orders_by_user_id(db, current_user.id)
+        return service.get_order_rows_by_user_id(db, current_user.id, shape)
 
-    return await run_in_thread(_get_orders)
+    return FastJSONResponse(await run_in_thread(_get_orders))
 
 
-@router.get("/stats", summary="获取订单统计信息")
+@router.get(
+    "/search",
+    response_model=list[OrderOut] | NormalizedOrdersResponse,
+    summary="搜索订单",
+)
+async def search_orders(
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="卡密、备注或充值卡名称的片段"
+    ),
+    limit: int = Query(50, ge=1, le=200, description="返回条数上限"),
+    shape: ResponseShape = Query(
+        ResponseShape.NESTED, description="响应结构：nested（默认）或 normalized"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_staff),
+):
+    """按卡密、备注或充值卡名称搜索订单，结果按相关度排序（工作人员权限）"""
+
+    def _search():
+        return service.search_orders(db, q, current_user, limit, shape)
+
+    return FastJSONResponse(await run_in_thread(_search))
+
+
+@router.get("/stats", response_model=OrderStats, summary="获取订单统计信息")
 async def get_order_stats(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)
+    channel_id: int | None = Query(None, description="只统计指定渠道"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
 ):
-    """获取订单统计信息（管理员权限）"""
+    """获取各状态的订单数（管理员权限）"""
 
     def _stats():
-        return service.get_order_stats(db)
+        return service.get_order_stats(db, channel_id)
 
     stats = await run_in_thread(_stats)
     return stats
 
 
+@router.get(
+    "/stats/series", response_model=OrderStatsSeries, summary="获取订单统计时间序列"
+)
+async def get_order_stats_series(
+    granularity: OrderStatsGranularity = Query(
+        OrderStatsGranularity.DAY, description="时间粒度：day 或 hour"
+    ),
+    start: datetime | None = Query(None, description="开始时间（含）"),
+    end: datetime | None = Query(None, description="结束时间（不含），默认当前时间"),
+    channel_id: int | None = Query(None, description="只统计指定渠道"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """按日或按小时获取各渠道各状态的订单数（管理员权限）"""
+
+    def _series():
+        return service.get_order_stats_series(db, granularity, start, end, channel_id)
+
+    return await run_in_thread(_series)
+
+
+@router.get("/sla", response_model=OrderSlaStats, summary="获取订单超时统计")
+async def get_order_sla_stats(
+    current_user: User = Depends(get_current_admin),
+):
+    """获取处理中订单的超时统计（管理员权限）
+
+    超时的订单另通过 `/api/orders/stream` 推送 `order-overdue` 事件。
+    """
+    return service.get_order_sla_stats()
+
+
 @router.get("/{order_id}", response_model=OrderOut, summary="获取单个订单详情")
 async def get_order(
     order_id: int,
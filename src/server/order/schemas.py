@@ -4,13 +4,21 @@
 
 公开接口：
 - `OrderCreate`、`OrderOut`、`OrderUpdate`、`OrderVerify`
+- `OrderRow`、`NormalizedOrdersResponse`
+- `OrderStats`、`OrderStatsGranularity`、`OrderStatsBucket`、`OrderStatsSeries`
+- `OrderCompleteItem`、`OrderBulkComplete`、`OrderCompleteOutcome`、`OrderCompleteResult`、
+  `OrderBulkCompleteResponse`
+- `OrderClaimRequest`、`OrderClaimResponse`
+- `OrderSlaStats`
 """
 
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from typing import Dict, List, Optional
 from enum import Enum
 
+from src.server.activation_code.schemas import CardSummary
+
 
 class OrderStatus(str, Enum):
     PENDING = "pending"
@@ -32,13 +40,127 @@ class OrderOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class OrderRow(BaseModel):
+    """规范化响应中的订单行，价格通过 card_id 从顶层 cards 映射读取"""
+
+    id: int
+    activation_code: str
+    status: OrderStatus
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    remarks: Optional[str] = None
+    channel_id: int
+    card_name: Optional[str] = None
+    card_id: Optional[int] = None
+
+
+class NormalizedOrdersResponse(BaseModel):
+    """规范化的订单列表响应（`?shape=normalized`）"""
+
+    cards: Dict[int, CardSummary] = Field(..., description="按ID索引的充值卡摘要")
+    orders: List[OrderRow] = Field(..., description="订单列表")
+
+
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus] = Field(default=None)
     remarks: Optional[str] = Field(default=None)
 
 
+class OrderCompleteItem(BaseModel):
+    order_id: int = Field(..., gt=0)
+    remarks: Optional[str] = Field(default=None)
+
+
+class OrderBulkComplete(BaseModel):
+    orders: List[OrderCompleteItem] = Field(..., min_length=1, max_length=500)
+
+    @field_validator("orders")
+    @classmethod
+    def _unique_order_ids(cls, orders: List[OrderCompleteItem]):
+        if len({item.order_id for item in orders}) != len(orders):
+            raise ValueError("订单ID不能重复")
+        return orders
+
+
+class OrderCompleteOutcome(str, Enum):
+    COMPLETED = "completed"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    ALREADY_COMPLETED = "already_completed"
+    CLAIMED_BY_OTHER = "claimed_by_other"
+    CODE_NOT_FOUND = "code_not_found"
+    INVALID_CODE_STATUS = "invalid_code_status"
+
+
+class OrderCompleteResult(BaseModel):
+    order_id: int
+    outcome: OrderCompleteOutcome
+    detail: Optional[str] = None
+    order: Optional[OrderOut] = None
+
+
+class OrderBulkCompleteResponse(BaseModel):
+    completed: int = Field(..., description="本次完成的订单数")
+    results: List[OrderCompleteResult] = Field(..., description="按请求顺序的逐单结果")
+
+
+class OrderClaimRequest(BaseModel):
+    count: int = Field(default=1, ge=1, le=50, description="领取的订单数")
+    lease_seconds: Optional[int] = Field(
+        default=None, ge=30, le=3600, description="租约时长（秒），默认取配置"
+    )
+    channel_id: Optional[int] = Field(
+        default=None, gt=0, description="领取的渠道（管理员必填，员工为所属渠道）"
+    )
+
+
+class OrderClaimResponse(BaseModel):
+    lease_expires_at: datetime = Field(..., description="租约到期时间（UTC）")
+    orders: List[OrderOut] = Field(..., description="领取到的订单，按创建时间排列")
+
+
 class OrderCreate(BaseModel):
     code: str = Field(..., min_length=1, max_length=88)
     channel_id: int = Field(..., gt=0)
     remarks: Optional[str] = Field(default=None)
     card_name: Optional[str] = Field(default=None)
+
+
+class OrderStats(BaseModel):
+    total_orders: int
+    pending_orders: int
+    processing_orders: int
+    completed_orders: int
+
+
+class OrderSlaStats(BaseModel):
+    enabled: bool = Field(..., description="超时检查器是否在运行（按 worker 进程）")
+    sla_seconds: float = Field(..., description="处理时限（秒）")
+    tracked: int = Field(0, description="检查中的处理中订单数")
+    overdue: int = Field(0, description="已超时且仍在处理中的订单数")
+    overdue_total: int = Field(0, description="检查器启动以来判定超时的订单数")
+
+
+class OrderStatsGranularity(str, Enum):
+    DAY = "day"
+    HOUR = "hour"
+
+
+class OrderStatsBucket(BaseModel):
+    """一个时间桶内某渠道各状态的订单数"""
+
+    bucket: str = Field(
+        ..., description="时间桶（UTC）：日为 YYYY-MM-DD，小时为 YYYY-MM-DDTHH:00:00"
+    )
+    channel_id: int
+    pending: int = 0
+    processing: int = 0
+    completed: int = 0
+    total: int = 0
+
+
+class OrderStatsSeries(BaseModel):
+    granularity: OrderStatsGranularity
+    start: datetime
+    end: datetime
+    buckets: List[OrderStatsBucket]
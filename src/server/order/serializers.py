@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+订单列表快速序列化
+
+公开接口：
+- `ORDER_ROW_COLUMNS`：`OrderDAO.list_rows` 返回的列顺序
+- `serialize_order_rows(rows)`：将列元组转换为 `OrderOut` 结构的字典
+- `serialize_order_rows_normalized(rows)`：转换为 `NormalizedOrdersResponse` 结构
+
+内部方法：
+- 无
+
+说明：
+- 数据直接来自数据库列，结构与 `OrderOut` 一致，跳过 ORM 对象构造与 Pydantic 逐行校验；
+- 价格来自卡密所属充值卡的当前价格，卡密或充值卡不存在时价格为 0（与单个订单查询一致）。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+ORDER_ROW_COLUMNS = (
+    "id",
+    "activation_code",
+    "status",
+    "created_at",
+    "completed_at",
+    "remarks",
+    "channel_id",
+    "card_name",
+    "card_id",
+    "card_catalog_name",
+    "card_price",
+)
+
+
+def serialize_order_rows(rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    """将订单列元组转换为与 `OrderOut` 相同结构的字典列表"""
+    return [
+        {
+            "id": order_id,
+            "activation_code": activation_code,
+            "status": status,
+            "created_at": created_at,
+            "completed_at": completed_at,
+            "remarks": remarks,
+            "channel_id": channel_id,
+            "card_name": card_name,
+            "pricing": card_price if card_price is not None else 0.0,
+        }
+        for (
+            order_id,
+            activation_code,
+            status,
+            created_at,
+            completed_at,
+            remarks,
+            channel_id,
+            card_name,
+            _card_id,
+            _card_catalog_name,
+            card_price,
+        ) in rows
+    ]
+
+
+def serialize_order_rows_normalized(
+    rows: Iterable[Sequence[Any]],
+) -> dict[str, Any]:
+    """将订单列元组转换为规范化结构：充值卡摘要只出现一次，行内仅保留 card_id"""
+    cards: dict[int, dict[str, Any]] = {}
+    orders = []
+    for (
+        order_id,
+        activation_code,
+        status,
+        created_at,
+        completed_at,
+        remarks,
+        channel_id,
+        card_name,
+        card_id,
+        card_catalog_name,
+        card_price,
+    ) in rows:
+        if card_id is not None and card_id not in cards:
+            cards[card_id] = {
+                "id": card_id,
+                "name": card_catalog_name,
+                "price": card_price,
+            }
+        orders.append(
+            {
+                "id": order_id,
+                "activation_code": activation_code,
+                "status": status,
+                "created_at": created_at,
+                "completed_at": completed_at,
+                "remarks": remarks,
+                "channel_id": channel_id,
+                "card_name": card_name,
+                "card_id": card_id,
+            }
+        )
+    return {"cards": cards, "orders": orders}
@@ -5,14 +5,24 @@
 此模块统一导出订单服务的所有公开接口，确保对上层调用的兼容性。
 
 公开接口：
-- verify_activation_code(db, code, channel_id, remarks, card_name)
+- verify_activation_code(db, code, channel_id, remarks, card_name, idempotency_key)
 - create_order(db, activation_code, channel_id, status, remarks, card_name)
 - get_order(db, order_id)
-- list_pending_orders(db)
-- list_orders(db, status_filter, limit, offset)
-- complete_order(db, order_id, remarks)
-- get_order_stats(db)
-- get_orders_by_user_id(db, user_id)
+- list_pending_orders(db, shape) / list_pending_order_rows(db, shape)
+- list_processing_orders(db, user, shape) / list_processing_order_rows(db, user, shape)
+- list_orders(db, status_filter, limit, offset, shape)
+- list_order_rows(db, status_filter, limit, offset, shape)
+- complete_order(db, order_id, remarks, user)
+- complete_orders(db, items, user)
+- claim_orders(db, user, count, lease_seconds, channel_id)
+- search_orders(db, q, user, limit, shape)
+- get_order_stats(db, channel_id)
+- get_order_stats_series(db, granularity, start, end, channel_id)
+- get_order_sla_stats()
+- get_orders_by_user_id(db, user_id, shape) / get_order_rows_by_user_id(db, user_id, shape)
+- get_processing_orders_etag(db, user, shape)
+- get_order_change_cursor(db) / list_processing_order_changes(db, since, user, shape)
+- get_order_stream_channel(user) / stream_order_events(subscription, heartbeat_seconds)
 """
 
 from __future__ import annotations
@@ -22,12 +32,22 @@ from .creation import verify_activation_code, create_order
 from .retrieval import (
     get_order,
     list_pending_orders,
+    list_pending_order_rows,
     list_processing_orders,
+    list_processing_order_rows,
+    get_processing_orders_etag,
+    get_order_change_cursor,
+    list_processing_order_changes,
     list_orders,
+    list_order_rows,
     get_orders_by_user_id,
+    get_order_rows_by_user_id,
 )
-from .completion import complete_order
-from .stats import get_order_stats
+from .completion import complete_order, complete_orders
+from .claiming import claim_orders
+from .search import search_orders
+from .stats import get_order_stats, get_order_stats_series, get_order_sla_stats
+from .stream import get_order_stream_channel, stream_order_events
 
 # 统一导出所有公开接口
 __all__ = [
@@ -35,9 +55,23 @@ __all__ = [
     "create_order",
     "get_order",
     "list_pending_orders",
+    "list_pending_order_rows",
     "list_processing_orders",
+    "list_processing_order_rows",
+    "get_processing_orders_etag",
+    "get_order_change_cursor",
+    "list_processing_order_changes",
     "list_orders",
+    "list_order_rows",
     "complete_order",
+    "complete_orders",
+    "claim_orders",
+    "search_orders",
     "get_order_stats",
+    "get_order_stats_series",
+    "get_order_sla_stats",
     "get_orders_by_user_id",
+    "get_order_rows_by_user_id",
+    "get_order_stream_channel",
+    "stream_order_events",
 ]
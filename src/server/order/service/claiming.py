@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+订单领取服务模块
+
+公开接口：
+- claim_orders(db, user, count, lease_seconds, channel_id)
+
+内部方法：
+- _claim_channel(user, channel_id)
+
+说明：
+- 同一渠道的多名员工领取订单后各自处理，租约期内订单不会再分配给其他员工，
+  避免重复处理同一订单；租约到期仍未完成的订单可被再次领取；
+- 候选订单由进程内按渠道的优先队列挑选（见 `claims.py`），领取本身是数据库条件更新。
+"""
+
+from __future__ import annotations
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..claims import order_claim_queue
+from ..config import order_config
+from ..dao import OrderDAO
+from ..serializers import serialize_order_rows
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+
+
+def _claim_channel(user: User, channel_id: int | None) -> int:
+    """领取的渠道：员工为所属渠道，管理员须指定渠道"""
+    if user.role == Role.ADMIN:
+        if channel_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="请指定渠道"
+            )
+        return channel_id
+    if user.channel_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="员工未绑定渠道"
+        )
+    if channel_id is not None and channel_id != user.channel_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权限")
+    return user.channel_id
+
+
+def claim_orders(
+    db: Session,
+    user: User,
+    count: int = 1,
+    lease_seconds: int | None = None,
+    channel_id: int | None = None,
+) -> dict:
+    """领取渠道内最早的 count 个未被领取的处理中订单
+
+    返回租约到期时间与领取到的订单（按创建时间排列），没有可领取的订单时列表为空。
+    """
+    channel_id = _claim_channel(user, channel_id)
+    lease = (
+        lease_seconds if lease_seconds is not None else order_config.claim_lease_seconds
+    )
+    order_ids, expires_at = order_claim_queue.claim(
+        db, channel_id, user.id, count, lease
+    )
+    orders = (
+        serialize_order_rows(OrderDAO(db).list_rows(order_ids=order_ids))
+        if order_ids
+        else []
+    )
+    return {"lease_expires_at": expires_at, "orders": orders}
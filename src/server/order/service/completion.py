@@ -3,71 +3,217 @@
 订单完成服务模块
 
 公开接口：
-- complete_order(db, order_id, remarks)
+- complete_order(db, order_id, remarks, user)
+- complete_orders(db, items, user)
 
 内部方法：
-- 无
+- _leased_by_other(claimed_by, claim_expires_at, user)
+- _raise_rejection(rejection)
+- _classify_candidate(candidate, allowed_channel, user)
 
 说明：
-- 负责订单的完成逻辑，包括状态更新、卡密状态变更等。
+- 负责订单的完成逻辑，包括状态更新、卡密状态变更、实时推送、取消超时检查等；
+- 批量完成：一次查询取得全部订单与卡密状态并逐单校验（渠道归属、订单状态、领取租约、
+  卡密状态），通过校验的订单由两条集合更新在同一事务内完成，返回按请求顺序的逐单结果；
+- 订单被其他员工领取且租约未到期时，只有领取人可以完成（见 `claiming.py`）；
+  单个与批量完成都通过带有租约条件的条件更新（`OrderDAO.complete_many`）完成，
+  校验之后才被领取的订单也不会被完成；条件更新未能完成的订单会重新读取并按同一规则
+  判定原因（单个完成返回对应的错误，被领取时为 409）。
 """
 
 from __future__ import annotations
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from ..dao import OrderDAO
-from ..schemas import OrderStatus, OrderOut
-from src.server.activation_code.service import (
-    set_code_consumed,
-    get_activation_code_by_code,
+from ..events import OrderEventKind, publish_order_event
+from ..schemas import (
+    OrderCompleteItem,
+    OrderCompleteOutcome,
+    OrderStatus,
+    OrderOut,
 )
+from ..serializers import serialize_order_rows
+from ..sla import resolve_order_sla
+from src.server.activation_code.models import CardCodeStatus
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
 
 if TYPE_CHECKING:
     pass
 
 
-def complete_order(db: Session, order_id: int, remarks: str | None = None) -> OrderOut:
-    """完成订单"""
+def _leased_by_other(
+    claimed_by: int | None, claim_expires_at: datetime | None, user: User | None
+) -> bool:
+    """订单是否被其他员工领取且租约未到期（user 为 None 时不检查）"""
+    if user is None or claimed_by is None or claimed_by == user.id:
+        return False
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return claim_expires_at is not None and claim_expires_at > now
+
+
+def complete_order(
+    db: Session, order_id: int, remarks: str | None = None, user: User | None = None
+) -> OrderOut:
+    """完成订单（订单被其他员工领取且租约未到期时拒绝）"""
     dao = OrderDAO(db)
-    order = dao.get(order_id)
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="订单不存在")
+    candidates = dao.get_completion_candidates([order_id])
+    _raise_rejection(
+        _classify_candidate(candidates[0] if candidates else None, None, user)
+    )
 
-    if order.status == OrderStatus.COMPLETED:
+    # 卡密与订单的条件更新带有租约条件，校验之后才被领取的订单不会被完成
+    completed, _ = dao.complete_many(
+        {order_id: candidates[0][5]},
+        {order_id: remarks} if remarks is not None else None,
+        user.id if user is not None else None,
+    )
+    if not completed:
+        rechecked = dao.get_completion_candidates([order_id])
+        _raise_rejection(
+            _classify_candidate(rechecked[0] if rechecked else None, None, user)
+        )
+        # 重新读取时已无法完成的原因（如租约恰好到期），按被领取处理，可重试
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="订单已完成"
+            status_code=status.HTTP_409_CONFLICT, detail="订单已被其他员工领取"
         )
 
-    # 获取对应的卡密记录
-    activation_code = get_activation_code_by_code(db, order.activation_code)
-    if not activation_code:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="关联的卡密不存在"
+    order_out = OrderOut(**serialize_order_rows(dao.list_rows(order_ids=completed))[0])
+    publish_order_event(OrderEventKind.COMPLETED, order_out)
+    resolve_order_sla(order_out.id)
+    return order_out
+
+
+_REJECTION_STATUS = {
+    OrderCompleteOutcome.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    OrderCompleteOutcome.FORBIDDEN: status.HTTP_403_FORBIDDEN,
+    OrderCompleteOutcome.ALREADY_COMPLETED: status.HTTP_400_BAD_REQUEST,
+    OrderCompleteOutcome.CLAIMED_BY_OTHER: status.HTTP_409_CONFLICT,
+    OrderCompleteOutcome.CODE_NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    OrderCompleteOutcome.INVALID_CODE_STATUS: status.HTTP_400_BAD_REQUEST,
+}
+
+
+def _raise_rejection(rejection: tuple[OrderCompleteOutcome, str] | None) -> None:
+    """单个订单不能完成时抛出对应的 HTTP 错误"""
+    if rejection is not None:
+        outcome, detail = rejection
+        raise HTTPException(status_code=_REJECTION_STATUS[outcome], detail=detail)
+
+
+def _classify_candidate(
+    candidate: Row | None, allowed_channel: int | None, user: User | None
+) -> tuple[OrderCompleteOutcome, str] | None:
+    """按校验数据判定订单不能完成的原因，可以完成时返回 None
+
+    candidate 为 `OrderDAO.get_completion_candidates` 的一行（订单不存在时为 None）。
+    """
+    if candidate is None:
+        return OrderCompleteOutcome.NOT_FOUND, "订单不存在"
+    (
+        _,
+        channel_id,
+        order_status,
+        claimed_by,
+        claim_expires_at,
+        _,
+        code_status,
+    ) = candidate
+    if allowed_channel is not None and channel_id != allowed_channel:
+        return OrderCompleteOutcome.FORBIDDEN, "无权限"
+    if order_status == OrderStatus.COMPLETED:
+        return OrderCompleteOutcome.ALREADY_COMPLETED, "订单已完成"
+    if _leased_by_other(claimed_by, claim_expires_at, user):
+        return OrderCompleteOutcome.CLAIMED_BY_OTHER, "订单已被其他员工领取"
+    if code_status is None:
+        return OrderCompleteOutcome.CODE_NOT_FOUND, "关联的卡密不存在"
+    if code_status != CardCodeStatus.CONSUMING:
+        return OrderCompleteOutcome.INVALID_CODE_STATUS, "卡密状态不正确"
+    return None
+
+
+def complete_orders(
+    db: Session, items: list[OrderCompleteItem], user: User | None = None
+) -> dict:
+    """批量完成订单（员工只能完成所属渠道的订单）"""
+    dao = OrderDAO(db)
+    order_ids = [item.order_id for item in items]
+    candidates = {row[0]: row for row in dao.get_completion_candidates(order_ids)}
+    if user is None or user.role == Role.ADMIN:
+        allowed_channel = None
+    else:
+        allowed_channel = user.channel_id if user.channel_id is not None else -1
+
+    results: dict[int, dict] = {}
+    eligible: dict[int, int] = {}
+    for order_id in order_ids:
+        rejection = _classify_candidate(candidates.get(order_id), allowed_channel, user)
+        if rejection is None:
+            eligible[order_id] = candidates[order_id][5]
+            continue
+        outcome, detail = rejection
+        results[order_id] = {
+            "order_id": order_id,
+            "outcome": outcome,
+            "detail": detail,
+            "order": None,
+        }
+
+    completed: list[int] = []
+    lost: list[int] = []
+    if eligible:
+        remarks = {
+            item.order_id: item.remarks
+            for item in items
+            if item.order_id in eligible and item.remarks is not None
+        }
+        completed, lost = dao.complete_many(
+            eligible, remarks, user.id if user is not None else None
         )
 
-    # 将卡密状态设置为 consumed
-    set_code_consumed(db, activation_code.code)
-
-    # 更新订单状态
-    updated_order = dao.update_status(order, OrderStatus.COMPLETED, remarks)
-
-    # 获取价格信息
-    pricing = 0.0
-    if updated_order.activation_code_obj and updated_order.activation_code_obj.card:
-        pricing = updated_order.activation_code_obj.card.price
-
-    # 构造 OrderOut 模型
-    return OrderOut(
-        id=updated_order.id,
-        activation_code=updated_order.activation_code,
-        status=OrderStatus(updated_order.status),
-        created_at=updated_order.created_at,
-        completed_at=updated_order.completed_at,
-        remarks=updated_order.remarks,
-        channel_id=updated_order.channel_id,
-        card_name=updated_order.card_name,
-        pricing=pricing,
+    if lost:
+        # 校验之后状态发生变化（被并发完成、被其他员工领取、卡密被改动等），重新判定原因
+        rechecked = {row[0]: row for row in dao.get_completion_candidates(lost)}
+        for order_id in lost:
+            rejection = _classify_candidate(
+                rechecked.get(order_id), allowed_channel, user
+            )
+            # 重新读取时已无法完成的原因（如租约恰好到期），按被领取处理，可重试
+            outcome, detail = rejection or (
+                OrderCompleteOutcome.CLAIMED_BY_OTHER,
+                "订单已被其他员工领取",
+            )
+            results[order_id] = {
+                "order_id": order_id,
+                "outcome": outcome,
+                "detail": detail,
+                "order": None,
+            }
+
+    completed_orders = (
+        {
+            order["id"]: order
+            for order in serialize_order_rows(dao.list_rows(order_ids=completed))
+        }
+        if completed
+        else {}
     )
+    for order_id, order in completed_orders.items():
+        results[order_id] = {
+            "order_id": order_id,
+            "outcome": OrderCompleteOutcome.COMPLETED,
+            "detail": None,
+            "order": order,
+        }
+        publish_order_event(OrderEventKind.COMPLETED, OrderOut(**order))
+        resolve_order_sla(order_id)
+
+    return {
+        "completed": len(completed_orders),
+        "results": [results[order_id] for order_id in order_ids],
+    }
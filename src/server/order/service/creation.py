@@ -3,33 +3,43 @@
 订单创建服务模块
 
 公开接口：
-- verify_activation_code(db, code, channel_id, remarks, card_name)
+- verify_activation_code(db, code, channel_id, remarks, card_name, idempotency_key)
 - create_order(db, activation_code, channel_id, status, remarks, card_name)
 
 内部方法：
-- 无
+- _request_fingerprint(code, channel_id, remarks, card_name)
+- _create_order_with_code(db, code, channel_id, remarks, card_name, before_commit)
 
 说明：
-- 负责订单的创建和验证逻辑，包括卡密验证、订单创建、通知发送等。
+- 负责订单的创建和验证逻辑，包括卡密验证、订单创建、通知入队、实时推送、登记超时检查等；
+- 下单路径共 3 条语句：连接查询、卡密条件更新、订单插入（后两条同一事务）；
+- 带幂等键的重复请求由 `idempotency.py` 的存储重放首次成功的响应。
 """
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
+import hashlib
+from typing import TYPE_CHECKING, Callable
 
+import orjson
+from loguru import logger
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from ..dao import OrderDAO
+from ..events import OrderEventKind, publish_order_event
+from ..idempotency import (
+    IdempotencyKeyInFlight,
+    IdempotencyKeyReused,
+    order_idempotency_store,
+)
 from ..models import Order
+from ..sla import track_order_sla
 from ..schemas import OrderStatus, OrderOut
-from src.server.activation_code.service import (
-    set_code_consuming,
-    get_activation_code_by_code,
-)
-from src.server.card.models import Card
-from src.server.auth.dao import UserDAO
-from src.server.channel.models import Channel
-from src.server.mail_sender.service import send_new_order_notification_email
+from src.server.activation_code.dao import ActivationCodeDAO
+from src.server.activation_code.models import CardCodeStatus
+from src.server.catalog.service import catalog_cache
+from src.server.mail_sender.models import NotificationKind
+from src.server.mail_sender.outbox import enqueue_notification, wake_outbox_dispatcher
 from src.server.mail_sender.schemas import NewOrderNotificationPayload, MailAddress
 
 if TYPE_CHECKING:
@@ -42,89 +52,174 @@ def verify_activation_code(
     channel_id: int,
     remarks: str | None = None,
     card_name: str | None = None,
+    idempotency_key: str | None = None,
+) -> OrderOut:
+    """验证卡密并创建订单
+
+    一次连接查询取得卡密、充值卡与渠道，卡密状态切换（CAS）、订单与通知发件箱记录
+    在同一事务中写入；邮件由后台派发器发送，不占用下单请求的时间。
+    带 idempotency_key 时，相同键的重复请求直接重放首次成功的响应，不再校验和占用卡密。
+    """
+    if idempotency_key is None:
+        return _create_order_with_code(db, code, channel_id, remarks, card_name)
+
+    fingerprint = _request_fingerprint(code, channel_id, remarks, card_name)
+    try:
+        stored = order_idempotency_store.reserve(db, idempotency_key, fingerprint)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key 已用于其他请求",
+        )
+    except IdempotencyKeyInFlight:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="相同 Idempotency-Key 的请求正在处理",
+        )
+    if stored is not None:
+        return OrderOut(**stored.body)
+
+    def _save(order_out: OrderOut) -> None:
+        order_idempotency_store.save(
+            db,
+            idempotency_key,
+            fingerprint,
+            status.HTTP_201_CREATED,
+            order_out.model_dump(mode="json"),
+        )
+
+    try:
+        order_out = _create_order_with_code(
+            db, code, channel_id, remarks, card_name, before_commit=_save
+        )
+    except BaseException:
+        order_idempotency_store.release(idempotency_key)
+        raise
+    order_idempotency_store.complete(
+        db,
+        idempotency_key,
+        fingerprint,
+        status.HTTP_201_CREATED,
+        order_out.model_dump(mode="json"),
+    )
+    return order_out
+
+
+def _request_fingerprint(
+    code: str, channel_id: int, remarks: str | None, card_name: str | None
+) -> str:
+    """下单请求的指纹，用于识别同一个幂等键被用于不同的请求"""
+    payload = orjson.dumps([code, channel_id, remarks, card_name])
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _create_order_with_code(
+    db: Session,
+    code: str,
+    channel_id: int,
+    remarks: str | None = None,
+    card_name: str | None = None,
+    before_commit: Callable[[OrderOut], None] | None = None,
 ) -> OrderOut:
-    """验证卡密并创建订单"""
+    """校验卡密、占用卡密并创建订单
+
+    before_commit 在订单写入后、提交前以订单响应调用，写入同一事务内的关联记录。
+    """
     # 首先检查卡密是否存在且可用
-    activation_code = get_activation_code_by_code(db, code)
-    if not activation_code:
+    context = ActivationCodeDAO(db).get_order_context(code)
+    if not context:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="卡密不存在")
 
-    if activation_code.status != "available":
+    if context.status != CardCodeStatus.AVAILABLE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="卡密状态不正确"
         )
 
-    # 获取卡密对应的商品
-    card = db.query(Card).filter(Card.id == activation_code.card_id).first()
-    if not card:
+    if context.card_name is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="卡密对应的商品不存在"
         )
 
     # 检查商品的渠道是否与传入的渠道ID匹配
-    if card.channel_id != channel_id:
+    if context.channel_id != channel_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="卡密与渠道不匹配"
         )
 
-    # 将卡密状态设置为 consuming
-    activation_code = set_code_consuming(db, code)
+    # 通知收件人取自目录缓存，通知记录随订单在同一事务中写入发件箱
+    staff_contacts = catalog_cache.snapshot(db).staff_contacts(channel_id)
+
+    recipients = []
+    for staff in staff_contacts:
+        try:
+            recipients.append(MailAddress(email=staff.email, name=staff.name))
+        except ValueError as e:
+            # 单个员工邮箱无效不影响订单创建，只记录日志
+            logger.warning(f"跳过新订单通知：{staff.email} {e}")
+
+    def _enqueue_notification(order: Order) -> None:
+        # 每个订单一条发件箱记录，渠道全部员工共用同一封邮件
+        try:
+            payload = NewOrderNotificationPayload(
+                recipients=recipients,
+                order_id=order.id,
+                card_name=context.card_name,
+                activation_code=context.code,
+                created_at=order.created_at,
+                channel_name=context.channel_name,
+            )
+        except ValueError as e:
+            # 通知内容无效（如渠道名称超长）不影响订单创建，只记录日志
+            logger.warning(f"跳过新订单通知：订单 {order.id} {e}")
+            return
+        enqueue_notification(
+            db, NotificationKind.NEW_ORDER, payload, channel_id=channel_id
+        )
 
-    # 创建订单，使用传入的充值卡名称或商品的默认名称
-    card_name_to_use = card_name if card_name is not None else card.name
-    order = create_order(
-        db,
-        activation_code.code,
+    def _order_out(order: Order) -> OrderOut:
+        return OrderOut(
+            id=order.id,
+            activation_code=order.activation_code,
+            status=OrderStatus(order.status),
+            created_at=order.created_at,
+            completed_at=order.completed_at,
+            remarks=order.remarks,
+            channel_id=order.channel_id,
+            card_name=order.card_name,
+            pricing=context.card_price,
+        )
+
+    notify = bool(recipients) and context.channel_name is not None
+
+    def _before_commit(order: Order) -> None:
+        if notify:
+            _enqueue_notification(order)
+        if before_commit is not None:
+            before_commit(_order_out(order))
+
+    # 占用卡密并创建订单，使用传入的充值卡名称或商品的默认名称
+    card_name_to_use = card_name if card_name is not None else context.card_name
+    order = OrderDAO(db).create_with_code_claim(
+        context.id,
+        context.code,
         channel_id,
-        OrderStatus.PROCESSING,
         remarks,
         card_name_to_use,
+        before_commit=_before_commit if notify or before_commit else None,
     )
+    if order is None:
+        # 查询后卡密被并发请求占用
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="卡密状态不正确"
+        )
 
-    # 发送新订单通知邮件给该渠道的所有员工
-    try:
-        # 获取渠道信息
-        channel = db.query(Channel).filter(Channel.id == channel_id).first()
-        if channel:
-            # 获取该渠道的所有员工
-            user_dao = UserDAO(db)
-            staff_members = user_dao.get_staff_by_channel_id(channel_id)
-
-            # 向每个员工发送通知邮件
-            for staff in staff_members:
-                if staff.email:  # 确保员工有邮箱
-                    recipient = MailAddress(email=staff.email, name=staff.name)
-                    payload = NewOrderNotificationPayload(
-                        recipient=recipient,
-                        order_id=order.id,
-                        card_name=card.name,
-                        activation_code=activation_code.code,
-                        created_at=order.created_at,
-                        channel_name=channel.name,
-                    )
-                    # 发送邮件（异步，不阻塞主流程）
-                    send_new_order_notification_email(payload)
-    except Exception as e:
-        # 邮件发送失败不影响订单创建，只记录日志
-        import logging
-
-        logging.warning(f"发送新订单通知邮件失败：{e}")
-
-    # 获取价格信息
-    pricing = card.price if card else 0.0
-
-    # 构造 OrderOut 模型
-    return OrderOut(
-        id=order.id,
-        activation_code=order.activation_code,
-        status=OrderStatus(order.status),
-        created_at=order.created_at,
-        completed_at=order.completed_at,
-        remarks=order.remarks,
-        channel_id=order.channel_id,
-        card_name=order.card_name,
-        pricing=pricing,
-    )
+    if recipients:
+        wake_outbox_dispatcher()
+
+    order_out = _order_out(order)
+    publish_order_event(OrderEventKind.CREATED, order_out)
+    track_order_sla(order_out.id, order_out.created_at)
+    return order_out
 
 
 def create_order(
@@ -4,28 +4,47 @@
 
 公开接口：
 - get_order(db, order_id)
-- list_pending_orders(db)
-- list_processing_orders(db, user)
-- list_orders(db, status_filter, limit, offset)
-- get_orders_by_user_id(db, user_id)
+- list_pending_orders(db, shape) / list_pending_order_rows(db, shape)
+- list_processing_orders(db, user, shape) / list_processing_order_rows(db, user, shape)
+- get_processing_orders_etag(db, user, shape)
+- get_order_change_cursor(db)
+- list_processing_order_changes(db, since, user, shape)
+- list_orders(db, status_filter, limit, offset, shape)
+- list_order_rows(db, status_filter, limit, offset, shape)
+- get_orders_by_user_id(db, user_id, shape) / get_order_rows_by_user_id(db, user_id, shape)
+- channel_scope(user)：订单列表的渠道可见范围（搜索等其他查询共用）
+- serialize_rows(rows, shape)：按响应形态序列化订单列元组（搜索等其他查询共用）
 
 内部方法：
-- 无
+- _build_order_out(order)
+- _as_order_outs(content)
 
 说明：
-- 负责订单的查询逻辑，包括单个订单查询、列表查询、按状态查询等。
+- 负责订单的查询逻辑，包括单个订单查询、列表查询、按状态查询等；
+- 列表查询只选取需要的列（订单列 + 充值卡ID、名称、价格），不加载 ORM 对象图，
+  见 `OrderDAO.list_rows` 与 `serializers.py`；`*_rows` 版本由列元组直接构造响应字典，
+  供路由通过 `FastJSONResponse` 返回，不带后缀的版本返回 `OrderOut` 列表；
+- 列表查询支持 `shape=normalized`：充值卡摘要只在顶层 `cards` 映射中出现一次，
+  订单行通过 `card_id` 引用，适合同一充值卡大量重复出现的列表；
+- 处理中订单列表的 ETag 由订单变更信号与目录摘要组成，计算时不查询订单表；
+- 增量同步使用订单的变更序号（`Order.change_seq`）作为游标，只返回游标之后变更的订单。
 """
 
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
-from ..dao import OrderDAO
+from ..dao import OrderDAO, order_change_signal
+from ..models import Order
 from ..schemas import OrderStatus, OrderOut
+from ..serializers import serialize_order_rows, serialize_order_rows_normalized
 from src.server.auth.models import User
 from src.server.auth.schemas import Role
+from src.server.catalog.service import catalog_cache
+from src.server.etag import make_etag
+from src.server.schemas import ResponseShape
 
 if TYPE_CHECKING:
     pass
@@ -38,88 +57,97 @@ def get_order(db: Session, order_id: int) -> OrderOut:
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="订单不存在")
 
-    # 获取价格信息
-    pricing = 0.0
-    if order.activation_code_obj and order.activation_code_obj.card:
-        pricing = order.activation_code_obj.card.price
-
-    # 构造 OrderOut 模型
-    return OrderOut(
-        id=order.id,
-        activation_code=order.activation_code,
-        status=OrderStatus(order.status),
-        created_at=order.created_at,
-        completed_at=order.completed_at,
-        remarks=order.remarks,
-        channel_id=order.channel_id,
-        card_name=order.card_name,
-        pricing=pricing,
-    )
+    return _build_order_out(order)
 
 
-def list_pending_orders(db: Session) -> list[OrderOut]:
+def list_pending_orders(
+    db: Session, shape: ResponseShape = ResponseShape.NESTED
+) -> list[OrderOut] | dict:
     """获取所有待处理订单"""
-    dao = OrderDAO(db)
-    orders = dao.list_pending()
-
-    # 构造 OrderOut 模型列表
-    order_outs = []
-    for order in orders:
-        pricing = 0.0
-        if order.activation_code_obj and order.activation_code_obj.card:
-            pricing = order.activation_code_obj.card.price
-
-        order_out = OrderOut(
-            id=order.id,
-            activation_code=order.activation_code,
-            status=OrderStatus(order.status),
-            created_at=order.created_at,
-            completed_at=order.completed_at,
-            remarks=order.remarks,
-            channel_id=order.channel_id,
-            card_name=order.card_name,
-            pricing=pricing,
-        )
-        order_outs.append(order_out)
+    return _as_order_outs(list_pending_order_rows(db, shape))
 
-    return order_outs
 
+def list_pending_order_rows(
+    db: Session, shape: ResponseShape = ResponseShape.NESTED
+) -> list[dict] | dict:
+    """获取所有待处理订单（由列元组直接构造的响应字典）"""
+    dao = OrderDAO(db)
+    rows = dao.list_rows(status_filter=OrderStatus.PENDING)
+    return serialize_rows(rows, shape)
 
-def list_processing_orders(db: Session, user: User | None = None) -> list[OrderOut]:
+
+def list_processing_orders(
+    db: Session,
+    user: User | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[OrderOut] | dict:
     """获取处理中订单"""
-    dao = OrderDAO(db)
+    return _as_order_outs(list_processing_order_rows(db, user, shape))
 
-    # 如果没有用户（管理员）或用户是管理员，返回所有处理中订单
-    if not user or user.role == Role.ADMIN:
-        orders = dao.list_processing()
-    # 如果是员工，只返回其渠道的处理中订单
-    elif user.role == Role.STAFF and user.channel_id is not None:
-        orders = dao.list_processing_by_channel(user.channel_id)
-    # 如果员工没有渠道ID，返回空列表
-    else:
-        orders = []
-
-    # 构造 OrderOut 模型列表
-    order_outs = []
-    for order in orders:
-        pricing = 0.0
-        if order.activation_code_obj and order.activation_code_obj.card:
-            pricing = order.activation_code_obj.card.price
-
-        order_out = OrderOut(
-            id=order.id,
-            activation_code=order.activation_code,
-            status=OrderStatus(order.status),
-            created_at=order.created_at,
-            completed_at=order.completed_at,
-            remarks=order.remarks,
-            channel_id=order.channel_id,
-            card_name=order.card_name,
-            pricing=pricing,
+
+def list_processing_order_rows(
+    db: Session,
+    user: User | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[dict] | dict:
+    """获取处理中订单（由列元组直接构造的响应字典）"""
+    visible, channel_id = channel_scope(user)
+    rows = (
+        OrderDAO(db).list_rows(
+            status_filter=OrderStatus.PROCESSING, channel_id=channel_id
         )
-        order_outs.append(order_out)
+        if visible
+        else []
+    )
+    return serialize_rows(rows, shape)
+
+
+def get_order_change_cursor(db: Session) -> int:
+    """当前的订单变更游标（最大变更序号）
 
-    return order_outs
+    必须在查询订单之前读取：查询期间的写入序号更大，客户端下次同步时会再次取得，
+    不会遗漏（重复取得的订单按 ID 覆盖即可）。
+    """
+    return OrderDAO(db).latest_change_seq()
+
+
+def list_processing_order_changes(
+    db: Session,
+    since: int,
+    user: User | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[dict] | dict:
+    """处理中列表的增量：变更序号大于 since 的订单（含已离开处理中状态的订单）
+
+    客户端按 ID 更新本地列表，状态不再是 processing 的订单从列表中移除。
+    """
+    visible, channel_id = channel_scope(user)
+    rows = (
+        OrderDAO(db).list_rows(channel_id=channel_id, changed_since=since)
+        if visible
+        else []
+    )
+    return serialize_rows(rows, shape)
+
+
+def get_processing_orders_etag(
+    db: Session,
+    user: User | None = None,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> str | None:
+    """处理中订单列表的 ETag，订单变更信号不可用时返回 None
+
+    必须在查询订单之前计算：查询期间发生的写入会改变信号，
+    客户端带着旧 ETag 再次请求时不会误判为未修改。
+    """
+    token = order_change_signal.token()
+    if token is None:
+        return None
+    # 订单价格来自充值卡，目录变化同样影响响应内容
+    digest = catalog_cache.snapshot(db).digest
+    role = user.role if user else Role.ADMIN
+    channel_id = user.channel_id if user else None
+    return make_etag("orders-processing", token, digest, role, channel_id, shape)
 
 
 def list_orders(
@@ -127,57 +155,84 @@ def list_orders(
     status_filter: OrderStatus | None = None,
     limit: int = 100,
     offset: int = 0,
-) -> list[OrderOut]:
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[OrderOut] | dict:
     """获取订单列表"""
-    dao = OrderDAO(db)
-    orders = dao.list_all(status_filter, limit, offset)
-
-    # 构造 OrderOut 模型列表
-    order_outs = []
-    for order in orders:
-        pricing = 0.0
-        if order.activation_code_obj and order.activation_code_obj.card:
-            pricing = order.activation_code_obj.card.price
-
-        order_out = OrderOut(
-            id=order.id,
-            activation_code=order.activation_code,
-            status=OrderStatus(order.status),
-            created_at=order.created_at,
-            completed_at=order.completed_at,
-            remarks=order.remarks,
-            channel_id=order.channel_id,
-            card_name=order.card_name,
-            pricing=pricing,
-        )
-        order_outs.append(order_out)
+    content = list_order_rows(db, status_filter, limit, offset, shape)
+    return _as_order_outs(content)
 
-    return order_outs
 
+def list_order_rows(
+    db: Session,
+    status_filter: OrderStatus | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[dict] | dict:
+    """获取订单列表（由列元组直接构造的响应字典）"""
+    dao = OrderDAO(db)
+    rows = dao.list_rows(
+        status_filter=status_filter, newest_first=True, limit=limit, offset=offset
+    )
+    return serialize_rows(rows, shape)
 
-def get_orders_by_user_id(db: Session, user_id: int) -> List[OrderOut]:
+
+def get_orders_by_user_id(
+    db: Session, user_id: int, shape: ResponseShape = ResponseShape.NESTED
+) -> list[OrderOut] | dict:
     """获取指定用户的所有订单"""
+    return _as_order_outs(get_order_rows_by_user_id(db, user_id, shape))
+
+
+def get_order_rows_by_user_id(
+    db: Session, user_id: int, shape: ResponseShape = ResponseShape.NESTED
+) -> list[dict] | dict:
+    """获取指定用户的所有订单（由列元组直接构造的响应字典）"""
     dao = OrderDAO(db)
-    orders = dao.get_orders_by_user_id(user_id)
-
-    # 构造 OrderOut 模型列表
-    order_outs = []
-    for order in orders:
-        pricing = 0.0
-        if order.activation_code_obj and order.activation_code_obj.card:
-            pricing = order.activation_code_obj.card.price
-
-        order_out = OrderOut(
-            id=order.id,
-            activation_code=order.activation_code,
-            status=OrderStatus(order.status),
-            created_at=order.created_at,
-            completed_at=order.completed_at,
-            remarks=order.remarks,
-            channel_id=order.channel_id,
-            card_name=order.card_name,
-            pricing=pricing,
-        )
-        order_outs.append(order_out)
+    rows = dao.list_rows(user_id=user_id, newest_first=True)
+    return serialize_rows(rows, shape)
+
+
+def channel_scope(user: User | None) -> tuple[bool, int | None]:
+    """订单列表的渠道可见范围：(是否可见, 渠道ID)
+
+    管理员（或无用户）可见全部渠道；员工只可见其渠道，未绑定渠道时不可见。
+    """
+    if not user or user.role == Role.ADMIN:
+        return True, None
+    if user.role == Role.STAFF and user.channel_id is not None:
+        return True, user.channel_id
+    return False, None
+
+
+def serialize_rows(rows: list, shape: ResponseShape) -> list[dict] | dict:
+    """按响应形态序列化订单列元组"""
+    if shape == ResponseShape.NORMALIZED:
+        return serialize_order_rows_normalized(rows)
+    return serialize_order_rows(rows)
+
+
+def _build_order_out(order: Order) -> OrderOut:
+    """构造 OrderOut 模型，价格取自关联卡密所属的充值卡"""
+    pricing = 0.0
+    if order.activation_code_obj and order.activation_code_obj.card:
+        pricing = order.activation_code_obj.card.price
+
+    return OrderOut(
+        id=order.id,
+        activation_code=order.activation_code,
+        status=OrderStatus(order.status),
+        created_at=order.created_at,
+        completed_at=order.completed_at,
+        remarks=order.remarks,
+        channel_id=order.channel_id,
+        card_name=order.card_name,
+        pricing=pricing,
+    )
+
 
-    return order_outs
+def _as_order_outs(content: list[dict] | dict) -> list[OrderOut] | dict:
+    """将响应字典转换为 `OrderOut` 列表（规范化结构原样返回）"""
+    if isinstance(content, dict):
+        return content
+    return [OrderOut(**row) for row in content]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+订单搜索服务模块
+
+公开接口：
+- search_orders(db, q, user, limit, shape)
+
+内部方法：
+- _build_match(terms)
+
+说明：
+- 基于 FTS5 trigram 全文索引（见 `models.ORDER_SEARCH_TABLE`），按空白切分的每个词
+  都须出现在卡密、备注或充值卡名称中（子串匹配，不区分大小写），结果按相关度排序
+  （命中过多时只在最新的一批命中中排序，见 `OrderDAO.search_ids`）；
+- trigram 索引只能匹配 3 个字符及以上的词，更短的词在索引命中的结果上过滤，
+  因此至少需要一个 3 个字符及以上的词；
+- 员工只能搜索所属渠道的订单。
+"""
+
+from __future__ import annotations
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..dao import OrderDAO
+from .retrieval import channel_scope, serialize_rows
+from src.server.auth.models import User
+from src.server.schemas import ResponseShape
+
+MIN_INDEXED_TERM_LENGTH = 3
+
+
+def _build_match(terms: list[str]) -> str:
+    """将搜索词转为 FTS5 查询：每个词作为短语（转义双引号），词之间为 AND"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_orders(
+    db: Session,
+    q: str,
+    user: User | None = None,
+    limit: int = 50,
+    shape: ResponseShape = ResponseShape.NESTED,
+) -> list[dict] | dict:
+    """按卡密、备注或充值卡名称搜索订单"""
+    terms = q.split()
+    indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM_LENGTH]
+    if not indexed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"搜索词至少需要 {MIN_INDEXED_TERM_LENGTH} 个字符",
+        )
+    short = [term for term in terms if len(term) < MIN_INDEXED_TERM_LENGTH]
+
+    visible, channel_id = channel_scope(user)
+    if not visible:
+        return serialize_rows([], shape)
+
+    dao = OrderDAO(db)
+    order_ids = dao.search_ids(_build_match(indexed), short, channel_id, limit)
+    if not order_ids:
+        return serialize_rows([], shape)
+    rank = {order_id: i for i, order_id in enumerate(order_ids)}
+    rows = sorted(dao.list_rows(order_ids=order_ids), key=lambda row: rank[row[0]])
+    return serialize_rows(rows, shape)
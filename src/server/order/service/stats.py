@@ -3,37 +3,127 @@
 订单统计服务模块
 
 公开接口：
-- get_order_stats(db)
+- get_order_stats(db, channel_id)
+- get_order_stats_series(db, granularity, start, end, channel_id)
+- get_order_sla_stats()
 
 内部方法：
-- 无
+- _to_utc_naive(value)
 
 说明：
-- 负责订单的统计逻辑，包括订单数量统计等。
+- 负责订单的统计逻辑：各状态订单总数与按渠道、按日/小时的时间序列；
+- 总数与按日统计读取触发器维护的日汇总表，按小时统计对订单表做一次分组查询；
+- 时间桶按 UTC 划分（与 `created_at` 的存储一致）；
+- 超时统计来自当前进程的超时检查器（见 `sla.py`），不查询数据库。
 """
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
 
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..dao import OrderDAO
-from ..schemas import OrderStatus
+from ..config import order_config
+from ..dao import OrderStatsDAO
+from ..sla import get_order_sla_monitor
+from ..schemas import OrderStatsGranularity, OrderStatus
+
+DEFAULT_SPANS = {
+    OrderStatsGranularity.DAY: timedelta(days=30),
+    OrderStatsGranularity.HOUR: timedelta(hours=24),
+}
+MAX_HOURLY_SPAN = timedelta(days=31)
 
-if TYPE_CHECKING:
-    pass
 
+def _to_utc_naive(value: datetime) -> datetime:
+    """带时区的时间转换为 UTC 并去掉时区（数据库中按 UTC 无时区存储）"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-def get_order_stats(db: Session) -> dict:
-    """获取订单统计信息"""
-    dao = OrderDAO(db)
 
-    pending_count = dao.count_by_status(OrderStatus.PENDING)
-    completed_count = dao.count_by_status(OrderStatus.COMPLETED)
-    total_count = pending_count + completed_count
+def get_order_stats(db: Session, channel_id: int | None = None) -> dict:
+    """获取订单统计信息（各状态订单数，可按渠道过滤）"""
+    counts = {
+        order_status: count
+        for order_status, count in OrderStatsDAO(db).status_totals(channel_id)
+    }
 
     return {
-        "total_orders": total_count,
-        "pending_orders": pending_count,
-        "completed_orders": completed_count,
+        "total_orders": sum(counts.values()),
+        "pending_orders": counts.get(OrderStatus.PENDING.value, 0),
+        "processing_orders": counts.get(OrderStatus.PROCESSING.value, 0),
+        "completed_orders": counts.get(OrderStatus.COMPLETED.value, 0),
     }
+
+
+def get_order_stats_series(
+    db: Session,
+    granularity: OrderStatsGranularity = OrderStatsGranularity.DAY,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    channel_id: int | None = None,
+) -> dict:
+    """按日或按小时统计各渠道各状态的订单数
+
+    时间区间左闭右开，默认截止到当前时间，按日默认 30 天、按小时默认 24 小时；
+    按日统计以 start、end 所在的整天为单位。
+    """
+    end = _to_utc_naive(end) if end else datetime.now(timezone.utc).replace(tzinfo=None)
+    start = _to_utc_naive(start) if start else end - DEFAULT_SPANS[granularity]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="开始时间必须早于结束时间"
+        )
+
+    dao = OrderStatsDAO(db)
+    rows: Sequence[Sequence[Any]]
+    if granularity == OrderStatsGranularity.HOUR:
+        if end - start > MAX_HOURLY_SPAN:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"按小时统计的时间范围不能超过 {MAX_HOURLY_SPAN.days} 天",
+            )
+        rows = dao.hourly(start, end, channel_id)
+    else:
+        rows = [
+            (day.isoformat(), row_channel_id, order_status, count)
+            for day, row_channel_id, order_status, count in dao.daily(
+                start.date(),
+                (end - timedelta(microseconds=1)).date() + timedelta(days=1),
+                channel_id,
+            )
+        ]
+
+    buckets: dict[tuple[str, int], dict] = {}
+    for bucket, row_channel_id, order_status, count in rows:
+        entry = buckets.get((bucket, row_channel_id))
+        if entry is None:
+            entry = buckets[(bucket, row_channel_id)] = {
+                "bucket": bucket,
+                "channel_id": row_channel_id,
+                "pending": 0,
+                "processing": 0,
+                "completed": 0,
+                "total": 0,
+            }
+        if order_status in entry:
+            entry[order_status] += count
+        entry["total"] += count
+
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "buckets": list(buckets.values()),
+    }
+
+
+def get_order_sla_stats() -> dict:
+    """处理中订单的超时统计"""
+    monitor = get_order_sla_monitor()
+    if monitor is None:
+        return {"enabled": False, "sla_seconds": order_config.sla_seconds}
+    return {"enabled": True, **monitor.stats()}
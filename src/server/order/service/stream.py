@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+订单实时推送服务模块（Server-Sent Events）
+
+公开接口：
+- get_order_stream_channel(user)
+- stream_order_events(subscription, heartbeat_seconds)
+
+内部方法：
+- _format_event(event, data)
+
+说明：
+- 客户端先订阅推送，再拉取一次处理中订单列表，之后按 `order-created` /
+  `order-completed` 事件增量更新，不再轮询；处理超时的订单另有 `order-overdue` 事件；
+- 空闲时每隔 `HEARTBEAT_SECONDS` 发送注释行保持连接；无论是否空闲，每隔
+  `HEARTBEAT_SECONDS` 检查一次订单变更信号（本进程事件持续到达时同样检查），
+  信号自上次同步后有变化时发送 `resync` 事件，订阅队列溢出时同样发送，客户端收到后
+  重新拉取列表；
+- 变更信号只保留最后一次写入，无法区分本进程与其他 worker 进程的写入，因此推送本进程
+  事件后不刷新信号标记（否则会吞掉此前其他进程的写入），代价是本进程有写入时下一次
+  心跳也会发送一次 `resync`；
+- 断线重连后客户端同样需要重新拉取列表。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi import HTTPException, status
+
+from src.server.auth.models import Role, User
+from ..dao import order_change_signal
+from ..events import OrderEventSubscription, order_event_bus
+
+HEARTBEAT_SECONDS = 15.0
+RETRY_MILLISECONDS = 3000
+
+
+def _format_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def get_order_stream_channel(user: User) -> int | None:
+    """推送的渠道范围：管理员接收全部渠道（None），员工只接收所属渠道"""
+    if user.role == Role.ADMIN:
+        return None
+    if user.channel_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="员工未绑定渠道"
+        )
+    return user.channel_id
+
+
+async def stream_order_events(
+    subscription: OrderEventSubscription,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[bytes]:
+    """将订阅到的订单事件编码为 SSE 流，结束（含客户端断开）时取消订阅"""
+    loop = asyncio.get_running_loop()
+    token = order_change_signal.token()
+    checked_at = loop.time()
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n: connected\n\n".encode()
+        while True:
+            try:
+                event = await subscription.get(heartbeat_seconds)
+            except asyncio.TimeoutError:
+                checked_at = loop.time()
+                current = order_change_signal.token()
+                if current != token:
+                    token = current
+                    yield _format_event("resync", {})
+                else:
+                    yield b": keep-alive\n\n"
+                continue
+
+            if event is None:
+                break
+            if subscription.overflowed:
+                # 已丢弃部分事件，剩余事件不足以还原列表
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    if subscription.queue.get_nowait() is None:
+                        return
+                token = order_change_signal.token()
+                checked_at = loop.time()
+                yield _format_event("resync", {})
+                continue
+
+            yield _format_event(event.kind.value, event.order)
+            if loop.time() - checked_at >= heartbeat_seconds:
+                # 事件持续到达时不会超时，按心跳间隔检查其他进程的写入
+                checked_at = loop.time()
+                current = order_change_signal.token()
+                if current != token:
+                    token = current
+                    yield _format_event("resync", {})
+    finally:
+        order_event_bus.unsubscribe(subscription)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+处理中订单的超时检查（SLA）
+
+公开接口：
+- `TimerWheel`：哈希时间轮
+- `OrderSlaMonitor`：超时检查器（后台线程）
+- `start_order_sla_monitor(session_factory)` / `stop_order_sla_monitor()`
+- `get_order_sla_monitor()`
+- `track_order_sla(order_id, created_at)` / `resolve_order_sla(order_id)`
+
+内部方法：
+- `_timestamp(value)`
+
+说明：
+- 每个处理中订单在时间轮中登记一个到期时间（创建时间 + `ORDER_SLA_SECONDS`），
+  登记与取消均为 O(1)；每个刻度只检查当前槽位，时间轮转一圈覆盖整个时限，
+  每个订单在到期前最多被检查一次；
+- 启动时加载一次处理中订单，之后由本进程的下单与完成直接登记、取消，
+  其他进程的写入按变更序号（`Order.change_seq`）增量同步，不再扫描订单表；
+- 到期的订单按主键确认仍在处理中后判定为超时：记录日志、计入超时计数，
+  并通过订单事件总线推送 `order-overdue` 事件；每个订单只判定一次；
+- 多个 worker 进程各自运行检查器时，每个进程都会推送超时事件（各自的订阅者）。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from .config import order_config
+from .dao import OrderDAO, order_change_signal
+from .events import OrderEventKind, publish_order_event
+from .schemas import OrderOut, OrderStatus
+from .serializers import serialize_order_rows
+
+
+def _timestamp(value: datetime) -> float:
+    """数据库中的无时区时间按 UTC 处理"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TimerWheel:
+    """哈希时间轮
+
+    槽位数 × 刻度为一圈的时长，超过一圈的到期时间按圈数留在槽位中，
+    推进到该槽位时只取出已到期的条目。
+    """
+
+    def __init__(self, tick_seconds: float, slots: int, start: float):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self._buckets: list[dict[int, float]] = [{} for _ in range(slots)]
+        self._slot_of: dict[int, int] = {}
+        self._tick = int(start // tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def schedule(self, key: int, deadline: float) -> None:
+        """登记（或改期）一个到期时间"""
+        self.cancel(key)
+        tick = max(math.ceil(deadline / self.tick_seconds), self._tick)
+        slot = tick % self.slots
+        self._buckets[slot][key] = deadline
+        self._slot_of[key] = slot
+
+    def cancel(self, key: int) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._buckets[slot][key]
+        return True
+
+    def advance(self, now: float) -> list[int]:
+        """推进到 now，返回已到期的条目（按槽位顺序）"""
+        target = int(now // self.tick_seconds)
+        if target < self._tick:
+            return []
+        # 停顿超过一圈时每个槽位检查一次即可
+        steps = min(target - self._tick + 1, self.slots)
+        expired = []
+        for tick in range(self._tick, self._tick + steps):
+            bucket = self._buckets[tick % self.slots]
+            due = [key for key, deadline in bucket.items() if deadline <= now]
+            for key in due:
+                del bucket[key]
+                del self._slot_of[key]
+            expired.extend(due)
+        self._tick = target + 1
+        return expired
+
+
+class OrderSlaMonitor:
+    """处理中订单的超时检查器"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sla_seconds: float | None = None,
+        tick_seconds: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        config = order_config
+        self.session_factory = session_factory
+        self.sla_seconds = sla_seconds or config.sla_seconds
+        self.tick_seconds = tick_seconds or config.sla_tick_seconds
+        self.clock = clock
+        # 一圈覆盖整个时限
+        slots = math.ceil(self.sla_seconds / self.tick_seconds) + 1
+        self.wheel = TimerWheel(self.tick_seconds, slots, clock())
+        self.overdue_total = 0
+        self._overdue: set[int] = set()
+        self._synced_seq: int | None = None
+        self._token: str | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """启动后台线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="order-sla-monitor", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"订单超时检查器已启动：时限 {self.sla_seconds:g} 秒")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def track(self, order_id: int, created_at: datetime) -> None:
+        """登记处理中订单（已判定超时的订单不再登记）"""
+        with self._lock:
+            if order_id not in self._overdue:
+                deadline = _timestamp(created_at) + self.sla_seconds
+                self.wheel.schedule(order_id, deadline)
+
+    def resolve(self, order_id: int) -> None:
+        """订单已离开处理中状态"""
+        with self._lock:
+            self.wheel.cancel(order_id)
+            self._overdue.discard(order_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sla_seconds": self.sla_seconds,
+                "tracked": len(self.wheel),
+                "overdue": len(self._overdue),
+                "overdue_total": self.overdue_total,
+            }
+
+    def run_once(self) -> list[int]:
+        """同步订单变更并推进时间轮，返回本次判定超时的订单ID"""
+        with self.session_factory() as db:
+            self._sync(OrderDAO(db))
+            with self._lock:
+                expired = self.wheel.advance(self.clock())
+            if not expired:
+                return []
+            # 其他进程可能已完成订单，按主键确认
+            rows = serialize_order_rows(OrderDAO(db).list_rows(order_ids=expired))
+
+        overdue = []
+        for row in rows:
+            if row["status"] != OrderStatus.PROCESSING:
+                continue
+            with self._lock:
+                self._overdue.add(row["id"])
+                self.overdue_total += 1
+            overdue.append(row["id"])
+            logger.warning(
+                f"订单处理超时：订单 {row['id']}（渠道 {row['channel_id']}）"
+                f"创建于 {row['created_at']}，超过 {self.sla_seconds:g} 秒仍在处理中"
+            )
+            publish_order_event(OrderEventKind.OVERDUE, OrderOut(**row))
+        return overdue
+
+    def _sync(self, dao: OrderDAO) -> None:
+        """首次加载全部处理中订单，之后在变更信号变化时按变更序号增量同步
+
+        先读取信号与最大变更序号再查询：查询期间的写入下次同步时再次取得。
+        """
+        token = order_change_signal.token()
+        if self._synced_seq is not None and token == self._token:
+            return
+        latest = dao.latest_change_seq()
+        if self._synced_seq is None or latest < self._synced_seq:
+            rows = dao.list_sla_rows()
+        elif latest > self._synced_seq:
+            rows = dao.list_sla_rows(self._synced_seq)
+        else:
+            rows = []
+        for order_id, status, created_at in rows:
+            if status == OrderStatus.PROCESSING:
+                self.track(order_id, created_at)
+            else:
+                self.resolve(order_id)
+        self._synced_seq = latest
+        self._token = token
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"订单超时检查失败：{e}")
+            self._stop.wait(self.tick_seconds)
+
+
+_monitor: OrderSlaMonitor | None = None
+
+
+def start_order_sla_monitor(
+    session_factory: Callable[[], Session],
+) -> OrderSlaMonitor:
+    """启动全局超时检查器（应用启动时调用）"""
+    global _monitor
+    if _monitor is None:
+        _monitor = OrderSlaMonitor(session_factory)
+        _monitor.start()
+    return _monitor
+
+
+def stop_order_sla_monitor() -> None:
+    """停止全局超时检查器（应用关闭时调用）"""
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+
+
+def get_order_sla_monitor() -> OrderSlaMonitor | None:
+    return _monitor
+
+
+def track_order_sla(order_id: int, created_at: datetime) -> None:
+    """登记新的处理中订单；检查器未启动时忽略（启动时从数据库加载）"""
+    if _monitor is not None:
+        _monitor.track(order_id, created_at)
+
+
+def resolve_order_sla(order_id: int) -> None:
+    """订单已完成；检查器未启动时忽略"""
+    if _monitor is not None:
+        _monitor.resolve(order_id)
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+订单领取测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.models import ActivationCode, CardCodeStatus
+from src.server.auth.config import auth_config
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.claims import OrderClaimQueue
+from src.server.order.dao import OrderDAO
+from src.server.order.models import Order
+from src.server.order.schemas import (
+    OrderCompleteItem,
+    OrderCompleteOutcome,
+    OrderStatus,
+)
+from src.server.order.service import complete_order, complete_orders
+
+
+class _Clock:
+    def __init__(self, now: datetime = datetime(2026, 3, 1, 12, 0)):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _seed(db: Session, count: int = 4) -> tuple[Channel, list[Order]]:
+    channel = Channel(name="领取渠道")
+    db.add(channel)
+    db.commit()
+    start = datetime(2026, 3, 1, 8, 0)
+    # 倒序插入，领取顺序按创建时间而不是ID
+    orders = [
+        Order(
+            activation_code=f"CLAIM-{i}",
+            channel_id=channel.id,
+            status=OrderStatus.PROCESSING,
+            created_at=start + timedelta(minutes=i),
+            user_id=0,
+        )
+        for i in reversed(range(count))
+    ]
+    db.add_all(orders)
+    db.commit()
+    return channel, sorted(orders, key=lambda order: order.created_at)
+
+
+def test_claims_are_disjoint_and_oldest_first(test_db_session: Session):
+    """测试同一渠道的员工领取到不同的订单，按创建时间先到先领"""
+    channel, orders = _seed(test_db_session)
+    queue = OrderClaimQueue(clock=_Clock())
+
+    first, expires_at = queue.claim(test_db_session, channel.id, 1, 2, 60)
+    second, _ = queue.claim(test_db_session, channel.id, 2, 5, 60)
+    third, _ = queue.claim(test_db_session, channel.id, 3, 1, 60)
+
+    assert first == [orders[0].id, orders[1].id]
+    assert second == [orders[2].id, orders[3].id]
+    assert third == []
+    test_db_session.expire_all()
+    assert orders[0].claimed_by == 1
+    assert orders[0].claim_expires_at == expires_at
+
+
+def test_expired_leases_and_completed_orders(test_db_session: Session):
+    """测试租约到期后可再次领取，已完成的订单不再被领取"""
+    channel, orders = _seed(test_db_session, 2)
+    clock = _Clock()
+    queue = OrderClaimQueue(clock=clock)
+    assert queue.claim(test_db_session, channel.id, 1, 2, 60)[0] == [
+        orders[0].id,
+        orders[1].id,
+    ]
+
+    dao = OrderDAO(test_db_session)
+    first = dao.get(orders[0].id)
+    assert first is not None
+    dao.update_status(first, OrderStatus.COMPLETED)
+    clock.now += timedelta(seconds=61)
+
+    assert queue.claim(test_db_session, channel.id, 2, 2, 60)[0] == [orders[1].id]
+
+
+def test_orders_claimed_elsewhere_are_skipped(test_db_session: Session):
+    """测试其他进程领取或新建的订单：条件更新失败的跳过，新订单按变更序号同步"""
+    channel, orders = _seed(test_db_session, 2)
+    clock = _Clock()
+    queue = OrderClaimQueue(clock=clock)
+    assert queue.claim(test_db_session, channel.id, 1, 0, 60)[0] == []
+
+    # 其他进程领取了最早的订单，并新建了一个订单
+    test_db_session.execute(
+        update(Order)
+        .where(Order.id == orders[0].id)
+        .values(claimed_by=9, claim_expires_at=clock.now + timedelta(seconds=30))
+    )
+    test_db_session.commit()
+    created = OrderDAO(test_db_session).create(
+        "CLAIM-NEW", channel.id, OrderStatus.PROCESSING
+    )
+
+    claimed, _ = queue.claim(test_db_session, channel.id, 1, 5, 60)
+    assert claimed == [orders[1].id, created.id]
+
+    clock.now += timedelta(seconds=31)
+    assert queue.claim(test_db_session, channel.id, 2, 5, 60)[0] == [orders[0].id]
+
+
+def test_warm_claim_does_not_scan_orders(test_db_session: Session):
+    """测试队列加载后领取只执行变更序号查询与条件更新"""
+    channel, orders = _seed(test_db_session)
+    channel_id, expected = channel.id, orders[1].id
+    queue = OrderClaimQueue(clock=_Clock())
+    queue.claim(test_db_session, channel_id, 1, 1, 60)
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        claimed, _ = queue.claim(test_db_session, channel_id, 2, 1, 60)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert claimed == [expected]
+    assert len(statements) == 2
+    assert statements[1].startswith("UPDATE orders")
+
+
+def _seed_leased_orders(db: Session) -> tuple[list[Order], User, User]:
+    """两个处理中订单（卡密均为 consuming），第一个被 holder 领取且租约未到期"""
+    channel = Channel(name="租约渠道")
+    db.add(channel)
+    db.commit()
+    card = Card(name="租约卡", description="租约", price=1.0, channel_id=channel.id)
+    db.add(card)
+    db.commit()
+    codes = [
+        ActivationCode(
+            card_id=card.id, code=f"LEASE-{i}", status=CardCodeStatus.CONSUMING
+        )
+        for i in range(2)
+    ]
+    db.add_all(codes)
+    db.commit()
+    holder, other = (
+        User(username=name, email=f"{name}@example.com", role=Role.STAFF)
+        for name in ("lease_holder", "lease_other")
+    )
+    for staff in (holder, other):
+        staff.channel_id = channel.id
+        staff.set_password("password")
+    db.add_all([holder, other])
+    db.commit()
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=5)
+    orders = [
+        Order(
+            activation_code=code.code,
+            activation_code_id=code.id,
+            channel_id=channel.id,
+            status=OrderStatus.PROCESSING,
+            user_id=0,
+        )
+        for code in codes
+    ]
+    orders[0].claimed_by = holder.id
+    orders[0].claim_expires_at = expires_at
+    db.add_all(orders)
+    db.commit()
+    return orders, holder, other
+
+
+def test_completion_respects_live_lease(test_db_session: Session):
+    """测试租约未到期时只有领取人可以完成订单，卡密不被其他员工消费"""
+    orders, holder, other = _seed_leased_orders(test_db_session)
+    leased, free = orders[0].id, orders[1].id
+
+    with pytest.raises(HTTPException) as exc_info:
+        complete_order(test_db_session, leased, user=other)
+    assert exc_info.value.status_code == 409
+
+    result = complete_orders(
+        test_db_session,
+        [OrderCompleteItem(order_id=leased), OrderCompleteItem(order_id=free)],
+        other,
+    )
+    assert [r["outcome"] for r in result["results"]] == [
+        OrderCompleteOutcome.CLAIMED_BY_OTHER,
+        OrderCompleteOutcome.COMPLETED,
+    ]
+    test_db_session.expire_all()
+    assert (
+        test_db_session.scalar(
+            select(ActivationCode.status).where(ActivationCode.code == "LEASE-0")
+        )
+        == CardCodeStatus.CONSUMING
+    )
+
+    assert complete_order(test_db_session, leased, user=holder).status == (
+        OrderStatus.COMPLETED
+    )
+
+
+def test_complete_many_rechecks_lease(test_db_session: Session):
+    """测试校验之后才被领取的订单不会被批量完成（条件更新带租约条件）"""
+    orders, holder, other = _seed_leased_orders(test_db_session)
+    leased = orders[0]
+    assert leased.activation_code_id is not None
+    eligible = {leased.id: leased.activation_code_id}
+    dao = OrderDAO(test_db_session)
+
+    assert dao.complete_many(eligible, None, other.id) == ([], [leased.id])
+    test_db_session.expire_all()
+    assert leased.status == OrderStatus.PROCESSING
+    assert leased.activation_code_obj.status == CardCodeStatus.CONSUMING
+
+    assert dao.complete_many(eligible, None, holder.id) == ([leased.id], [])
+
+
+def test_complete_order_rejects_claim_after_check(
+    test_db_session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    """测试单个完成：校验之后才被其他员工领取的订单返回 409，卡密不被消费"""
+    orders, holder, other = _seed_leased_orders(test_db_session)
+    free = orders[1].id
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=5)
+    complete_many = OrderDAO.complete_many
+
+    def _claim_before_write(self, *args, **kwargs):
+        self.db_session.execute(
+            update(Order)
+            .where(Order.id == free)
+            .values(claimed_by=holder.id, claim_expires_at=expires_at)
+        )
+        self.db_session.commit()
+        return complete_many(self, *args, **kwargs)
+
+    monkeypatch.setattr(OrderDAO, "complete_many", _claim_before_write)
+    with pytest.raises(HTTPException) as exc_info:
+        complete_order(test_db_session, free, user=other)
+
+    assert exc_info.value.status_code == 409
+    test_db_session.expire_all()
+    assert orders[1].status == OrderStatus.PROCESSING
+    assert orders[1].activation_code_obj.status == CardCodeStatus.CONSUMING
+
+
+def test_bulk_completion_reclassifies_orders_lost_after_validation(
+    test_db_session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    """测试校验之后才被领取或卡密被改动的订单按实际原因返回，而不是已完成"""
+    orders, holder, other = _seed_leased_orders(test_db_session)
+    leased, moved = orders[0].id, orders[1].id
+    test_db_session.execute(
+        update(Order).where(Order.id == leased).values(claimed_by=None)
+    )
+    test_db_session.commit()
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=5)
+    complete_many = OrderDAO.complete_many
+
+    def _change_after_validation(self, *args, **kwargs):
+        self.db_session.execute(
+            update(Order)
+            .where(Order.id == leased)
+            .values(claimed_by=holder.id, claim_expires_at=expires_at)
+        )
+        self.db_session.execute(
+            update(ActivationCode)
+            .where(ActivationCode.code == "LEASE-1")
+            .values(status=CardCodeStatus.CONSUMED)
+        )
+        self.db_session.commit()
+        return complete_many(self, *args, **kwargs)
+
+    monkeypatch.setattr(OrderDAO, "complete_many", _change_after_validation)
+    result = complete_orders(
+        test_db_session,
+        [OrderCompleteItem(order_id=leased), OrderCompleteItem(order_id=moved)],
+        other,
+    )
+
+    assert result["completed"] == 0
+    assert [(r["outcome"], r["detail"]) for r in result["results"]] == [
+        (OrderCompleteOutcome.CLAIMED_BY_OTHER, "订单已被其他员工领取"),
+        (OrderCompleteOutcome.INVALID_CODE_STATUS, "卡密状态不正确"),
+    ]
+
+
+def test_claim_route(test_client, test_db_session: Session):
+    """测试领取接口：管理员须指定渠道，员工领取所属渠道"""
+    from src.server.auth.service import bootstrap_default_admin
+
+    bootstrap_default_admin(test_db_session)
+    headers = {"Authorization": f"Bearer {auth_config.test_token}"}
+    channel, orders = _seed(test_db_session, 2)
+
+    assert test_client.post("/api/orders/claim", headers=headers).status_code == 400
+
+    resp = test_client.post(
+        "/api/orders/claim",
+        json={"count": 1, "lease_seconds": 120, "channel_id": channel.id},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [order["id"] for order in data["orders"]] == [orders[0].id]
+    assert data["lease_expires_at"]
+
+    staff = User(username="claim_staff", email="claim@example.com", role=Role.STAFF)
+    staff.channel_id = channel.id + 1
+    staff.set_password("password")
+    test_db_session.add(staff)
+    test_db_session.commit()
+    login = test_client.post(
+        "/api/auth/login", json={"username": "claim_staff", "password": "password"}
+    )
+    staff_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    forbidden = test_client.post(
+        "/api/orders/claim", json={"channel_id": channel.id}, headers=staff_headers
+    )
+    assert forbidden.status_code == 403
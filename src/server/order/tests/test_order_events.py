@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+订单事件总线与实时推送测试
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.models import ActivationCode
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.dao import order_change_signal
+from src.server.order.events import (
+    OrderEvent,
+    OrderEventBus,
+    OrderEventKind,
+    order_event_bus,
+    publish_order_event,
+)
+from src.server.order.schemas import OrderOut, OrderStatus
+from src.server.order.service import (
+    complete_order,
+    stream_order_events,
+    verify_activation_code,
+)
+
+
+def test_bus_delivers_across_threads_by_channel():
+    """测试从其他线程发布的事件只投递给匹配渠道的订阅者"""
+
+    async def _run():
+        bus = OrderEventBus()
+        channel_one = bus.subscribe(1)
+        everyone = bus.subscribe(None)
+
+        event = OrderEvent(OrderEventKind.CREATED, 2, {"id": 7})
+        publisher = threading.Thread(target=bus.publish, args=(event,))
+        publisher.start()
+        publisher.join()
+
+        assert await everyone.get(1) == event
+        assert channel_one.queue.empty()
+
+        bus.close()
+        assert await channel_one.get(1) is None
+        assert bus.subscriber_count == 0
+
+    asyncio.run(_run())
+
+
+def test_bus_marks_overflow_without_blocking_publisher():
+    """测试订阅者队列满时丢弃事件并标记溢出，关闭信号仍能送达"""
+
+    async def _run():
+        bus = OrderEventBus(max_pending=1)
+        subscription = bus.subscribe()
+        for order_id in range(3):
+            bus.publish(OrderEvent(OrderEventKind.CREATED, 1, {"id": order_id}))
+        bus.close()
+        await asyncio.sleep(0)
+
+        assert subscription.overflowed
+        assert await subscription.get(1) is None
+
+    asyncio.run(_run())
+
+
+def test_stream_encodes_events_and_resyncs_on_foreign_writes():
+    """测试 SSE 编码：推送订单事件，其他进程写入后发送 resync"""
+    order = OrderOut(
+        id=42,
+        activation_code="STREAM-CODE",
+        status=OrderStatus.PROCESSING,
+        created_at=datetime(2026, 3, 1, 9, 0),
+        channel_id=5,
+        pricing=9.9,
+    )
+
+    async def _run():
+        subscription = order_event_bus.subscribe(5)
+        stream = stream_order_events(subscription, heartbeat_seconds=0.01)
+        assert (await stream.__anext__()).startswith(b"retry: ")
+
+        await asyncio.to_thread(publish_order_event, OrderEventKind.CREATED, order)
+        chunk = await stream.__anext__()
+        header, data = chunk.decode().strip().split("\n")
+        assert header == "event: order-created"
+        assert json.loads(data.removeprefix("data: "))["id"] == 42
+
+        assert await stream.__anext__() == b": keep-alive\n\n"
+        order_change_signal.bump()
+        assert (await stream.__anext__()).startswith(b"event: resync\n")
+
+        await stream.aclose()
+        assert subscription not in order_event_bus._subscribers
+
+    asyncio.run(_run())
+
+
+def test_stream_does_not_swallow_foreign_write_before_local_event():
+    """测试本进程事件之前的其他进程写入不会因推送本地事件而被忽略"""
+    order = OrderOut(
+        id=43,
+        activation_code="STREAM-CODE-2",
+        status=OrderStatus.PROCESSING,
+        created_at=datetime(2026, 3, 1, 9, 0),
+        channel_id=5,
+        pricing=9.9,
+    )
+
+    async def _run():
+        subscription = order_event_bus.subscribe(5)
+        stream = stream_order_events(subscription, heartbeat_seconds=0.01)
+        assert (await stream.__anext__()).startswith(b"retry: ")
+
+        # 其他进程写入后，本进程的事件先于心跳到达
+        order_change_signal.bump()
+        await asyncio.to_thread(publish_order_event, OrderEventKind.CREATED, order)
+        assert (await stream.__anext__()).startswith(b"event: order-created\n")
+        assert (await stream.__anext__()).startswith(b"event: resync\n")
+        assert await stream.__anext__() == b": keep-alive\n\n"
+
+        await stream.aclose()
+
+    asyncio.run(_run())
+
+
+def test_stream_checks_signal_while_events_keep_arriving():
+    """测试本进程事件持续到达（从不超时）时仍按心跳间隔检查其他进程的写入"""
+    order = OrderOut(
+        id=44,
+        activation_code="STREAM-CODE-3",
+        status=OrderStatus.PROCESSING,
+        created_at=datetime(2026, 3, 1, 9, 0),
+        channel_id=5,
+        pricing=9.9,
+    )
+
+    async def _run():
+        subscription = order_event_bus.subscribe(5)
+        stream = stream_order_events(subscription, heartbeat_seconds=0.05)
+        assert (await stream.__anext__()).startswith(b"retry: ")
+
+        order_change_signal.bump()
+        chunks = []
+        for _ in range(6):
+            await asyncio.sleep(0.02)
+            publish_order_event(OrderEventKind.CREATED, order)
+            chunk = await stream.__anext__()
+            chunks.append(chunk)
+            if chunk.startswith(b"event: resync\n"):
+                break
+
+        assert chunks[-1].startswith(b"event: resync\n")
+        assert all(chunk.startswith(b"event: order-created\n") for chunk in chunks[:-1])
+        await stream.aclose()
+
+    asyncio.run(_run())
+
+
+def test_verify_and_complete_publish_events(test_db_session: Session):
+    """测试下单与完成订单后发布事件"""
+    channel = Channel(name="推送渠道")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="推送卡", description="推送", price=3.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    test_db_session.add(ActivationCode(card_id=card.id, code="STREAM-VERIFY-1"))
+    test_db_session.commit()
+
+    async def _run():
+        subscription = order_event_bus.subscribe(channel.id)
+        try:
+            order = verify_activation_code(
+                test_db_session, "STREAM-VERIFY-1", channel.id
+            )
+            complete_order(test_db_session, order.id)
+            created = await subscription.get(1)
+            completed = await subscription.get(1)
+        finally:
+            order_event_bus.unsubscribe(subscription)
+
+        assert created.kind == OrderEventKind.CREATED
+        assert created.order["id"] == order.id
+        assert completed.kind == OrderEventKind.COMPLETED
+        assert completed.order["status"] == "completed"
+
+    asyncio.run(_run())
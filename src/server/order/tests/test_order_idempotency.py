@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+下单幂等键测试
+"""
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.models import ActivationCode
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.idempotency import (
+    IdempotencyKeyInFlight,
+    IdempotencyKeyReused,
+    OrderIdempotencyStore,
+)
+from src.server.order.models import Order, OrderIdempotencyKey
+
+
+class _Clock:
+    def __init__(self, now: float = 1_800_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _seed(db: Session, codes: list[str]) -> Channel:
+    channel = Channel(name="幂等渠道")
+    db.add(channel)
+    db.commit()
+    card = Card(name="幂等卡", description="幂等", price=5.0, channel_id=channel.id)
+    db.add(card)
+    db.commit()
+    db.add_all(ActivationCode(card_id=card.id, code=code) for code in codes)
+    db.commit()
+    return channel
+
+
+def test_store_replays_expires_and_evicts(test_db_session: Session):
+    """测试内存存储：重放、指纹校验、处理中冲突、过期与 LRU 淘汰"""
+    clock = _Clock()
+    store = OrderIdempotencyStore(
+        ttl_seconds=60, max_entries=2, persist=False, clock=clock
+    )
+
+    assert store.reserve(test_db_session, "a", "fp-a") is None
+    with pytest.raises(IdempotencyKeyInFlight):
+        store.reserve(test_db_session, "a", "fp-a")
+    with pytest.raises(IdempotencyKeyReused):
+        store.reserve(test_db_session, "a", "fp-other")
+    store.complete(test_db_session, "a", "fp-a", 201, {"id": 1})
+
+    stored = store.reserve(test_db_session, "a", "fp-a")
+    assert stored is not None and stored.body == {"id": 1}
+    with pytest.raises(IdempotencyKeyReused):
+        store.reserve(test_db_session, "a", "fp-other")
+
+    # 失败的请求释放占用后可以重试
+    assert store.reserve(test_db_session, "b", "fp-b") is None
+    store.release("b")
+    assert store.reserve(test_db_session, "b", "fp-b") is None
+    store.complete(test_db_session, "b", "fp-b", 201, {"id": 2})
+
+    # 最久未使用的 a 被淘汰
+    store.reserve(test_db_session, "c", "fp-c")
+    store.complete(test_db_session, "c", "fp-c", 201, {"id": 3})
+    assert store.reserve(test_db_session, "a", "fp-a") is None
+    store.release("a")
+
+    clock.now += 61
+    assert store.reserve(test_db_session, "c", "fp-c") is None
+
+
+def test_replayed_create_does_not_touch_activation_code(test_client, test_db_session):
+    """测试相同幂等键重试下单时重放首次响应，不再创建订单"""
+    channel = _seed(test_db_session, ["IDEM-ROUTE-1"])
+    payload = {"code": "IDEM-ROUTE-1", "channel_id": channel.id, "remarks": "重试"}
+    headers = {"Idempotency-Key": "route-replay-key"}
+
+    first = test_client.post("/api/orders/create", json=payload, headers=headers)
+    second = test_client.post("/api/orders/create", json=payload, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert test_db_session.scalar(select(func.count(Order.id))) == 1
+
+    # 不带幂等键的重试仍然按卡密状态拒绝
+    again = test_client.post("/api/orders/create", json=payload)
+    assert again.status_code == 400
+
+    reused = test_client.post(
+        "/api/orders/create",
+        json={**payload, "remarks": "另一个请求"},
+        headers=headers,
+    )
+    assert reused.status_code == 422
+
+
+def test_persisted_key_survives_new_store(test_db_session: Session):
+    """测试开启持久化时幂等记录随订单提交，新的存储实例（如其他进程）也能重放"""
+    from src.server.order.service import creation
+
+    channel = _seed(test_db_session, ["IDEM-PERSIST-1"])
+    clock = _Clock()
+    store = OrderIdempotencyStore(ttl_seconds=60, persist=True, clock=clock)
+    original = creation.order_idempotency_store
+    creation.order_idempotency_store = store
+    try:
+        order = creation.verify_activation_code(
+            test_db_session,
+            "IDEM-PERSIST-1",
+            channel.id,
+            idempotency_key="persist-key",
+        )
+    finally:
+        creation.order_idempotency_store = original
+
+    row = test_db_session.get(OrderIdempotencyKey, "persist-key")
+    assert row is not None and row.status_code == 201
+
+    fresh = OrderIdempotencyStore(ttl_seconds=60, persist=True, clock=clock)
+    fingerprint = creation._request_fingerprint(
+        "IDEM-PERSIST-1", channel.id, None, None
+    )
+    stored = fresh.reserve(test_db_session, "persist-key", fingerprint)
+    assert stored is not None and stored.body["id"] == order.id
+
+    clock.now += 61
+    expired = OrderIdempotencyStore(ttl_seconds=60, persist=True, clock=clock)
+    assert expired.reserve(test_db_session, "persist-key", fingerprint) is None
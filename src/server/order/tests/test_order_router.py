@@ -56,6 +56,103 @@ def test_list_processing_orders(test_client, test_db_session):
     assert isinstance(processing_orders_data, list)
 
 
+def test_processing_orders_delta_sync(test_client, test_db_session):
+    """测试处理中订单的增量同步：游标之后的变更、无变更 204、无效游标返回完整列表"""
+    from src.server.auth.service import bootstrap_default_admin
+    from src.server.card.models import Card
+
+    bootstrap_default_admin(test_db_session)
+    headers = {"Authorization": f"Bearer {auth_config.test_token}"}
+
+    channel = Channel(name="增量渠道", description="增量同步测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="增量卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    codes = [c.code for c in create_activation_codes(test_db_session, card.id, 2)]
+
+    first = test_client.post(
+        "/api/orders/create", json={"code": codes[0], "channel_id": channel.id}
+    ).json()
+    full = test_client.get("/api/orders/processing", headers=headers)
+    assert full.headers["X-Order-Sync"] == "full"
+    cursor = full.headers["X-Order-Cursor"]
+
+    unchanged = test_client.get(
+        "/api/orders/processing", params={"since": cursor}, headers=headers
+    )
+    assert unchanged.status_code == 204
+    assert unchanged.headers["X-Order-Cursor"] == cursor
+
+    second = test_client.post(
+        "/api/orders/create", json={"code": codes[1], "channel_id": channel.id}
+    ).json()
+    test_client.put(f"/api/orders/{first['id']}/complete", headers=headers)
+
+    delta = test_client.get(
+        "/api/orders/processing", params={"since": cursor}, headers=headers
+    )
+    assert delta.status_code == 200
+    assert delta.headers["X-Order-Sync"] == "delta"
+    assert int(delta.headers["X-Order-Cursor"]) == int(cursor) + 2
+    assert [(o["id"], o["status"]) for o in delta.json()] == [
+        (second["id"], "processing"),
+        (first["id"], "completed"),
+    ]
+
+    reset = test_client.get(
+        "/api/orders/processing", params={"since": 10**6}, headers=headers
+    )
+    assert reset.headers["X-Order-Sync"] == "full"
+    assert [o["id"] for o in reset.json()] == [second["id"]]
+
+
+def test_complete_orders_bulk(test_client, test_db_session):
+    """测试批量完成订单接口"""
+    from src.server.auth.service import bootstrap_default_admin
+    from src.server.card.models import Card
+
+    bootstrap_default_admin(test_db_session)
+    headers = {"Authorization": f"Bearer {auth_config.test_token}"}
+
+    channel = Channel(name="批量接口渠道", description="批量完成测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="批量接口卡", description="描述", price=5.0, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    codes = [c.code for c in create_activation_codes(test_db_session, card.id, 2)]
+    order_ids = [
+        test_client.post(
+            "/api/orders/create", json={"code": code, "channel_id": channel.id}
+        ).json()["id"]
+        for code in codes
+    ]
+
+    duplicate = test_client.put(
+        "/api/orders/complete",
+        json={"orders": [{"order_id": order_ids[0]}, {"order_id": order_ids[0]}]},
+        headers=headers,
+    )
+    assert duplicate.status_code == 422
+
+    resp = test_client.put(
+        "/api/orders/complete",
+        json={
+            "orders": [
+                {"order_id": order_ids[0], "remarks": "批量"},
+                {"order_id": order_ids[1]},
+            ]
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["completed"] == 2
+    assert [r["order"]["status"] for r in data["results"]] == ["completed"] * 2
+
+
 def test_create_order(test_client, test_db_session):
     """测试创建订单"""
     # 先创建一个渠道
@@ -301,3 +398,93 @@ def test_create_order_with_pricing(test_client, test_db_session):
     assert order["status"] == "processing"
     assert order["card_name"] == "自定义充值卡名称_with_pricing"
     assert order["pricing"] == 39.99  # 验证 pricing 字段
+
+
+def test_list_orders_normalized_shape(test_client, test_db_session):
+    """测试订单列表 normalized 结构：充值卡只在 cards 映射中出现一次"""
+    from src.server.auth.service import bootstrap_default_admin
+    from src.server.card.models import Card
+
+    bootstrap_default_admin(test_db_session)
+
+    channel = Channel(name="测试渠道_normalized", description="规范化结构测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(
+        name="测试充值卡_normalized",
+        description="规范化结构测试",
+        price=19.9,
+        is_active=True,
+        channel_id=channel.id,
+    )
+    test_db_session.add(card)
+    test_db_session.commit()
+
+    codes = create_activation_codes(test_db_session, card.id, 3)
+    for code in codes:
+        resp = test_client.post(
+            "/api/orders/create", json={"code": code.code, "channel_id": channel.id}
+        )
+        assert resp.status_code == 201
+
+    resp = test_client.get(
+        "/api/orders?shape=normalized",
+        headers={"Authorization": f"Bearer {auth_config.test_token}"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["cards"] == {
+        str(card.id): {"id": card.id, "name": card.name, "price": 19.9}
+    }
+    assert len(data["orders"]) == 3
+    for order in data["orders"]:
+        assert order["card_id"] == card.id
+        assert "pricing" not in order
+
+
+def test_list_processing_orders_conditional_get(test_client, test_db_session):
+    """测试处理中订单列表 ETag：新订单使旧 ETag 失效"""
+    from src.server.auth.service import bootstrap_default_admin
+    from src.server.card.models import Card
+
+    bootstrap_default_admin(test_db_session)
+    headers = {"Authorization": f"Bearer {auth_config.test_token}"}
+
+    channel = Channel(name="测试渠道_etag", description="条件请求测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(
+        name="测试充值卡_etag",
+        description="条件请求测试",
+        price=9.9,
+        is_active=True,
+        channel_id=channel.id,
+    )
+    test_db_session.add(card)
+    test_db_session.commit()
+    codes = create_activation_codes(test_db_session, card.id, 2)
+
+    resp = test_client.post(
+        "/api/orders/create", json={"code": codes[0].code, "channel_id": channel.id}
+    )
+    assert resp.status_code == 201
+
+    resp = test_client.get("/api/orders/processing", headers=headers)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = test_client.get(
+        "/api/orders/processing", headers={**headers, "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+
+    resp = test_client.post(
+        "/api/orders/create", json={"code": codes[1].code, "channel_id": channel.id}
+    )
+    assert resp.status_code == 201
+
+    resp = test_client.get(
+        "/api/orders/processing", headers={**headers, "If-None-Match": etag}
+    )
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
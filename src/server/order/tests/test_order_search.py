@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+订单全文搜索测试
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.server.auth.config import auth_config
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.channel.models import Channel
+from src.server.order.models import Order
+from src.server.order.schemas import OrderStatus
+from src.server.order.service import search_orders
+
+
+def _seed(db: Session) -> tuple[Channel, Channel, list[Order]]:
+    own = Channel(name="搜索渠道")
+    other = Channel(name="其他搜索渠道")
+    db.add_all([own, other])
+    db.commit()
+    orders = [
+        Order(
+            activation_code="GPT-ABCD-1234",
+            remarks="客户要求加急处理",
+            card_name="ChatGPT Plus",
+            channel_id=own.id,
+            user_id=0,
+        ),
+        Order(
+            activation_code="MJ-ZZZZ-9999",
+            remarks="普通订单 abcd",
+            card_name="Midjourney",
+            channel_id=own.id,
+            user_id=0,
+        ),
+        Order(
+            activation_code="GPT-ABCD-5678",
+            card_name="ChatGPT Plus",
+            channel_id=other.id,
+            user_id=0,
+        ),
+    ]
+    db.add_all(orders)
+    db.commit()
+    return own, other, orders
+
+
+def test_search_matches_substrings_and_ranks_code_hits_first(
+    test_db_session: Session,
+):
+    """测试子串匹配（不区分大小写），卡密命中排在备注命中之前"""
+    _, _, orders = _seed(test_db_session)
+
+    results = search_orders(test_db_session, "abcd")
+    assert [order["id"] for order in results][-1] == orders[1].id
+    assert {order["id"] for order in results} == {order.id for order in orders}
+
+    # 多个词须同时命中，短词在索引结果上过滤
+    assert [o["id"] for o in search_orders(test_db_session, "chatgpt 加急")] == [
+        orders[0].id
+    ]
+    assert search_orders(test_db_session, "chatgpt 退款") == []
+
+    with pytest.raises(HTTPException) as exc:
+        search_orders(test_db_session, "加急")
+    assert exc.value.status_code == 400
+
+
+def test_search_index_follows_writes(test_db_session: Session):
+    """测试更新备注与删除订单后索引同步"""
+    _, _, orders = _seed(test_db_session)
+
+    orders[2].remarks = "已退款订单"
+    test_db_session.commit()
+    assert [o["id"] for o in search_orders(test_db_session, "已退款")] == [orders[2].id]
+
+    test_db_session.delete(orders[2])
+    test_db_session.commit()
+    assert search_orders(test_db_session, "已退款") == []
+
+
+def test_search_scoped_to_staff_channel(test_db_session: Session):
+    """测试员工只能搜索所属渠道的订单"""
+    own, _, orders = _seed(test_db_session)
+    staff = User(username="search_staff", email="search@example.com", role=Role.STAFF)
+    staff.channel_id = own.id
+    staff.set_password("password")
+    test_db_session.add(staff)
+    test_db_session.commit()
+
+    results = search_orders(test_db_session, "GPT-ABCD", staff)
+
+    assert [order["id"] for order in results] == [orders[0].id]
+    assert results[0]["status"] == OrderStatus.PENDING
+
+
+def test_search_uses_fts_index(test_db_session: Session):
+    """测试搜索走全文索引，不扫描订单表"""
+    _seed(test_db_session)
+    plans = []
+
+    def _explain(conn, cursor, statement, parameters, context, executemany):
+        if "orders_fts MATCH" in statement:
+            plans.extend(
+                row[-1]
+                for row in cursor.connection.execute(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+            )
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _explain)
+    try:
+        search_orders(test_db_session, "GPT-ABCD")
+    finally:
+        event.remove(engine, "before_cursor_execute", _explain)
+
+    assert any("VIRTUAL TABLE INDEX" in detail for detail in plans)
+    assert not any(detail.split()[:2] == ["SCAN", "orders"] for detail in plans)
+
+
+def test_search_route(test_client, test_db_session: Session):
+    """测试搜索接口"""
+    from src.server.auth.service import bootstrap_default_admin
+
+    bootstrap_default_admin(test_db_session)
+    _, _, orders = _seed(test_db_session)
+
+    resp = test_client.get(
+        "/api/orders/search",
+        params={"q": "midjourney"},
+        headers={"Authorization": f"Bearer {auth_config.test_token}"},
+    )
+
+    assert resp.status_code == 200
+    assert [order["id"] for order in resp.json()] == [orders[1].id]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+订单列表列投影读取测试
+"""
+
+import json
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+
+from src.server.activation_code.models import ActivationCode
+from src.server.card.models import Card
+from src.server.channel.models import Channel
+from src.server.order.models import Order
+from src.server.order.schemas import OrderOut, OrderStatus
+from src.server.order.service import (
+    list_order_rows,
+    list_processing_order_rows,
+)
+from src.server.order.service.retrieval import _build_order_out
+from src.server.responses import FastJSONResponse
+from src.server.schemas import ResponseShape
+
+
+def _seed(db: Session) -> Card:
+    channel = Channel(name="投影渠道")
+    db.add(channel)
+    db.commit()
+    card = Card(name="投影卡", description="描述", price=12.5, channel_id=channel.id)
+    db.add(card)
+    db.commit()
+    db.add_all(
+        [
+            ActivationCode(card_id=card.id, code="PROJ-CODE-1"),
+            ActivationCode(card_id=card.id, code="PROJ-CODE-2"),
+        ]
+    )
+    statuses = [OrderStatus.PROCESSING, OrderStatus.COMPLETED, OrderStatus.PROCESSING]
+    # 第三个订单的卡密不存在，价格应为 0
+    for code, order_status in zip(
+        ["PROJ-CODE-1", "PROJ-CODE-2", "PROJ-MISSING"], statuses
+    ):
+        db.add(
+            Order(
+                activation_code=code,
+                user_id=0,
+                channel_id=channel.id,
+                status=order_status,
+                card_name="自定义名称",
+            )
+        )
+    db.commit()
+    return card
+
+
+def test_rows_match_orm_output(test_db_session: Session):
+    """测试列投影路径与 ORM 构造 OrderOut 的输出一致"""
+    _seed(test_db_session)
+
+    expected = [
+        _build_order_out(order).model_dump(mode="json")
+        for order in test_db_session.query(Order)
+        .options(joinedload(Order.activation_code_obj).joinedload(ActivationCode.card))
+        .order_by(Order.created_at.desc())
+    ]
+    rendered = json.loads(FastJSONResponse(list_order_rows(test_db_session)).body)
+
+    assert rendered == expected
+    assert [
+        row["pricing"] for row in rendered if row["activation_code"] == "PROJ-MISSING"
+    ] == [0.0]
+    # 行可直接校验为 OrderOut
+    assert all(OrderOut(**row) for row in list_order_rows(test_db_session))
+
+
+def test_processing_rows_single_query(test_db_session: Session):
+    """测试处理中订单列表只执行一条查询，normalized 结构共享充值卡摘要"""
+    card_id = _seed(test_db_session).id
+    test_db_session.expunge_all()
+
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        content = list_processing_order_rows(
+            test_db_session, shape=ResponseShape.NORMALIZED
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert len(statements) == 1
+    assert isinstance(content, dict)
+    assert content["cards"] == {
+        card_id: {"id": card_id, "name": "投影卡", "price": 12.5}
+    }
+    assert [order["card_id"] for order in content["orders"]] == [card_id, None]
@@ -12,10 +12,13 @@ from src.server.order.service import (
     list_pending_orders,
     list_orders,
     complete_order,
+    complete_orders,
     verify_activation_code,
 )
 from src.server.activation_code.models import ActivationCode, CardCodeStatus
-from src.server.order.schemas import OrderStatus
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.order.schemas import OrderCompleteItem, OrderStatus
 from src.server.channel.models import Channel
 from src.server.card.models import Card
 
@@ -388,3 +391,187 @@ def test_create_order_with_long_card_name(test_db_session: Session):
     assert order is not None
     assert order.card_name == card_name
     assert order.activation_code == activation_code
+
+
+def test_verify_activation_code_claims_code_and_creates_order(test_db_session: Session):
+    """测试下单：卡密切换为 consuming，订单与价格正确"""
+    channel = Channel(name="测试渠道_verify", description="下单测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(
+        name="测试卡_verify", description="下单测试", price=12.5, channel_id=channel.id
+    )
+    test_db_session.add(card)
+    test_db_session.commit()
+    code = ActivationCode(card_id=card.id, code="VERIFY-CODE-001")
+    test_db_session.add(code)
+    test_db_session.commit()
+
+    order = verify_activation_code(test_db_session, "VERIFY-CODE-001", channel.id)
+
+    assert order.status == OrderStatus.PROCESSING
+    assert order.card_name == "测试卡_verify"
+    assert order.pricing == 12.5
+    test_db_session.refresh(code)
+    assert code.status == CardCodeStatus.CONSUMING
+    assert test_db_session.query(Order).count() == 1
+
+
+def test_create_with_code_claim_rejects_taken_code(test_db_session: Session):
+    """测试条件更新：卡密已被占用时不创建订单"""
+    from src.server.order.dao import OrderDAO
+
+    channel = Channel(name="测试渠道_cas", description="并发占用测试")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(
+        name="测试卡_cas", description="并发占用测试", price=1.0, channel_id=channel.id
+    )
+    test_db_session.add(card)
+    test_db_session.commit()
+    code = ActivationCode(
+        card_id=card.id, code="CAS-CODE-001", status=CardCodeStatus.CONSUMING
+    )
+    test_db_session.add(code)
+    test_db_session.commit()
+
+    order = OrderDAO(test_db_session).create_with_code_claim(
+        code.id, code.code, channel.id
+    )
+
+    assert order is None
+    assert test_db_session.query(Order).count() == 0
+
+
+def test_complete_orders_in_bulk(test_db_session: Session):
+    """测试批量完成：集合更新卡密与订单，逐单返回结果，员工只能完成所属渠道订单"""
+    from sqlalchemy import event
+
+    own = Channel(name="批量渠道", description="批量完成")
+    other = Channel(name="其他渠道", description="批量完成")
+    test_db_session.add_all([own, other])
+    test_db_session.commit()
+    card = Card(name="批量卡", description="批量完成", price=2.0, channel_id=own.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    staff = User(username="bulk_staff", email="bulk@example.com", role=Role.STAFF)
+    staff.channel_id = own.id
+    staff.set_password("password")
+    test_db_session.add(staff)
+
+    for i in range(3):
+        test_db_session.add(
+            ActivationCode(
+                card_id=card.id, code=f"BULK-{i}", status=CardCodeStatus.CONSUMING
+            )
+        )
+    test_db_session.add(ActivationCode(card_id=card.id, code="BULK-AVAILABLE"))
+    orders = [
+        Order(activation_code=code, channel_id=channel_id, user_id=0, status=status)
+        for code, channel_id, status in [
+            ("BULK-0", own.id, OrderStatus.PROCESSING),
+            ("BULK-1", own.id, OrderStatus.PROCESSING),
+            ("BULK-2", other.id, OrderStatus.PROCESSING),
+            ("BULK-AVAILABLE", own.id, OrderStatus.PROCESSING),
+            ("BULK-MISSING", own.id, OrderStatus.PROCESSING),
+            ("BULK-0", own.id, OrderStatus.COMPLETED),
+        ]
+    ]
+    test_db_session.add_all(orders)
+    test_db_session.commit()
+    ids = [order.id for order in orders]
+    test_db_session.refresh(staff)
+
+    statements = []
+    engine = test_db_session.get_bind()
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        result = complete_orders(
+            test_db_session,
+            [OrderCompleteItem(order_id=ids[0], remarks="已处理")]
+            + [OrderCompleteItem(order_id=order_id) for order_id in ids[1:]]
+            + [OrderCompleteItem(order_id=999999)],
+            staff,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert result["completed"] == 2
+    assert [r["outcome"] for r in result["results"]] == [
+        "completed",
+        "completed",
+        "forbidden",
+        "invalid_code_status",
+        "code_not_found",
+        "already_completed",
+        "not_found",
+    ]
+    assert result["results"][0]["order"]["remarks"] == "已处理"
+    assert result["results"][1]["order"]["status"] == "completed"
+    # 校验查询、卡密更新、订单更新、备注更新、结果查询：与订单数无关
+    assert len(statements) == 5
+
+    test_db_session.expire_all()
+    codes = {
+        code.code: code.status for code in test_db_session.query(ActivationCode).all()
+    }
+    assert codes["BULK-0"] == codes["BULK-1"] == CardCodeStatus.CONSUMED
+    assert codes["BULK-2"] == CardCodeStatus.CONSUMING
+    remaining = test_db_session.get(Order, ids[2])
+    assert remaining is not None
+    assert remaining.status == OrderStatus.PROCESSING
+
+
+def test_order_links_activation_code_by_id(test_db_session: Session):
+    """测试订单插入时按卡密字符串补全卡密ID，关联查询走整数外键"""
+    channel = Channel(name="外键渠道", description="卡密外键")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    card = Card(name="外键卡", description="卡密外键", price=7.5, channel_id=channel.id)
+    test_db_session.add(card)
+    test_db_session.commit()
+    code = ActivationCode(card_id=card.id, code="FK-CODE-001")
+    test_db_session.add(code)
+    test_db_session.commit()
+
+    linked = create_order(test_db_session, "FK-CODE-001", channel.id)
+    unknown = create_order(test_db_session, "FK-CODE-MISSING", channel.id)
+
+    assert linked.activation_code_id == code.id
+    assert unknown.activation_code_id is None
+    assert get_order(test_db_session, linked.id).pricing == 7.5
+    assert get_order(test_db_session, unknown.id).pricing == 0.0
+
+
+def test_deleted_code_id_is_not_relinked(test_db_session: Session):
+    """测试删除卡密后订单解除关联，新卡密不会沿用旧ID关联到旧订单"""
+    channel = Channel(name="删除卡密渠道", description="卡密外键")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    cheap = Card(name="旧卡", description="卡密外键", price=10, channel_id=channel.id)
+    dear = Card(name="新卡", description="卡密外键", price=99, channel_id=channel.id)
+    test_db_session.add_all([cheap, dear])
+    test_db_session.commit()
+    old_code = ActivationCode(card_id=cheap.id, code="OLD-CODE")
+    test_db_session.add(old_code)
+    test_db_session.commit()
+    order = create_order(test_db_session, "OLD-CODE", channel.id)
+    old_id = old_code.id
+
+    test_db_session.delete(old_code)
+    test_db_session.commit()
+    new_code = ActivationCode(card_id=dear.id, code="NEW-CODE")
+    test_db_session.add(new_code)
+    test_db_session.commit()
+
+    assert new_code.id != old_id
+    test_db_session.expire_all()
+    stored = test_db_session.get(Order, order.id)
+    assert stored is not None
+    assert stored.activation_code_id is None
+    assert stored.activation_code_obj is None
+    assert get_order(test_db_session, order.id).pricing == 0.0
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+订单超时检查测试
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.server.auth.config import auth_config
+from src.server.channel.models import Channel
+from src.server.order.dao import OrderDAO
+from src.server.order.events import OrderEventKind, order_event_bus
+from src.server.order.models import Order
+from src.server.order.schemas import OrderStatus
+from src.server.order.sla import OrderSlaMonitor, TimerWheel
+
+START = datetime(2026, 3, 1, 8, 0)
+
+
+class _Clock:
+    def __init__(self, now: datetime):
+        self.now = now.replace(tzinfo=timezone.utc).timestamp()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_timer_wheel_rounds_and_long_pauses():
+    """测试时间轮：取消、超过一圈的到期时间、停顿超过一圈后推进"""
+    wheel = TimerWheel(tick_seconds=10, slots=4, start=0)
+    wheel.schedule(1, 15)
+    wheel.schedule(2, 25)
+    wheel.schedule(3, 55)  # 一圈 40 秒，与 1 同槽位
+    wheel.schedule(4, 5)
+    wheel.cancel(4)
+
+    # 到期时间向上取整到刻度
+    assert wheel.advance(19) == []
+    assert wheel.advance(20) == [1]
+    assert wheel.advance(30) == [2]
+    assert len(wheel) == 1
+    assert wheel.advance(54) == []
+    assert wheel.advance(60) == [3]
+
+    wheel.schedule(5, 65)
+    wheel.schedule(6, 1000)
+    assert wheel.advance(500) == [5]
+    assert wheel.advance(1000) == [6]
+    assert len(wheel) == 0
+
+
+def test_monitor_flags_overdue_orders_once(test_db_engine, test_db_session: Session):
+    """测试检查器：加载处理中订单，已完成的不判定，超时只推送一次"""
+    channel = Channel(name="超时渠道")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    orders = [
+        Order(
+            activation_code=f"SLA-{i}",
+            channel_id=channel.id,
+            status=OrderStatus.PROCESSING,
+            created_at=START + timedelta(minutes=i * 20),
+            user_id=0,
+        )
+        for i in range(3)
+    ]
+    test_db_session.add_all(orders)
+    test_db_session.commit()
+    order_ids = [order.id for order in orders]
+
+    clock = _Clock(START + timedelta(minutes=10))
+    monitor = OrderSlaMonitor(
+        sessionmaker(bind=test_db_engine),
+        sla_seconds=1800,
+        tick_seconds=5,
+        clock=clock,
+    )
+
+    async def _run():
+        subscription = order_event_bus.subscribe(channel.id)
+        try:
+            assert monitor.run_once() == []
+            assert monitor.stats()["tracked"] == 3
+
+            # 本进程完成的订单直接取消；其他进程完成的订单到期时按主键确认
+            monitor.resolve(order_ids[1])
+            test_db_session.execute(
+                update(Order)
+                .where(Order.id == order_ids[2])
+                .values(status=OrderStatus.COMPLETED)
+            )
+            test_db_session.commit()
+
+            clock.now += 3 * 3600
+            assert monitor.run_once() == [order_ids[0]]
+            assert monitor.run_once() == []
+            event = await subscription.get(1)
+        finally:
+            order_event_bus.unsubscribe(subscription)
+
+        assert event.kind == OrderEventKind.OVERDUE
+        assert event.order["id"] == order_ids[0]
+
+    asyncio.run(_run())
+    assert monitor.stats() == {
+        "sla_seconds": 1800,
+        "tracked": 0,
+        "overdue": 1,
+        "overdue_total": 1,
+    }
+
+
+def test_monitor_syncs_orders_written_elsewhere(
+    test_db_engine, test_db_session: Session
+):
+    """测试检查器按变更序号同步其他写入路径创建与完成的订单"""
+    channel = Channel(name="同步超时渠道")
+    test_db_session.add(channel)
+    test_db_session.commit()
+    clock = _Clock(datetime.now(timezone.utc))
+    monitor = OrderSlaMonitor(
+        sessionmaker(bind=test_db_engine), sla_seconds=60, tick_seconds=1, clock=clock
+    )
+    monitor.run_once()
+
+    dao = OrderDAO(test_db_session)
+    kept = dao.create("SLA-SYNC-1", channel.id, OrderStatus.PROCESSING)
+    done = dao.create("SLA-SYNC-2", channel.id, OrderStatus.PROCESSING)
+    monitor.run_once()
+    assert monitor.stats()["tracked"] == 2
+
+    dao.update_status(done, OrderStatus.COMPLETED)
+    monitor.run_once()
+    assert monitor.stats()["tracked"] == 1
+
+    clock.now += 61
+    assert monitor.run_once() == [kept.id]
+
+
+def test_sla_route(test_client, test_db_session: Session):
+    """测试超时统计接口（测试环境未启动检查器）"""
+    from src.server.auth.service import bootstrap_default_admin
+
+    bootstrap_default_admin(test_db_session)
+    resp = test_client.get(
+        "/api/orders/sla",
+        headers={"Authorization": f"Bearer {auth_config.test_token}"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["enabled"] is False
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+订单统计测试（日汇总表与时间序列）
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.server.auth.config import auth_config
+from src.server.channel.models import Channel
+from src.server.order.dao import OrderStatsDAO
+from src.server.order.models import Order, OrderStatsDaily
+from src.server.order.schemas import OrderStatsGranularity, OrderStatus
+from src.server.order.service import get_order_stats, get_order_stats_series
+
+
+def _rollup(db: Session) -> set[tuple]:
+    db.expire_all()
+    return {
+        (row.day.isoformat(), row.channel_id, row.status, row.count)
+        for row in db.scalars(select(OrderStatsDaily))
+        if row.count
+    }
+
+
+def _seed(db: Session) -> tuple[int, int]:
+    first = Channel(name="统计渠道一")
+    second = Channel(name="统计渠道二")
+    db.add_all([first, second])
+    db.commit()
+    orders = [
+        (first.id, OrderStatus.PENDING, datetime(2026, 3, 1, 9, 15)),
+        (first.id, OrderStatus.PROCESSING, datetime(2026, 3, 1, 9, 45)),
+        (first.id, OrderStatus.COMPLETED, datetime(2026, 3, 1, 23, 59)),
+        (second.id, OrderStatus.PENDING, datetime(2026, 3, 2, 0, 1)),
+    ]
+    for index, (channel_id, order_status, created_at) in enumerate(orders):
+        db.add(
+            Order(
+                activation_code=f"STATS-{index}",
+                user_id=0,
+                channel_id=channel_id,
+                status=order_status,
+                created_at=created_at,
+            )
+        )
+    db.commit()
+    return first.id, second.id
+
+
+def test_triggers_maintain_daily_rollup(test_db_session: Session):
+    """测试插入、改状态、删除订单时日汇总表随之更新，并与重建结果一致"""
+    first, second = _seed(test_db_session)
+    assert _rollup(test_db_session) == {
+        ("2026-03-01", first, "pending", 1),
+        ("2026-03-01", first, "processing", 1),
+        ("2026-03-01", first, "completed", 1),
+        ("2026-03-02", second, "pending", 1),
+    }
+
+    pending = test_db_session.scalar(
+        select(Order).where(Order.activation_code == "STATS-0")
+    )
+    assert pending is not None
+    pending.status = OrderStatus.COMPLETED
+    test_db_session.delete(
+        test_db_session.scalar(select(Order).where(Order.activation_code == "STATS-3"))
+    )
+    test_db_session.commit()
+
+    incremental = _rollup(test_db_session)
+    assert incremental == {
+        ("2026-03-01", first, "processing", 1),
+        ("2026-03-01", first, "completed", 2),
+    }
+
+    assert OrderStatsDAO(test_db_session).rebuild_daily() == 2
+    assert _rollup(test_db_session) == incremental
+
+
+def test_get_order_stats_counts_every_status(test_db_session: Session):
+    """测试统计包含所有状态，可按渠道过滤"""
+    first, second = _seed(test_db_session)
+
+    assert get_order_stats(test_db_session) == {
+        "total_orders": 4,
+        "pending_orders": 2,
+        "processing_orders": 1,
+        "completed_orders": 1,
+    }
+    assert get_order_stats(test_db_session, channel_id=second)["total_orders"] == 1
+
+
+def test_order_stats_series_by_day_and_hour(test_db_session: Session):
+    """测试按日与按小时的时间序列"""
+    first, second = _seed(test_db_session)
+
+    daily = get_order_stats_series(
+        test_db_session,
+        OrderStatsGranularity.DAY,
+        start=datetime(2026, 3, 1),
+        end=datetime(2026, 3, 2, 12),
+    )
+    assert daily["buckets"] == [
+        {
+            "bucket": "2026-03-01",
+            "channel_id": first,
+            "pending": 1,
+            "processing": 1,
+            "completed": 1,
+            "total": 3,
+        },
+        {
+            "bucket": "2026-03-02",
+            "channel_id": second,
+            "pending": 1,
+            "processing": 0,
+            "completed": 0,
+            "total": 1,
+        },
+    ]
+
+    hourly = get_order_stats_series(
+        test_db_session,
+        OrderStatsGranularity.HOUR,
+        start=datetime(2026, 3, 1, 9),
+        end=datetime(2026, 3, 2),
+        channel_id=first,
+    )
+    assert [(b["bucket"], b["total"]) for b in hourly["buckets"]] == [
+        ("2026-03-01T09:00:00", 2),
+        ("2026-03-01T23:00:00", 1),
+    ]
+
+    with pytest.raises(HTTPException) as exc:
+        get_order_stats_series(
+            test_db_session,
+            OrderStatsGranularity.HOUR,
+            start=datetime(2026, 1, 1),
+            end=datetime(2026, 3, 1),
+        )
+    assert exc.value.status_code == 400
+
+
+def test_order_stats_series_route(test_client, test_db_session: Session):
+    """测试时间序列接口"""
+    from src.server.auth.service import bootstrap_default_admin
+
+    bootstrap_default_admin(test_db_session)
+    _seed(test_db_session)
+
+    resp = test_client.get(
+        "/api/orders/stats/series",
+        params={"granularity": "day", "start": "2026-03-01T00:00:00Z"},
+        headers={"Authorization": f"Bearer {auth_config.test_token}"},
+    )
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["granularity"] == "day"
+    assert sum(bucket["total"] for bucket in data["buckets"]) == 4
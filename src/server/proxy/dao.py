@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+代理商模块 DAO
+
+公开接口：
+- `ProxyRevenueDAO`：代理商销售额查询（日汇总表与卡密表）
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Sequence
+
+from sqlalchemy import Row, and_, delete, func, insert, or_, select
+
+from src.server.activation_code.models import ActivationCode, CardCodeStatus
+from src.server.card.models import Card
+from src.server.dao.dao_base import BaseDAO
+from .models import ProxyCardAssociation, ProxyRevenueDaily
+
+
+class ProxyRevenueDAO(BaseDAO):
+    """代理商销售额查询
+
+    只统计代理商已绑定的充值卡下、由该代理商售出且已消费的卡密。
+    整天的部分读取日汇总表 `proxy_revenue_daily`（由触发器维护），
+    不足一天的区间边缘对卡密表查询，走 (proxy_user_id, used_at) 索引。
+    """
+
+    def linked_proxy_ids(self, proxy_ids: list[int]) -> set[int]:
+        """绑定了充值卡的代理商ID"""
+        return set(
+            self.db_session.scalars(
+                select(ProxyCardAssociation.proxy_user_id)
+                .where(ProxyCardAssociation.proxy_user_id.in_(proxy_ids))
+                .distinct()
+            )
+        )
+
+    def daily_totals(
+        self,
+        proxy_ids: list[int],
+        start: date | None = None,
+        end: date | None = None,
+    ) -> Sequence[Row]:
+        """日汇总表中的销售额：(proxy_user_id, amount, count)，日期区间左闭右开"""
+        linked_card = (
+            select(ProxyCardAssociation.id)
+            .where(
+                ProxyCardAssociation.proxy_user_id == ProxyRevenueDaily.proxy_user_id,
+                ProxyCardAssociation.card_id == ProxyRevenueDaily.card_id,
+            )
+            .exists()
+        )
+        query = (
+            select(
+                ProxyRevenueDaily.proxy_user_id,
+                func.sum(ProxyRevenueDaily.amount),
+                func.sum(ProxyRevenueDaily.count),
+            )
+            .where(ProxyRevenueDaily.proxy_user_id.in_(proxy_ids), linked_card)
+            .group_by(ProxyRevenueDaily.proxy_user_id)
+        )
+        if start is not None:
+            query = query.where(ProxyRevenueDaily.day >= start)
+        if end is not None:
+            query = query.where(ProxyRevenueDaily.day < end)
+        return self.db_session.execute(query).all()
+
+    def consumed_totals(
+        self,
+        proxy_ids: list[int],
+        ranges: Sequence[tuple[datetime | None, datetime | None, bool]],
+        include_undated: bool = False,
+    ) -> Sequence[Row]:
+        """卡密表中的销售额：(proxy_user_id, amount, count)
+
+        ranges 为消费时间区间 (开始, 结束, 是否包含结束时间) 的列表，开始时间包含在内；
+        include_undated 时一并统计没有消费时间的卡密。
+        充值卡不存在的卡密计入数量，不计入销售额。
+        """
+        conditions = []
+        for start, end, end_inclusive in ranges:
+            bounds = []
+            if start is not None:
+                bounds.append(ActivationCode.used_at >= start)
+            if end is not None:
+                bounds.append(
+                    ActivationCode.used_at <= end
+                    if end_inclusive
+                    else ActivationCode.used_at < end
+                )
+            conditions.append(and_(ActivationCode.used_at.is_not(None), *bounds))
+        if include_undated:
+            conditions.append(ActivationCode.used_at.is_(None))
+        if not conditions:
+            return []
+
+        linked_card = (
+            select(ProxyCardAssociation.id)
+            .where(
+                ProxyCardAssociation.proxy_user_id == ActivationCode.proxy_user_id,
+                ProxyCardAssociation.card_id == ActivationCode.card_id,
+            )
+            .exists()
+        )
+        query = (
+            select(
+                ActivationCode.proxy_user_id,
+                func.coalesce(func.sum(Card.price), 0.0),
+                func.count(ActivationCode.id),
+            )
+            .outerjoin(Card, Card.id == ActivationCode.card_id)
+            .where(
+                ActivationCode.proxy_user_id.in_(proxy_ids),
+                ActivationCode.status == CardCodeStatus.CONSUMED,
+                or_(*conditions),
+                linked_card,
+            )
+            .group_by(ActivationCode.proxy_user_id)
+        )
+        return self.db_session.execute(query).all()
+
+    def rebuild_daily(self) -> int:
+        """从卡密表重建日汇总表（回填或修复），返回写入的行数"""
+        day = func.date(ActivationCode.used_at)
+        self.db_session.execute(delete(ProxyRevenueDaily))
+        result = self.db_session.execute(
+            insert(ProxyRevenueDaily).from_select(
+                ["proxy_user_id", "card_id", "day", "count", "amount"],
+                select(
+                    ActivationCode.proxy_user_id,
+                    ActivationCode.card_id,
+                    day,
+                    func.count(),
+                    func.coalesce(func.sum(Card.price), 0.0),
+                )
+                .outerjoin(Card, Card.id == ActivationCode.card_id)
+                .where(
+                    ActivationCode.status == CardCodeStatus.CONSUMED,
+                    ActivationCode.proxy_user_id.is_not(None),
+                    ActivationCode.used_at.is_not(None),
+                )
+                .group_by(ActivationCode.proxy_user_id, ActivationCode.card_id, day),
+            )
+        )
+        self.db_session.commit()
+        return result.rowcount
+
+    def backfill_daily_if_empty(self) -> bool:
+        """日汇总表为空而有已消费的代理商卡密时重建（升级到带汇总表的版本后首次启动）"""
+        has_rollup = self.db_session.scalar(
+            select(ProxyRevenueDaily.proxy_user_id).limit(1)
+        )
+        if has_rollup is not None:
+            return False
+        has_consumed = self.db_session.scalar(
+            select(ActivationCode.id)
+            .where(
+                ActivationCode.status == CardCodeStatus.CONSUMED,
+                ActivationCode.proxy_user_id.is_not(None),
+            )
+            .limit(1)
+        )
+        if has_consumed is None:
+            return False
+        self.rebuild_daily()
+        return True
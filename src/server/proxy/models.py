@@ -4,12 +4,24 @@
 
 公开接口：
 - `ProxyCardAssociation`
+- `ProxyRevenueDaily`：按（代理商, 充值卡, 日期）汇总的已消费卡密数与销售额（日汇总表）
+- `install_proxy_revenue_triggers(connection)`：安装维护日汇总表的触发器
+
+说明：
+- 日汇总表由 `activation_codes` 上的触发器在卡密消费的同一事务内增量维护
+  （消费 +1，状态/代理商/充值卡/消费日期变化时旧桶 -1、新桶 +1，删除 -1），
+  `set_code_consumed`、批量完成订单、直接导入已消费卡密等写入路径都不会遗漏；
+- 只统计已消费、有代理商且有消费时间的卡密，日期按 UTC 的 `date(used_at)` 划分；
+- 销售额按充值卡的当前价格计算（与直接查询卡密表一致）：充值卡改价时按数量重算，
+  充值卡删除后销售额为 0；
+- 新建数据库时自动安装触发器，已有数据库由 `ensure_database_schema` 安装并回填。
 """
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from sqlalchemy import Integer, DateTime, ForeignKey
+from datetime import date, datetime, timezone
+from sqlalchemy import Date, Float, Integer, DateTime, ForeignKey, event, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.server.database import Base
@@ -34,3 +46,94 @@ class ProxyCardAssociation(Base):
 
     def __repr__(self) -> str:
         return f"<ProxyCardAssociation(proxy_user_id={self.proxy_user_id}, card_id={self.card_id})>"
+
+
+class ProxyRevenueDaily(Base):
+    """代理商销售额日汇总表模型
+
+    由触发器维护，不在业务代码中直接写入；数量减到 0 的行保留
+    """
+
+    __tablename__ = "proxy_revenue_daily"
+    __table_args__ = {"extend_existing": True}
+
+    proxy_user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    card_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    amount: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+
+_CODE_PRICE = "coalesce((SELECT price FROM cards WHERE cards.id = {row}.card_id), 0)"
+
+_REVENUE_INCREMENT = f"""
+    INSERT INTO proxy_revenue_daily (proxy_user_id, card_id, day, count, amount)
+    SELECT NEW.proxy_user_id, NEW.card_id, date(NEW.used_at), 1,
+           {_CODE_PRICE.format(row="NEW")}
+    WHERE NEW.status = 'consumed'
+      AND NEW.proxy_user_id IS NOT NULL
+      AND NEW.used_at IS NOT NULL
+    ON CONFLICT (proxy_user_id, card_id, day) DO UPDATE
+    SET count = count + 1, amount = amount + excluded.amount;
+"""
+
+_REVENUE_DECREMENT = f"""
+    UPDATE proxy_revenue_daily
+    SET count = count - 1, amount = amount - {_CODE_PRICE.format(row="OLD")}
+    WHERE OLD.status = 'consumed'
+      AND proxy_user_id = OLD.proxy_user_id
+      AND card_id = OLD.card_id
+      AND day = date(OLD.used_at);
+"""
+
+PROXY_REVENUE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_activation_codes_revenue_insert
+    AFTER INSERT ON activation_codes
+    BEGIN {_REVENUE_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_activation_codes_revenue_update
+    AFTER UPDATE OF status, proxy_user_id, card_id, used_at ON activation_codes
+    WHEN OLD.status IS NOT NEW.status
+      OR OLD.proxy_user_id IS NOT NEW.proxy_user_id
+      OR OLD.card_id IS NOT NEW.card_id
+      OR date(OLD.used_at) IS NOT date(NEW.used_at)
+    BEGIN {_REVENUE_DECREMENT} {_REVENUE_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_activation_codes_revenue_delete
+    AFTER DELETE ON activation_codes
+    BEGIN {_REVENUE_DECREMENT} END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_cards_revenue_price
+    AFTER UPDATE OF price ON cards
+    WHEN OLD.price IS NOT NEW.price
+    BEGIN
+        UPDATE proxy_revenue_daily SET amount = count * coalesce(NEW.price, 0)
+        WHERE card_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_cards_revenue_delete
+    AFTER DELETE ON cards
+    BEGIN
+        UPDATE proxy_revenue_daily SET amount = 0 WHERE card_id = OLD.id;
+    END
+    """,
+)
+
+
+def install_proxy_revenue_triggers(connection: Connection) -> None:
+    """安装维护日汇总表的触发器（已存在时跳过）"""
+    for statement in PROXY_REVENUE_TRIGGERS:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_triggers_after_create(target, connection: Connection, **kw) -> None:
+    # 触发器建在卡密表与充值卡表上，须在全部表创建之后安装
+    tables = {table.name for table in kw.get("tables") or target.sorted_tables}
+    if {"activation_codes", "cards", "proxy_revenue_daily"} <= tables:
+        install_proxy_revenue_triggers(connection)
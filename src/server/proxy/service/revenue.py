@@ -7,19 +7,27 @@
 
 内部方法：
 - `_calculate_single_proxy_revenue`
+- `_revenue_totals`、`_to_utc_naive`、`_describe_time_range`
+
+说明：
+- 销售额由按代理商分组的聚合查询计算，同时覆盖全部目标代理商，
+  查询次数与卡密数量、代理商数量无关；
+- 区间内的整天读取日汇总表 `proxy_revenue_daily`（见 `models.py`），
+  首尾不足一天的部分从卡密表汇总，查询全部时间时只有没有消费时间的卡密需要读取卡密表；
+- 时间按 UTC 处理，带时区的查询参数先转换为 UTC。
 """
 
 from __future__ import annotations
 
-from typing import List
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
-from ..models import ProxyCardAssociation
+from ..dao import ProxyRevenueDAO
 from ..schemas import RevenueQueryParams, RevenueResponse, MultiRevenueResponse
 from src.server.auth.models import User
 from src.server.auth.schemas import Role
-from src.server.activation_code.models import ActivationCode, CardCodeStatus
 
 
 def calculate_proxy_revenue(
@@ -80,11 +88,30 @@ def calculate_proxy_revenue(
         # 没有找到任何代理商
         return MultiRevenueResponse(revenues=[], total_count=0)
 
-    # 为每个代理商计算销售额
+    # 一次分组聚合计算全部目标代理商的销售额
+    proxy_ids = [proxy.id for proxy in target_proxies]
+    linked = ProxyRevenueDAO(db).linked_proxy_ids(proxy_ids)
+    totals = _revenue_totals(db, proxy_ids, query_params)
+    time_range_desc = _describe_time_range(query_params)
+
     revenues = []
     for target_proxy in target_proxies:
-        revenue_data = _calculate_single_proxy_revenue(db, target_proxy, query_params)
-        revenues.append(revenue_data)
+        total_revenue, consumed_count = totals.get(target_proxy.id, (0.0, 0))
+        revenues.append(
+            RevenueResponse(
+                proxy_user_id=target_proxy.id,
+                proxy_username=target_proxy.username,
+                proxy_name=target_proxy.name,
+                total_revenue=total_revenue,
+                consumed_count=consumed_count,
+                start_date=query_params.start_date,
+                end_date=query_params.end_date,
+                # 代理商没有绑定任何充值卡
+                query_time_range=time_range_desc
+                if target_proxy.id in linked
+                else "无绑定卡密",
+            )
+        )
 
     return MultiRevenueResponse(revenues=revenues, total_count=len(revenues))
 
@@ -102,82 +129,80 @@ def _calculate_single_proxy_revenue(
     Returns:
         RevenueResponse: 单个代理商的销售额统计结果
     """
-    target_proxy_id = target_proxy.id
-
-    # 获取代理商绑定的所有充值卡ID
-    associations = (
-        db.query(ProxyCardAssociation)
-        .filter(ProxyCardAssociation.proxy_user_id == target_proxy_id)
-        .all()
-    )
-
-    if not associations:
-        # 代理商没有绑定任何充值卡，返回零销售额
-        return RevenueResponse(
-            proxy_user_id=target_proxy_id,
-            proxy_username=target_proxy.username,
-            proxy_name=target_proxy.name,
-            total_revenue=0.0,
-            consumed_count=0,
-            start_date=query_params.start_date,
-            end_date=query_params.end_date,
-            query_time_range="无绑定卡密",
-        )
-
-    card_ids = [assoc.card_id for assoc in associations]
-
-    # 构建查询条件
-    query = db.query(ActivationCode).filter(
-        ActivationCode.card_id.in_(card_ids),
-        ActivationCode.status == CardCodeStatus.CONSUMED,
-        ActivationCode.proxy_user_id == target_proxy_id,
-    )
-
-    # 添加时间筛选
-    time_range_desc = "全部时间"
-    if query_params.start_date:
-        query = query.filter(ActivationCode.used_at >= query_params.start_date)
-        time_range_desc = (
-            f"从 {query_params.start_date.strftime('%Y-%m-%d %H:%M:%S')} 开始"
-        )
-    if query_params.end_date:
-        query = query.filter(ActivationCode.used_at <= query_params.end_date)
-        if query_params.start_date:
-            time_range_desc = f"{query_params.start_date.strftime('%Y-%m-%d %H:%M:%S')} 至 {query_params.end_date.strftime('%Y-%m-%d %H:%M:%S')}"
-        else:
-            time_range_desc = (
-                f"至 {query_params.end_date.strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-
-    # 获取已消费的卡密
-    consumed_codes = query.all()
-    consumed_count = len(consumed_codes)
-
-    if consumed_count == 0:
-        return RevenueResponse(
-            proxy_user_id=target_proxy_id,
-            proxy_username=target_proxy.username,
-            proxy_name=target_proxy.name,
-            total_revenue=0.0,
-            consumed_count=0,
-            start_date=query_params.start_date,
-            end_date=query_params.end_date,
-            query_time_range=time_range_desc,
-        )
-
-    # 直接通过已消费的卡密计算总销售额
-    total_revenue = 0.0
-    for consumed_code in consumed_codes:
-        # 通过 ActivationCode 的 card 关联获取价格
-        if consumed_code.card and consumed_code.card.price:
-            total_revenue += consumed_code.card.price
+    linked = ProxyRevenueDAO(db).linked_proxy_ids([target_proxy.id])
+    total_revenue, consumed_count = _revenue_totals(
+        db, [target_proxy.id], query_params
+    ).get(target_proxy.id, (0.0, 0))
     return RevenueResponse(
-        proxy_user_id=target_proxy_id,
+        proxy_user_id=target_proxy.id,
         proxy_username=target_proxy.username,
         proxy_name=target_proxy.name,
         total_revenue=total_revenue,
         consumed_count=consumed_count,
         start_date=query_params.start_date,
         end_date=query_params.end_date,
-        query_time_range=time_range_desc,
+        query_time_range=_describe_time_range(query_params) if linked else "无绑定卡密",
     )
+
+
+def _revenue_totals(
+    db: Session, proxy_ids: List[int], query_params: RevenueQueryParams
+) -> Dict[int, Tuple[float, int]]:
+    """按代理商的销售额与已消费卡密数：代理商ID -> (总销售额, 已消费卡密数)
+
+    区间内的整天读取日汇总表，首尾不足一天的部分查询卡密表，两次查询的结果相加。
+    """
+    start = _to_utc_naive(query_params.start_date)
+    end = _to_utc_naive(query_params.end_date)
+
+    # 整天的日期区间 [first_day, last_day)：开始时间不在零点时从次日起算，
+    # 结束时间（含）所在的当天只统计到结束时间
+    first_day = None
+    if start is not None:
+        first_day = start.date()
+        if start.time() != time.min:
+            first_day += timedelta(days=1)
+    last_day = end.date() if end is not None else None
+
+    dao = ProxyRevenueDAO(db)
+    totals: Dict[int, Tuple[float, int]] = {}
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        # 区间内没有完整的一天
+        rows = dao.consumed_totals(proxy_ids, [(start, end, True)])
+    else:
+        ranges: List[Tuple[datetime | None, datetime | None, bool]] = []
+        if start is not None and first_day is not None:
+            first_midnight = datetime.combine(first_day, time.min)
+            if start < first_midnight:
+                ranges.append((start, first_midnight, False))
+        if end is not None and last_day is not None:
+            ranges.append((datetime.combine(last_day, time.min), end, True))
+        rows = [
+            *dao.daily_totals(proxy_ids, first_day, last_day),
+            *dao.consumed_totals(
+                proxy_ids, ranges, include_undated=start is None and end is None
+            ),
+        ]
+    for proxy_id, amount, count in rows:
+        total_revenue, consumed_count = totals.get(proxy_id, (0.0, 0))
+        totals[proxy_id] = (total_revenue + float(amount or 0), consumed_count + count)
+    return totals
+
+
+def _to_utc_naive(value: datetime | None) -> datetime | None:
+    """带时区的时间转换为 UTC 并去掉时区（数据库中按 UTC 无时区存储）"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _describe_time_range(query_params: RevenueQueryParams) -> str:
+    """查询的时间范围描述"""
+    start_date, end_date = query_params.start_date, query_params.end_date
+    if start_date and end_date:
+        return f"{start_date.strftime('%Y-%m-%d %H:%M:%S')} 至 {end_date.strftime('%Y-%m-%d %H:%M:%S')}"
+    if start_date:
+        return f"从 {start_date.strftime('%Y-%m-%d %H:%M:%S')} 开始"
+    if end_date:
+        return f"至 {end_date.strftime('%Y-%m-%d %H:%M:%S')}"
+    return "全部时间"
@@ -439,3 +439,75 @@ def test_calculate_proxy_revenue_admin_non_proxy_user(test_db_session: Session):
     result = calculate_proxy_revenue(test_db_session, admin_user, query_params)
     assert len(result.revenues) == 0
     assert result.total_count == 0
+
+
+def test_calculate_proxy_revenue_query_count_is_constant(test_db_session: Session):
+    """测试销售额由分组聚合计算，查询次数与卡密数量、代理商数量无关"""
+    from sqlalchemy import event
+
+    from src.server.proxy.service import link_proxy_to_cards
+
+    admin_user = User(
+        username="admin_count", email="admin_count@example.com", role=Role.ADMIN
+    )
+    admin_user.set_password("password123")
+    test_db_session.add(admin_user)
+    test_db_session.commit()
+
+    def _add_proxy(index: int, codes: int) -> User:
+        proxy_user = User(
+            username=f"proxy_count_{index}",
+            email=f"proxy_count_{index}@example.com",
+            role=Role.PROXY,
+        )
+        proxy_user.set_password("password123")
+        card = Card(
+            name=f"Count Card {index}",
+            description="Test Description",
+            price=10.0,
+            channel_id=1,
+            is_active=True,
+        )
+        test_db_session.add_all([proxy_user, card])
+        test_db_session.commit()
+        link_proxy_to_cards(test_db_session, proxy_user.id, [card.id])
+        test_db_session.add_all(
+            ActivationCode(
+                card_id=card.id,
+                code=f"COUNT{index}-{i}",
+                status=CardCodeStatus.CONSUMED,
+                proxy_user_id=proxy_user.id,
+                used_at=datetime.now(timezone.utc),
+            )
+            for i in range(codes)
+        )
+        test_db_session.commit()
+        return proxy_user
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def _count_queries() -> tuple[int, list[float]]:
+        query_params = RevenueQueryParams(query="proxy_count")
+        test_db_session.expire_all()
+        statements.clear()
+        engine = test_db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            result = calculate_proxy_revenue(test_db_session, admin_user, query_params)
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+        revenues = sorted(result.revenues, key=lambda x: x.proxy_username)
+        return len(statements), [revenue.total_revenue for revenue in revenues]
+
+    _add_proxy(1, 2)
+    small, small_totals = _count_queries()
+    _add_proxy(2, 30)
+    _add_proxy(3, 5)
+    large, large_totals = _count_queries()
+
+    assert small_totals == [20.0]
+    assert large_totals == [20.0, 300.0, 50.0]
+    assert large == small
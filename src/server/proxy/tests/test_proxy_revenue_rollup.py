@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""代理商销售额日汇总表测试"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from src.server.activation_code.models import ActivationCode, CardCodeStatus
+from src.server.activation_code.service import set_code_consumed
+from src.server.auth.models import User
+from src.server.auth.schemas import Role
+from src.server.card.models import Card
+from src.server.proxy.dao import ProxyRevenueDAO
+from src.server.proxy.models import ProxyRevenueDaily
+from src.server.proxy.schemas import RevenueQueryParams
+from src.server.proxy.service import calculate_proxy_revenue, link_proxy_to_cards
+
+DAY = datetime(2026, 3, 10)
+
+
+def _seed(db: Session, price: float = 20.0) -> tuple[User, Card]:
+    proxy_user = User(
+        username="proxy_rollup", email="proxy_rollup@example.com", role=Role.PROXY
+    )
+    proxy_user.set_password("password123")
+    card = Card(
+        name="Rollup Card",
+        description="Test Description",
+        price=price,
+        channel_id=1,
+        is_active=True,
+    )
+    db.add_all([proxy_user, card])
+    db.commit()
+    link_proxy_to_cards(db, proxy_user.id, [card.id])
+    return proxy_user, card
+
+
+def _rollup(db: Session) -> list[tuple]:
+    return [
+        tuple(row)
+        for row in db.execute(
+            select(
+                ProxyRevenueDaily.day,
+                ProxyRevenueDaily.count,
+                ProxyRevenueDaily.amount,
+            ).order_by(ProxyRevenueDaily.day)
+        )
+    ]
+
+
+def test_rollup_follows_consumption_price_and_delete(test_db_session: Session):
+    """测试触发器在消费、改价、删除卡密时维护日汇总表"""
+    proxy_user, card = _seed(test_db_session)
+    code = ActivationCode(
+        card_id=card.id,
+        code="ROLLUP-1",
+        status=CardCodeStatus.CONSUMING,
+        proxy_user_id=proxy_user.id,
+    )
+    test_db_session.add(code)
+    test_db_session.commit()
+    assert _rollup(test_db_session) == []
+
+    consumed = set_code_consumed(test_db_session, "ROLLUP-1")
+    assert consumed.used_at is not None
+    today = consumed.used_at.date()
+    assert _rollup(test_db_session) == [(today, 1, 20.0)]
+
+    test_db_session.execute(update(Card).where(Card.id == card.id).values(price=25.0))
+    test_db_session.commit()
+    assert _rollup(test_db_session) == [(today, 1, 25.0)]
+
+    test_db_session.execute(delete(ActivationCode).where(ActivationCode.id == code.id))
+    test_db_session.commit()
+    assert _rollup(test_db_session) == [(today, 0, 0.0)]
+
+
+def test_ranges_combine_rollup_and_edge_days(test_db_session: Session):
+    """测试任意时间区间：整天读汇总表、首尾不足一天读卡密表，结果与逐条统计一致"""
+    proxy_user, card = _seed(test_db_session, price=10.0)
+    used_times = [
+        DAY + timedelta(days=day, hours=hour)
+        for day in range(4)
+        for hour in (1, 12, 23)
+    ]
+    test_db_session.add_all(
+        ActivationCode(
+            card_id=card.id,
+            code=f"RANGE-{i}",
+            status=CardCodeStatus.CONSUMED,
+            proxy_user_id=proxy_user.id,
+            used_at=used_at,
+        )
+        for i, used_at in enumerate(used_times)
+    )
+    test_db_session.commit()
+
+    def _revenue(start, end):
+        query_params = RevenueQueryParams(start_date=start, end_date=end)
+        revenue = calculate_proxy_revenue(
+            test_db_session, proxy_user, query_params
+        ).revenues[0]
+        return revenue.consumed_count, revenue.total_revenue
+
+    def _expected(start, end):
+        count = sum(
+            (start is None or used_at >= start) and (end is None or used_at <= end)
+            for used_at in used_times
+        )
+        return count, count * 10.0
+
+    ranges = [
+        (None, None),
+        (DAY + timedelta(hours=12), None),
+        (None, DAY + timedelta(days=2, hours=12)),
+        (DAY + timedelta(hours=12), DAY + timedelta(days=2, hours=12)),
+        (DAY + timedelta(days=1), DAY + timedelta(days=3)),
+        (DAY + timedelta(days=1, hours=2), DAY + timedelta(days=1, hours=23)),
+        (DAY + timedelta(days=1, hours=23), DAY + timedelta(days=2, hours=1)),
+    ]
+    for start, end in ranges:
+        assert _revenue(start, end) == _expected(start, end), (start, end)
+
+    # 带时区的参数按 UTC 处理
+    start = (DAY + timedelta(hours=12)).replace(tzinfo=timezone.utc)
+    end = start.astimezone(timezone(timedelta(hours=8))) + timedelta(days=1)
+    assert _revenue(start, end) == (4, 40.0)
+
+
+def test_rebuild_matches_trigger_rollup(test_db_session: Session):
+    """测试从卡密表重建的汇总表与触发器维护的一致"""
+    proxy_user, card = _seed(test_db_session, price=15.0)
+    test_db_session.add_all(
+        ActivationCode(
+            card_id=card.id,
+            code=f"REBUILD-{i}",
+            status=CardCodeStatus.CONSUMED,
+            proxy_user_id=proxy_user.id,
+            used_at=DAY + timedelta(hours=i * 7),
+        )
+        for i in range(6)
+    )
+    test_db_session.commit()
+    maintained = _rollup(test_db_session)
+
+    dao = ProxyRevenueDAO(test_db_session)
+    assert dao.backfill_daily_if_empty() is False
+    assert dao.rebuild_daily() == len(maintained)
+    assert _rollup(test_db_session) == maintained
+
+    test_db_session.execute(delete(ProxyRevenueDaily))
+    test_db_session.commit()
+    assert dao.backfill_daily_if_empty() is True
+    assert _rollup(test_db_session) == maintained
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+快速 JSON 响应
+
+公开接口：
+- `FastJSONResponse`：使用 orjson 编码的 JSON 响应类
+
+内部方法：
+- `_default`
+
+说明：
+- 路由直接返回该响应时，FastAPI 不会再按 `response_model` 校验和序列化内容，
+  因此只用于返回由数据库列直接构造、无需再校验的可信数据；
+- `response_model` 仍应保留在路由装饰器上，用于生成 OpenAPI 文档。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# OPT_UTC_Z：UTC 时间输出为 `Z` 结尾，与 Pydantic 的序列化结果保持一致
+# OPT_NON_STR_KEYS：允许整数作为对象键（如按 ID 索引的映射）
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """处理 orjson 不能原生编码的对象"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"无法序列化类型 {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 编码的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
@@ -4,6 +4,7 @@
 
 公开接口：
 - `DatabaseInfo`：数据库信息模型
+- `ResponseShape`：列表响应结构（嵌套 / 规范化）
 
 内部方法：
 - 无
@@ -12,6 +13,7 @@
 - 跨模块轻量共享的数据模型放在此处
 """
 
+from enum import Enum
 from pydantic import BaseModel
 from typing import Optional
 
@@ -22,3 +24,14 @@ class DatabaseInfo(BaseModel):
     database_exists: bool
     database_size: Optional[int] = None
     database_path: str
+
+
+class ResponseShape(str, Enum):
+    """列表响应结构
+
+    - nested：每行内嵌完整的关联对象（默认，兼容旧客户端）
+    - normalized：关联对象只在顶层映射中出现一次，行内仅保留其 ID
+    """
+
+    NESTED = "nested"
+    NORMALIZED = "normalized"